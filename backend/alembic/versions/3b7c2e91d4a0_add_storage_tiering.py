@@ -0,0 +1,42 @@
+"""add_storage_tiering
+
+Revision ID: 3b7c2e91d4a0
+Revises: 1f1d8b1cc2c2
+Create Date: 2026-10-19 09:12:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b7c2e91d4a0'
+down_revision: Union[str, Sequence[str], None] = '1f1d8b1cc2c2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+storage_tier = sa.Enum('Hot', 'Cool', 'Archive', name='storagetier')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    storage_tier.create(op.get_bind(), checkfirst=True)
+    op.add_column('video', sa.Column('access_tier', storage_tier, server_default='Hot', nullable=False))
+    op.add_column('video', sa.Column('last_accessed_at', sa.DateTime(timezone=True), nullable=True))
+    op.create_index('idx_videos_tier_accessed', 'video', ['access_tier', 'last_accessed_at'], unique=False)
+    op.add_column('file_storages', sa.Column('access_tier', storage_tier, server_default='Hot', nullable=False))
+    op.add_column('file_storages', sa.Column('last_accessed_at', sa.DateTime(timezone=True), nullable=True))
+    op.create_index('idx_file_tier_accessed', 'file_storages', ['access_tier', 'last_accessed_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_file_tier_accessed', table_name='file_storages')
+    op.drop_column('file_storages', 'last_accessed_at')
+    op.drop_column('file_storages', 'access_tier')
+    op.drop_index('idx_videos_tier_accessed', table_name='video')
+    op.drop_column('video', 'last_accessed_at')
+    op.drop_column('video', 'access_tier')
+    storage_tier.drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,61 @@
+"""add_clip_renditions
+
+Revision ID: 5e7b1c9d2f60
+Revises: c4a9e2d71b55
+Create Date: 2026-10-19 20:40:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e7b1c9d2f60'
+down_revision: Union[str, Sequence[str], None] = 'c4a9e2d71b55'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# both enum types already exist (created with the clip table)
+clip_format = postgresql.ENUM('VERTICAL_9_16', 'SQUARE_1_1', 'HORIZONTAL_16_9', name='clipformat', create_type=False)
+clip_status = postgresql.ENUM('PENDING', 'PROCESSING', 'READY', 'FAILED', name='clipstatus', create_type=False)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'clip_rendition',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('clip_id', sa.Integer(), nullable=False),
+        sa.Column('profile', sa.String(length=50), nullable=False),
+        sa.Column('format', clip_format, nullable=False),
+        sa.Column('profile_key', sa.String(length=16), nullable=False),
+        sa.Column('status', clip_status, nullable=False),
+        sa.Column('file_path', sa.String(length=500), nullable=True),
+        sa.Column('file_size', sa.BigInteger(), nullable=True),
+        sa.Column('error_message', sa.Text(), nullable=True),
+        sa.Column('ref_count', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('last_used_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['clip_id'], ['clip.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('clip_id', 'profile', 'format', 'profile_key', name='uq_clip_rendition_key'),
+    )
+    op.create_index(op.f('ix_clip_rendition_clip_id'), 'clip_rendition', ['clip_id'], unique=False)
+    op.create_index('idx_rendition_eviction', 'clip_rendition', ['status', 'ref_count', 'last_used_at'], unique=False)
+    op.add_column('post', sa.Column('rendition_id', sa.Integer(), nullable=True))
+    op.create_index(op.f('ix_post_rendition_id'), 'post', ['rendition_id'], unique=False)
+    op.create_foreign_key('post_rendition_id_fkey', 'post', 'clip_rendition', ['rendition_id'], ['id'], ondelete='SET NULL')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('post_rendition_id_fkey', 'post', type_='foreignkey')
+    op.drop_index(op.f('ix_post_rendition_id'), table_name='post')
+    op.drop_column('post', 'rendition_id')
+    op.drop_index('idx_rendition_eviction', table_name='clip_rendition')
+    op.drop_index(op.f('ix_clip_rendition_clip_id'), table_name='clip_rendition')
+    op.drop_table('clip_rendition')
@@ -0,0 +1,32 @@
+"""add_user_plan
+
+Revision ID: 79d29b7eae25
+Revises: 5e7b1c9d2f60
+Create Date: 2026-10-19 14:05:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '79d29b7eae25'
+down_revision: Union[str, Sequence[str], None] = '5e7b1c9d2f60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+user_plan = sa.Enum('FREE', 'BASIC', 'PRO', name='userplan')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    user_plan.create(op.get_bind(), checkfirst=True)
+    op.add_column('user', sa.Column('plan', user_plan, server_default='FREE', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('user', 'plan')
+    user_plan.drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,30 @@
+"""add_hls_manifest_urls
+
+Revision ID: 8d41f0a7c3e2
+Revises: 3b7c2e91d4a0
+Create Date: 2026-10-19 14:05:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d41f0a7c3e2'
+down_revision: Union[str, Sequence[str], None] = '3b7c2e91d4a0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('video', sa.Column('hls_manifest_url', sa.Text(), nullable=True))
+    op.add_column('clip', sa.Column('hls_manifest_url', sa.String(length=500), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('clip', 'hls_manifest_url')
+    op.drop_column('video', 'hls_manifest_url')
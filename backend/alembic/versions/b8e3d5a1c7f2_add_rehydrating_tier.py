@@ -0,0 +1,30 @@
+"""add_rehydrating_tier
+
+Revision ID: b8e3d5a1c7f2
+Revises: 79d29b7eae25
+Create Date: 2026-10-19 15:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8e3d5a1c7f2'
+down_revision: Union[str, Sequence[str], None] = '79d29b7eae25'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        op.execute("ALTER TYPE storagetier ADD VALUE IF NOT EXISTS 'Rehydrating'")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # postgres can't drop an enum value; put rows back to Archive and leave the label unused
+    op.execute("UPDATE video SET access_tier = 'Archive' WHERE access_tier = 'Rehydrating'")
+    op.execute("UPDATE file_storages SET access_tier = 'Archive' WHERE access_tier = 'Rehydrating'")
@@ -0,0 +1,32 @@
+"""clip_transcript_ranges
+
+Revision ID: c4a9e2d71b55
+Revises: 8d41f0a7c3e2
+Create Date: 2026-10-19 18:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4a9e2d71b55'
+down_revision: Union[str, Sequence[str], None] = '8d41f0a7c3e2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('clip', sa.Column('transcript_start_index', sa.Integer(), nullable=True))
+    op.add_column('clip', sa.Column('transcript_end_index', sa.Integer(), nullable=True))
+    op.drop_column('clip', 'transcript')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.add_column('clip', sa.Column('transcript', sa.JSON(), nullable=True))
+    op.drop_column('clip', 'transcript_end_index')
+    op.drop_column('clip', 'transcript_start_index')
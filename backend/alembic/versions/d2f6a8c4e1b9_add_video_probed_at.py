@@ -0,0 +1,30 @@
+"""add_video_probed_at
+
+Revision ID: d2f6a8c4e1b9
+Revises: b8e3d5a1c7f2
+Create Date: 2026-10-19 14:05:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2f6a8c4e1b9'
+down_revision: Union[str, Sequence[str], None] = 'b8e3d5a1c7f2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('video', sa.Column('probed_at', sa.DateTime(timezone=True), nullable=True))
+    # videos that already have their metadata don't need probing again
+    op.execute("UPDATE video SET probed_at = updated_at WHERE resolution_width IS NOT NULL OR duration_seconds IS NOT NULL")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('video', 'probed_at')
@@ -0,0 +1,35 @@
+"""add_suggested_clip_status
+
+Revision ID: e7c3b9d5f2a6
+Revises: d2f6a8c4e1b9
+Create Date: 2026-10-19 14:05:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7c3b9d5f2a6'
+down_revision: Union[str, Sequence[str], None] = 'd2f6a8c4e1b9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        op.execute("ALTER TYPE clipstatus ADD VALUE IF NOT EXISTS 'SUGGESTED'")
+    # scored suggestions were inserted as PENDING; keep them out of the render queue
+    op.execute(
+        "UPDATE clip SET status = 'SUGGESTED' "
+        "WHERE status = 'PENDING' AND ai_score IS NOT NULL"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # postgres can't drop an enum value; suggestions go back to being pending clips
+    op.execute("UPDATE clip SET status = 'PENDING' WHERE status = 'SUGGESTED'")
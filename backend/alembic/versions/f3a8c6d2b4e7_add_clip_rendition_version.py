@@ -0,0 +1,41 @@
+"""add_clip_rendition_version
+
+Revision ID: f3a8c6d2b4e7
+Revises: e7c3b9d5f2a6
+Create Date: 2026-10-19 16:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3a8c6d2b4e7'
+down_revision: Union[str, Sequence[str], None] = 'e7c3b9d5f2a6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # existing renditions have no version, so the next post of each clip encodes it again
+    op.add_column('clip_rendition', sa.Column('clip_version', sa.String(length=16), server_default='', nullable=False))
+    op.drop_constraint('uq_clip_rendition_key', 'clip_rendition', type_='unique')
+    op.create_unique_constraint(
+        'uq_clip_rendition_key', 'clip_rendition', ['clip_id', 'profile', 'format', 'profile_key', 'clip_version']
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # keep the newest rendition of each key; posts of the others lose theirs (rendition_id SET NULL)
+    op.execute(
+        "DELETE FROM clip_rendition r USING clip_rendition newer "
+        "WHERE r.clip_id = newer.clip_id AND r.profile = newer.profile AND r.format = newer.format "
+        "AND r.profile_key = newer.profile_key AND r.id < newer.id"
+    )
+    op.drop_constraint('uq_clip_rendition_key', 'clip_rendition', type_='unique')
+    op.create_unique_constraint('uq_clip_rendition_key', 'clip_rendition', ['clip_id', 'profile', 'format', 'profile_key'])
+    op.drop_column('clip_rendition', 'clip_version')
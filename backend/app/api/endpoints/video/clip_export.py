@@ -0,0 +1,85 @@
+import re
+from typing import Iterator, List, cast
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.celery.cleanup import promote_video_blobs
+from app.config import settings
+from app.core.auth.auth_endpoints import get_current_user
+from app.db.database import get_db
+from app.models.clip import Clip
+from app.models.enums import ClipStatus
+from app.models.user import User
+from app.models.video import Video
+from app.services.azure_storage import AzureUploadService
+from app.services.storage_tiering import record_video_reads
+from app.services.zip_stream import ZipEntry, iter_blob_ranges, stream_zip
+
+router = APIRouter(prefix="/exports")
+
+
+def _entry_name(clip: Clip) -> str:
+    # the id keeps names unique when titles repeat
+    slug = re.sub(r"[^A-Za-z0-9]+", "-", clip.title or "").strip("-")[:60]
+    return f"{clip.id}-{slug}.mp4" if slug else f"clip-{clip.id}.mp4"
+
+
+def _archive(clips: List[Clip]) -> Iterator[bytes]:
+    azure_service = AzureUploadService()
+
+    def entries():
+        for clip in clips:
+            # export_clips only selects clips that have a file
+            file_path = cast(str, clip.file_path)
+            size = clip.file_size
+            if not size:
+                size = azure_service.get_blob_client(file_path).get_blob_properties().size
+            yield ZipEntry(
+                name=_entry_name(clip),
+                chunks=iter_blob_ranges(file_path, size, settings.EXPORT_CHUNK_BYTES, azure_service),
+                size=size,
+                mtime=clip.updated_at.timestamp() if clip.updated_at else None,
+            )
+
+    return stream_zip(entries())
+
+
+@router.get("/clips.zip")
+async def export_clips(
+    clip_ids: List[int] = Query(..., alias="ids"),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Download rendered clips as one ZIP. The archive is written while it is sent: each clip is
+    read from storage in ranged chunks and stored without recompression, so memory stays flat
+    however many clips are requested.
+    """
+    if len(clip_ids) > settings.EXPORT_MAX_CLIPS:
+        raise HTTPException(status_code=400, detail=f"At most {settings.EXPORT_MAX_CLIPS} clips per export")
+    result = await db.execute(
+        select(Clip)
+        .join(Video, Clip.video_id == Video.id)
+        .where(
+            Clip.id.in_(clip_ids),
+            Video.user_id == current_user.id,
+            Clip.status == ClipStatus.READY,
+            Clip.file_path.is_not(None),
+        )
+        .order_by(Clip.id)
+    )
+    clips = result.scalars().all()
+    if not clips:
+        raise HTTPException(status_code=404, detail="No rendered clips to export")
+    cold = await record_video_reads(db, [clip.video_id for clip in clips])
+    if cold:
+        promote_video_blobs.delay(cold)
+    # a sync iterator: Starlette pulls it in its threadpool, so blob reads never block the event loop
+    return StreamingResponse(
+        _archive(list(clips)),
+        media_type="application/zip",
+        headers={"Content-Disposition": 'attachment; filename="clips.zip"', "Cache-Control": "no-store"},
+    )
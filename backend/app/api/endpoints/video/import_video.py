@@ -21,7 +21,7 @@ async def import_video(video_request: VideoUploadRequest, user: User = Depends(g
     
     try:
         print("the task is about to start : ")
-        task = process_video_upload_streaming.delay(url, user.id, custom_filename)
+        task = process_video_upload_streaming.delay(url, user.id, custom_filename, user.plan.value)
         print(f"the task is : {task}")
         print(f"task id: {task.id}")
         return VideoUploadResponse(
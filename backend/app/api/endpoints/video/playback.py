@@ -0,0 +1,79 @@
+import asyncio
+
+from azure.core.exceptions import ResourceNotFoundError
+from fastapi import APIRouter, Depends, HTTPException, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.celery.cleanup import promote_video_blobs
+from app.core.auth.auth_endpoints import get_current_user
+from app.db.database import get_db
+from app.models.clip import Clip
+from app.models.user import User
+from app.models.video import Video
+from app.services.hls_packager import MASTER_PLAYLIST, HlsPackagingService, hls_blob_name, validate_playlist_path
+from app.services.storage_tiering import record_video_reads
+
+router = APIRouter(prefix="/playback")
+
+HLS_MEDIA_TYPE = "application/vnd.apple.mpegurl"
+
+
+async def _playlist_response(source_path: str, manifest: str) -> Response:
+    try:
+        playlist_path = hls_blob_name(source_path, validate_playlist_path(manifest))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        playlist = await asyncio.to_thread(HlsPackagingService().signed_playlist, playlist_path)
+    except ResourceNotFoundError:
+        raise HTTPException(status_code=404, detail="Playlist not found")
+    # segment urls are signed per response, so the playlist itself must not be cached for long
+    return Response(content=playlist, media_type=HLS_MEDIA_TYPE, headers={"Cache-Control": "private, max-age=60"})
+
+
+async def _record_playback(db: AsyncSession, video_id: int, manifest: str) -> None:
+    # once per playback session, not for every variant playlist the player fetches
+    if manifest != MASTER_PLAYLIST:
+        return
+    if await record_video_reads(db, [video_id]):
+        promote_video_blobs.delay([video_id])
+
+
+@router.get("/videos/{video_id}/{manifest:path}")
+async def video_playlist(
+    video_id: int,
+    manifest: str,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Serve an HLS playlist of a video with signed segment urls. Start from `master.m3u8`; the
+    variant playlists it lists resolve back to this route.
+    """
+    result = await db.execute(select(Video).where(Video.id == video_id, Video.user_id == current_user.id))
+    video = result.scalar_one_or_none()
+    if not video or not video.hls_manifest_url or not video.azure_file_path:
+        raise HTTPException(status_code=404, detail="Video has no playback renditions")
+    await _record_playback(db, video.id, manifest)
+    return await _playlist_response(video.azure_file_path, manifest)
+
+
+@router.get("/clips/{clip_id}/{manifest:path}")
+async def clip_playlist(
+    clip_id: int,
+    manifest: str,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Serve an HLS playlist of a rendered clip with signed segment urls.
+    """
+    result = await db.execute(
+        select(Clip).join(Video, Clip.video_id == Video.id).where(Clip.id == clip_id, Video.user_id == current_user.id)
+    )
+    clip = result.scalar_one_or_none()
+    if not clip or not clip.hls_manifest_url or not clip.file_path:
+        raise HTTPException(status_code=404, detail="Clip has no playback renditions")
+    await _record_playback(db, clip.video_id, manifest)
+    return await _playlist_response(clip.file_path, manifest)
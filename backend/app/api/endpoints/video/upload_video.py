@@ -1,10 +1,16 @@
-from typing import Optional
+import asyncio
+import logging
+import uuid
+from typing import AsyncIterator, Optional, Tuple
 
-from fastapi import APIRouter, Depends, Query, HTTPException
+from fastapi import APIRouter, Depends, Query, HTTPException, Request
+from app.config import settings
 from app.models.enums import VideoSource, VideoStatus
-from app.services.azure_storage import AzureUploadService
+from app.services.azure_storage import AzureUploadService, build_block_plan
+from app.services.media_probe import SNIFF_BYTES, sniff_video_type
+from app.celery.video_processing import ingest_video, probe_videos
 from app.models.video import Video
-from app.schemas.schema_upload_video import VideoRequest, VideoUploadCompleteRequest
+from app.schemas.schema_upload_video import VideoBatchRequest, VideoRequest, VideoUploadCompleteRequest
 from app.models.user import User
 from app.core.auth.auth_endpoints import get_current_user
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -12,6 +18,8 @@ from sqlalchemy import select
 from app.db.database import get_db
 from datetime import datetime, timezone
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(prefix="/upload")
 
 @router.post("/generate-sas")
@@ -22,13 +30,16 @@ async def generate_sas(
 ):
     """
     Generate a SAS URL for uploading a video file to Azure Blob Storage.
+    With `block_plan` set, also return the block layout for a parallel, resumable upload.
     """
+    block_plan = _get_block_plan(request)
     azure_service = AzureUploadService()
     sas_url, file_path = azure_service.generate_sas(request.file_name)
     video = Video(
         user_id=current_user.id,
         source= VideoSource.URL_IMPORT if request.is_url else VideoSource.UPLOAD,
         original_filename=request.file_name,
+        file_size_bytes=request.file_size,
         azure_file_path=file_path,
         upload_url=sas_url,
         status= VideoStatus.PENDING_UPLOAD,
@@ -37,11 +48,191 @@ async def generate_sas(
     await db.commit()
     await db.refresh(video)
 
-    return {
+    response = {
         "sas_url": sas_url,
         "file_path": file_path,
         "video_id": video.id
     }
+    if block_plan:
+        response["block_plan"] = block_plan
+    return response
+
+
+def _get_block_plan(request: VideoRequest) -> Optional[dict]:
+    if not request.block_plan:
+        return None
+    if not request.file_size:
+        raise HTTPException(status_code=400, detail="file_size is required for a block upload plan")
+    try:
+        return build_block_plan(request.file_size)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/generate-sas/batch")
+async def generate_sas_batch(
+    request: VideoBatchRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Generate SAS URLs and video records for several files in one request and one commit.
+    """
+    block_plans = [_get_block_plan(file) for file in request.files]
+    azure_service = AzureUploadService()
+    sas_results = azure_service.generate_sas_batch([file.file_name for file in request.files])
+    videos = [
+        Video(
+            user_id=current_user.id,
+            source=VideoSource.URL_IMPORT if file.is_url else VideoSource.UPLOAD,
+            original_filename=file.file_name,
+            file_size_bytes=file.file_size,
+            azure_file_path=file_path,
+            upload_url=sas_url,
+            status=VideoStatus.PENDING_UPLOAD,
+        )
+        for file, (sas_url, file_path) in zip(request.files, sas_results)
+    ]
+    db.add_all(videos)
+    # ids are assigned on flush, so no per-row refresh is needed
+    await db.commit()
+
+    uploads = []
+    for video, block_plan in zip(videos, block_plans):
+        upload = {"sas_url": video.upload_url, "file_path": video.azure_file_path, "video_id": video.id}
+        if block_plan:
+            upload["block_plan"] = block_plan
+        uploads.append(upload)
+    return {"uploads": uploads}
+
+
+@router.get("/{video_id}/blocks")
+async def get_upload_blocks(
+    video_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Report which blocks of a planned upload Azure already holds, so clients resume only the missing ones.
+    """
+    result = await db.execute(select(Video).where(Video.id == video_id, Video.user_id == current_user.id))
+    video = result.scalar_one_or_none()
+    if not video or not video.azure_file_path:
+        raise HTTPException(status_code=404, detail="Video not found")
+    if not video.file_size_bytes:
+        raise HTTPException(status_code=400, detail="Video has no declared file size")
+
+    block_plan = build_block_plan(video.file_size_bytes)
+    azure_service = AzureUploadService()
+    committed, uncommitted = await asyncio.to_thread(azure_service.get_staged_blocks, video.azure_file_path)
+
+    staged = set(uncommitted)
+    return {
+        "video_id": video.id,
+        "committed": bool(committed),
+        "block_size": block_plan["block_size"],
+        "block_count": block_plan["block_count"],
+        "uploaded_block_ids": [block_id for block_id in block_plan["block_ids"] if block_id in staged],
+        "missing_block_ids": [] if committed else [block_id for block_id in block_plan["block_ids"] if block_id not in staged],
+    }
+
+def _queue_processing(video_id: int) -> None:
+    """
+    start background processing of an uploaded video: probe duration/resolution from the blob
+    headers (the periodic sweep catches misses) and run the single-pass ingest (thumbnails, proxy,
+    sprites, audio)
+    """
+    try:
+        probe_videos.delay([video_id])
+        ingest_video.delay(video_id)
+    except Exception as e:
+        logger.warning(f"Failed to queue processing for video {video_id}: {e}")
+
+
+async def _peek(stream: AsyncIterator[bytes], size: int) -> Tuple[bytes, AsyncIterator[bytes]]:
+    """Read at least `size` bytes (unless the body is shorter) and return them with the full stream."""
+    head = b""
+    async for chunk in stream:
+        head += chunk
+        if len(head) >= size:
+            break
+
+    async def replay() -> AsyncIterator[bytes]:
+        if head:
+            yield head
+        async for chunk in stream:
+            yield chunk
+
+    return head, replay()
+
+
+@router.post("/stream")
+async def stream_upload(
+    request: Request,
+    file_name: str = Query(..., description="Original file name of the uploaded video"),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Upload a video through the backend for clients that can't use SAS.
+    The request body is staged to Azure block by block as it arrives; it never touches local disk.
+    """
+    max_size = settings.MAX_VIDEO_SIZE_MB * 1024 * 1024
+    content_length = request.headers.get("content-length")
+    if content_length and int(content_length) > max_size:
+        raise HTTPException(status_code=413, detail=f"Video exceeds the maximum size of {settings.MAX_VIDEO_SIZE_MB} MB")
+    content_type = request.headers.get("content-type", "").split(";")[0].strip() or None
+    body = request.stream()
+    if content_type in (None, "application/octet-stream"):
+        # generic clients (curl --data-binary, fetch with a Blob) don't know the type; sniff it
+        head, body = await _peek(body, SNIFF_BYTES)
+        content_type = sniff_video_type(head)
+        if content_type is None:
+            raise HTTPException(status_code=415, detail="Unrecognised video format")
+    if content_type not in settings.ALLOWED_MIME_TYPES:
+        raise HTTPException(status_code=415, detail=f"Unsupported content type {content_type}")
+
+    azure_service = AzureUploadService()
+    file_path = azure_service.router.make_blob_name(f"{uuid.uuid4()}/{file_name}")
+    video = Video(
+        user_id=current_user.id,
+        source=VideoSource.UPLOAD,
+        original_filename=file_name,
+        mime_type=content_type,
+        azure_file_path=file_path,
+        status=VideoStatus.UPLOADING,
+    )
+    db.add(video)
+    await db.commit()
+
+    try:
+        uploaded_bytes = await azure_service.upload_async_stream_in_blocks(
+            file_path,
+            body,
+            block_size=settings.STREAM_UPLOAD_BLOCK_SIZE_MB * 1024 * 1024,
+            max_concurrency=settings.STREAM_UPLOAD_CONCURRENCY,
+            max_size=max_size,
+            content_type=content_type,
+        )
+    except ValueError as e:
+        video.status = VideoStatus.FAILED
+        video.error_message = str(e)
+        await db.commit()
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        video.status = VideoStatus.FAILED
+        video.error_message = str(e)
+        await db.commit()
+        raise HTTPException(status_code=502, detail=f"Failed to upload video: {str(e)}")
+
+    video.file_size_bytes = uploaded_bytes
+    video.azure_video_url = azure_service.get_blob_url(file_path)
+    video.status = VideoStatus.READY
+    video.upload_completed_at = datetime.now(timezone.utc)
+    video.last_accessed_at = video.upload_completed_at
+    await db.commit()
+    _queue_processing(video.id)
+
+    return {"message": "Upload completed successfully", "video_id": video.id, "file_path": file_path, "file_size": uploaded_bytes}
 
 @router.post("/complete")
 async def complete_upload(
@@ -67,9 +258,11 @@ async def complete_upload(
     video.azure_video_url = request.azure_blob_url
     video.status = VideoStatus.READY
     video.upload_completed_at = datetime.now(timezone.utc)
+    video.last_accessed_at = video.upload_completed_at
 
     db.add(video)
     await db.commit()
     await db.refresh(video)
+    _queue_processing(video.id)
 
     return {"message": "Upload completed successfully", "video_id": video.id}
@@ -0,0 +1,177 @@
+import logging
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from sqlalchemy import delete, insert
+
+from app.celery.celery_app import TIME_LIMIT_GRACE_SECONDS, celery_app, time_limits
+from app.celery.task_waits import wait_for_slot
+from app.config import settings
+from app.db.database import SessionLocal
+from app.models.clip import Clip
+from app.models.enums import ClipFormat, ClipStatus
+from app.models.video import Video
+from app.services.azure_storage import AzureUploadService, derived_blob_name
+from app.services.clip_scoring import score_candidates
+from app.services.ingest_assets import AUDIO_NAME, PROXY_NAME, load_manifest, thumbnail_index_for, thumbnail_name
+from app.services.loudness import build_loudness_envelope, load_loudness_envelope
+from app.services.node_semaphore import NodeSemaphore
+from app.services.reframe_track import build_reframe_track
+from app.services.scene_index import build_scene_index, load_scene_index, scene_cuts
+from app.services.transcription import load_transcript, speech_activity
+
+logger = logging.getLogger(__name__)
+
+# the ffmpeg pass of each analysis has its own timeout; the task gets this much on top for
+# reading sidecars and uploading the result
+ANALYSIS_LIMIT_MARGIN_SECONDS = 600
+
+# analysis passes decode video or audio; cap them per host across worker processes.
+# A lease outlives the hard time limit of the slowest analysis task.
+analysis_slots = NodeSemaphore(
+    "analysis",
+    settings.ANALYSIS_MAX_CONCURRENT_PER_NODE,
+    lease_seconds=max(settings.SCENE_INDEX_TIMEOUT_SECONDS, settings.REFRAME_TIMEOUT_SECONDS, settings.LOUDNESS_TIMEOUT_SECONDS)
+    + ANALYSIS_LIMIT_MARGIN_SECONDS + TIME_LIMIT_GRACE_SECONDS,
+)
+
+
+@contextmanager
+def _analysis_source(task, video_id: int) -> Iterator[str]:
+    """
+    Hold an analysis slot for `task` (retrying it while the node is full) and yield the source
+    blob path of the video. The DB session is closed before the analysis runs, and the slot is
+    released however the lookup or the analysis ends.
+    """
+    token = analysis_slots.try_acquire()
+    if token is None:
+        raise wait_for_slot(task, 30)
+    try:
+        db = SessionLocal()
+        try:
+            video = db.get(Video, video_id)
+            if not video or not video.azure_file_path:
+                raise ValueError(f"Video {video_id} has no stored source")
+            source_path = video.azure_file_path
+        finally:
+            db.close()
+        yield source_path
+    finally:
+        analysis_slots.release(token)
+
+
+@celery_app.task(bind=True, max_retries=20, **time_limits(settings.SCENE_INDEX_TIMEOUT_SECONDS + ANALYSIS_LIMIT_MARGIN_SECONDS))
+def index_scenes(self, video_id: int):
+    """
+        score scene changes of a video once (decoding the low-res ingest proxy when there is one)
+        and store them as a numpy sidecar for candidate searches
+    """
+    with _analysis_source(self, video_id) as source_path:
+        azure_service = AzureUploadService()
+        proxy_path = derived_blob_name(source_path, PROXY_NAME)
+        decode_path = proxy_path if azure_service.blob_exists(proxy_path) else None
+        index = build_scene_index(source_path, decode_path, azure_service)
+        return {
+            "video_id": video_id,
+            "scored_frames": len(index),
+            "cuts": int((index["score"] >= settings.SCENE_CUT_THRESHOLD).sum()),
+        }
+
+
+@celery_app.task(bind=True, max_retries=20, **time_limits(settings.REFRAME_TIMEOUT_SECONDS + ANALYSIS_LIMIT_MARGIN_SECONDS))
+def track_subject(self, video_id: int):
+    """
+        follow the subject of a video once on the low-res ingest proxy and store the smoothed
+        centre path, so 9:16 and 1:1 renders only sample their crop from it
+    """
+    with _analysis_source(self, video_id) as source_path:
+        azure_service = AzureUploadService()
+        proxy_path = derived_blob_name(source_path, PROXY_NAME)
+        decode_path = proxy_path if azure_service.blob_exists(proxy_path) else None
+        scenes = load_scene_index(source_path, azure_service)
+        cuts = scene_cuts(scenes) if scenes is not None else None
+        track = build_reframe_track(source_path, decode_path, cuts, azure_service)
+        return {"video_id": video_id, "samples": len(track), "rate_hz": settings.REFRAME_TRACK_HZ}
+
+
+@celery_app.task(bind=True, max_retries=20, **time_limits(settings.LOUDNESS_TIMEOUT_SECONDS + ANALYSIS_LIMIT_MARGIN_SECONDS))
+def compute_loudness(self, video_id: int):
+    """
+        reduce the extracted audio of a video to a 10 Hz float16 loudness envelope sidecar
+    """
+    with _analysis_source(self, video_id) as source_path:
+        azure_service = AzureUploadService()
+        audio_path = derived_blob_name(source_path, AUDIO_NAME)
+        envelope = build_loudness_envelope(
+            source_path,
+            audio_path if azure_service.blob_exists(audio_path) else None,
+            azure_service,
+        )
+        return {"video_id": video_id, "samples": len(envelope), "rate_hz": settings.LOUDNESS_ENVELOPE_HZ}
+
+
+@celery_app.task
+def suggest_clips(video_id: int, top_n: Optional[int] = None):
+    """
+        score every candidate window of a video from its analysis sidecars and insert the best
+        ones as suggested clips (replacing earlier suggestions nobody queued for rendering); the
+        transcript, when there is one, adds a speech-rate signal
+    """
+    db = SessionLocal()
+    try:
+        video = db.get(Video, video_id)
+        if not video or not video.azure_file_path:
+            raise ValueError(f"Video {video_id} has no stored source")
+
+        azure_service = AzureUploadService()
+        envelope = load_loudness_envelope(video.azure_file_path, azure_service)
+        scenes = load_scene_index(video.azure_file_path, azure_service)
+        cuts = scene_cuts(scenes) if scenes is not None else None
+        duration = video.duration_seconds
+        if not duration:
+            # fall back to the length the sidecars cover
+            duration = max(
+                len(envelope) / settings.LOUDNESS_ENVELOPE_HZ if envelope is not None else 0,
+                float(scenes["time"][-1]) if scenes is not None and len(scenes) else 0,
+            )
+
+        transcript = load_transcript(video.azure_file_path, azure_service)
+        speech = speech_activity(transcript.start_seconds(), duration) if transcript else None
+        candidates = score_candidates(duration, envelope, cuts, speech, top_n=top_n)
+
+        manifest = load_manifest(video.azure_file_path, azure_service) or {}
+        thumbnails = manifest.get("thumbnails", {})
+        rows = []
+        for candidate in candidates:
+            index = thumbnail_index_for(
+                candidate.start_time,
+                candidate.end_time,
+                thumbnails.get("count", 0),
+                thumbnails.get("interval", settings.INGEST_THUMBNAIL_INTERVAL_SECONDS),
+            )
+            first, last = transcript.range_for(candidate.start_time, candidate.end_time) if transcript else (None, None)
+            rows.append({
+                "video_id": video_id,
+                "start_time": candidate.start_time,
+                "end_time": candidate.end_time,
+                "format": ClipFormat(settings.CLIP_SUGGESTION_FORMAT),
+                "status": ClipStatus.SUGGESTED,
+                "ai_score": candidate.score,
+                "ai_reasoning": candidate.reasoning,
+                "transcript_start_index": first,
+                "transcript_end_index": last,
+                "thumbnail_url": azure_service.get_blob_url(
+                    derived_blob_name(video.azure_file_path, thumbnail_name(index))
+                ) if index is not None else None,
+            })
+
+        db.execute(
+            delete(Clip).where(Clip.video_id == video_id, Clip.status == ClipStatus.SUGGESTED)
+        )
+        if rows:
+            # one multi-row INSERT instead of an ORM flush per clip
+            db.execute(insert(Clip), rows)
+        db.commit()
+        return {"video_id": video_id, "suggested": len(rows)}
+    finally:
+        db.close()
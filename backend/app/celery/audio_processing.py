@@ -0,0 +1,57 @@
+import logging
+
+from app.celery.celery_app import celery_app
+from app.celery.task_waits import wait_for_rehydration, wait_for_slot
+from app.config import settings
+from app.db.database import SessionLocal
+from app.models.enums import FileType
+from app.models.video import Video
+from app.services.audio_services import AudioExtractionService
+from app.services.azure_storage import derived_blob_name
+from app.services.ingest_assets import AUDIO_NAME
+from app.services.node_semaphore import NodeSemaphore
+from app.services.storage_tiering import record_video_access
+from app.services.video_db_service import save_video_asset
+
+logger = logging.getLogger(__name__)
+
+# ffmpeg is CPU heavy; cap how many extractions run on one host across all worker processes.
+# extract_audio runs under the global hard time limit, so a lease outlives it.
+audio_slots = NodeSemaphore(
+    "audio_extraction", settings.AUDIO_MAX_CONCURRENT_PER_NODE, lease_seconds=celery_app.conf.task_time_limit
+)
+
+
+@celery_app.task(bind=True, max_retries=20)
+def extract_audio(self, video_id: int):
+    """
+        extract the audio track of a stored video straight from its blob into an audio blob (no temp disk);
+        ingest_video falls back to this when the audio output of its single pass fails
+    """
+    token = audio_slots.try_acquire()
+    if token is None:
+        # node is busy: give the worker slot back instead of blocking in it
+        raise wait_for_slot(self, 10)
+
+    db = SessionLocal()
+    try:
+        video = db.get(Video, video_id)
+        if not video or not video.azure_file_path:
+            raise ValueError(f"Video {video_id} has no stored source")
+        if not record_video_access(db, video):
+            # archived source is being rehydrated; try again later
+            raise wait_for_rehydration(self, video_id)
+
+        audio_path = derived_blob_name(video.azure_file_path, AUDIO_NAME)
+        service = AudioExtractionService()
+        audio_size = service.extract_to_azure(video.azure_file_path, audio_path)
+
+        shard = service.azure_service.router.shard_for_blob(audio_path)
+        video.azure_audio_url = service.azure_service.get_blob_url(audio_path)
+        save_video_asset(db, video, audio_path, FileType.AUDIO, "audio/aac", audio_size, shard.container_name)
+        db.add(video)
+        db.commit()
+        return {"video_id": video_id, "audio_path": audio_path, "audio_size": audio_size}
+    finally:
+        db.close()
+        audio_slots.release(token)
@@ -15,6 +15,18 @@ if not result_backend:
 logger.info(f"[celery] Using broker: {broker_url}")
 logger.info(f"[celery] Using result backend: {result_backend}")
 
+# a task's hard limit is its soft limit plus this, time to clean up after SoftTimeLimitExceeded
+TIME_LIMIT_GRACE_SECONDS = 300
+
+
+def time_limits(soft_seconds: int) -> dict:
+    """
+    Task options for work that outlasts the global limits below (e.g. ffmpeg over a long source):
+    SoftTimeLimitExceeded is raised in the task after `soft_seconds`, the worker is killed shortly after.
+    """
+    return {"soft_time_limit": soft_seconds, "time_limit": soft_seconds + TIME_LIMIT_GRACE_SECONDS}
+
+
 celery_app = Celery(
     "buzzler",
     broker=broker_url,
@@ -24,6 +36,8 @@ celery_app = Celery(
         "app.celery.video_processing",
         "app.celery.cleanup",
         "app.celery.import_tasks",
+        "app.celery.analysis",
+        "app.celery.transcription",
     ],
 )
 
@@ -39,6 +53,8 @@ celery_app.conf.update(
         'app.celery.video_processing.*': {'queue': 'video_processing'},
         'app.celery.cleanup.*': {'queue': 'cleanup'},
         'app.celery.import_tasks.*': {'queue': 'import_tasks'},
+        'app.celery.analysis.*': {'queue': 'analysis'},
+        'app.celery.transcription.*': {'queue': 'transcription'},
     },
     
         worker_prefetched_multiplier=1,
@@ -59,6 +75,26 @@ celery_app.conf.update(
             'schedule': 3600.0,  # Every day
             'args': (),
         },
+        'probe_pending_videos': {
+            'task': 'app.celery.video_processing.probe_pending_videos',
+            'schedule': 600.0,  # Every 10 minutes
+            'args': (),
+        },
+        'render_pending_clips': {
+            'task': 'app.celery.video_processing.render_pending_clips',
+            'schedule': 300.0,  # Every 5 minutes
+            'args': (),
+        },
+        'tier_cold_blobs': {
+            'task': 'app.celery.cleanup.tier_cold_blobs',
+            'schedule': 86400.0,  # Every day
+            'args': (),
+        },
+        'evict_clip_renditions': {
+            'task': 'app.celery.cleanup.evict_clip_renditions',
+            'schedule': 3600.0,  # Every hour
+            'args': (),
+        },
     }
 )
 
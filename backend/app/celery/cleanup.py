@@ -0,0 +1,46 @@
+from app.celery.celery_app import celery_app
+from app.db.database import SessionLocal
+from app.models.video import Video
+from app.services.rendition_cache import evict_renditions
+from app.services.storage_tiering import promote_video_blobs as promote_blobs
+from app.services.storage_tiering import tier_cold_blobs as move_cold_blobs
+
+
+@celery_app.task
+def tier_cold_blobs():
+    """
+        move source videos and stored files that nobody has read recently to the cool/archive tiers
+    """
+    db = SessionLocal()
+    try:
+        return move_cold_blobs(db)
+    finally:
+        db.close()
+
+
+@celery_app.task
+def promote_video_blobs(video_ids: list[int]):
+    """
+        bring videos a user just played or exported (and their stored files) back to the hot tier
+    """
+    db = SessionLocal()
+    try:
+        for video_id in video_ids:
+            video = db.get(Video, video_id)
+            if video:
+                promote_blobs(db, video)
+    finally:
+        db.close()
+
+
+@celery_app.task
+def evict_clip_renditions():
+    """
+        delete the least recently used platform renditions that no post references once the
+        cache is over budget (and any that sat unused for too long)
+    """
+    db = SessionLocal()
+    try:
+        return evict_renditions(db)
+    finally:
+        db.close()
@@ -1,21 +1,65 @@
+import logging
+
 from app.celery.celery_app import celery_app
+from celery.signals import worker_process_init
 from app.config import settings
 import redis
 from typing import Optional
 
 from app.services.video_services import ConcurrentStreamingVideoService, StreamingVideoService
-from app.models.enums import VideoStatus
+from app.models.enums import UserPlan, VideoStatus
 from app.schemas.schema_import_video import VideoProgressUpdate
 from app.services.video_db_service import add_video_info_to_db
+from app.services.memory_budget import node_memory_budget
+from app.services import ytdlp_executor
+from app.celery.video_processing import ingest_video, probe_videos
+from app.db.database import SessionLocal
+from app.models.video import Video
+from app.services.subtitles import fetch_subtitle_words
+from app.services.video_db_service import save_video_transcript
+
+logger = logging.getLogger(__name__)
 
 # global instances for rate limiting (sync redis with decoded string responses)
 redis_client = redis.Redis.from_url(settings.REDIS_URL, decode_responses=True)
 concurrent_uploads = ConcurrentStreamingVideoService(max_concurrent_uploads=5)
 
+
+@worker_process_init.connect
+def warm_up_downloader(**kwargs):
+    """start the yt-dlp forkserver with the extractors loaded, so imports fork from a warm interpreter"""
+    if settings.YTDLP_WARM_EXECUTOR:
+        ytdlp_executor.warm_up()
+
+def store_source_subtitles(video_id: int, track: dict) -> bool:
+    """
+        save the source's own captions as the video transcript, so the transcription stage skips it;
+        any failure returns False and leaves the video to be transcribed as usual
+    """
+    try:
+        words = fetch_subtitle_words(track)
+        if not words:
+            return False
+
+        db = SessionLocal()
+        try:
+            video = db.get(Video, video_id)
+            if not video or not video.azure_file_path:
+                return False
+            save_video_transcript(db, video, words)
+            db.commit()
+            return True
+        finally:
+            db.close()
+    except Exception as e:
+        logger.warning(f"Failed to store {track.get('language')} subtitles for video {video_id}: {e}")
+        return False
+
 @celery_app.task(bind=True, max_retries=3)
-def process_video_upload_streaming(self, url: str, user_id: str, custom_filename: Optional[str] = None): 
+def process_video_upload_streaming(self, url: str, user_id: str, custom_filename: Optional[str] = None, plan: Optional[str] = None): 
     """
         task to upload video from a streaming source (like youtube, vimeo, etc.) directly to azure with no disk space usage
+        `plan` is a UserPlan value and sets the import's share of the node bandwidth budget
     """
 
     task_id = self.request.id
@@ -97,12 +141,13 @@ def process_video_upload_streaming(self, url: str, user_id: str, custom_filename
             url=url,
             blob_name=blob_name,
             progress_callback=progress_callback_with_bytes,
+            plan=UserPlan(plan) if plan else None,
         )
 
         blob_url = streaming_service.azure_service.get_blob_url(final_blob_name)
 
         #TODO: save to database 
-        add_video_info_to_db(user_id=user_id, custom_filename=custom_filename, video_metadata={
+        video = add_video_info_to_db(user_id=user_id, custom_filename=custom_filename, video_metadata={
             'original_filename': video_info.get('original_filename', 'Unknown'),
             'duration_seconds': video_info.get('duration_seconds'),
             'thumbnail_url': video_info.get('thumbnail_url'),
@@ -113,6 +158,12 @@ def process_video_upload_streaming(self, url: str, user_id: str, custom_filename
             'file_size_bytes': uploaded_bytes,
             'status': VideoStatus.READY
         })
+        # reuse the source's captions before ingest schedules transcription
+        if video_info.get('subtitle_track'):
+            store_source_subtitles(video.id, video_info['subtitle_track'])
+        # yt-dlp only gives us the duration; resolution comes from the blob headers
+        probe_videos.delay([video.id])
+        ingest_video.delay(video.id)
 
         
 
@@ -157,7 +208,8 @@ def get_server_stats():
             "active_uploads": active_uploads,
             "active_tasks": active_uploads,  # alias for clients/tests
             "max_concurrent_uploads": concurrent_uploads.max_concurrent_uploads,
-            "available_slots": concurrent_uploads.max_concurrent_uploads - active_uploads
+            "available_slots": concurrent_uploads.max_concurrent_uploads - active_uploads,
+            **node_memory_budget.stats(),
         }
     except Exception as e:
         return {
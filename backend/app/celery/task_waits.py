@@ -0,0 +1,61 @@
+import logging
+import random
+
+from celery.exceptions import Reject, Retry
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# message headers counting how often a task was sent back to wait, per reason
+SLOT_WAITS_HEADER = "slot_waits"
+REHYDRATION_WAITS_HEADER = "rehydration_waits"
+_WAIT_HEADERS = (SLOT_WAITS_HEADER, REHYDRATION_WAITS_HEADER)
+
+
+def wait_count(task, header: str) -> int:
+    return int(getattr(task.request, header, None) or 0)
+
+
+def _send_back(task, header: str, countdown: float) -> Retry:
+    """
+    Send `task` again in `countdown` seconds under the same id, so the chord or chain it belongs to
+    still waits on it. Unlike task.retry() this doesn't use up max_retries: waiting for the node or
+    for Azure isn't a failure of the task. How often it waited rides along in the message headers.
+    """
+    request = task.request
+    if request.called_directly or request.is_eager:
+        # not from a worker (tests, apply()): let celery raise or replay it as usual
+        return task.retry(countdown=countdown)
+
+    headers = {name: wait_count(task, name) for name in _WAIT_HEADERS}
+    headers[header] += 1
+    sig = task.signature_from_request(request, countdown=countdown, headers=headers)
+    try:
+        sig.apply_async()
+    except Exception as e:
+        raise Reject(e, requeue=False)
+    return Retry(f"waiting ({header}={headers[header]})", when=countdown, sig=sig)
+
+
+def wait_for_slot(task, base_countdown: float) -> Retry:
+    """
+    Give the worker process back while every per-node slot is taken, and run `task` again later.
+    The delay doubles with each wait (capped, with jitter) so a queue of waiting tasks doesn't poll
+    redis in lockstep. Raise the result.
+    """
+    waits = wait_count(task, SLOT_WAITS_HEADER)
+    countdown = min(settings.SLOT_WAIT_MAX_SECONDS, base_countdown * 2 ** min(waits, 16))
+    return _send_back(task, SLOT_WAITS_HEADER, countdown * random.uniform(0.8, 1.2))
+
+
+def wait_for_rehydration(task, video_id: int) -> Retry:
+    """
+    Run `task` again once its archived source may have been rehydrated. Raise the result.
+    Gives up with RuntimeError after REHYDRATION_MAX_WAITS checks.
+    """
+    waits = wait_count(task, REHYDRATION_WAITS_HEADER)
+    if waits >= settings.REHYDRATION_MAX_WAITS:
+        raise RuntimeError(f"Source of video {video_id} still rehydrating after {waits} checks")
+    logger.info(f"Source of video {video_id} is rehydrating, {task.name} checks again later")
+    return _send_back(task, REHYDRATION_WAITS_HEADER, settings.REHYDRATION_POLL_SECONDS)
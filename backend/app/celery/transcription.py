@@ -0,0 +1,154 @@
+import logging
+from typing import Any, Dict, List, Optional
+
+from celery import chord, group
+from sqlalchemy import update
+
+from app.celery.celery_app import celery_app
+from app.db.database import SessionLocal
+from app.models.enums import EntityType, FileType, VideoStatus
+from app.models.file_storage import FileStorage
+from app.models.video import Video
+from app.services.azure_storage import AzureUploadService
+from app.services.loudness import load_loudness_envelope
+from app.services.media_probe import probe_media
+from app.services.transcription import (
+    get_transcription_backend,
+    plan_segments,
+    stitch_segments,
+    transcribe_segment_audio,
+)
+from app.services.video_db_service import save_video_transcript
+
+logger = logging.getLogger(__name__)
+
+
+@celery_app.task(bind=True)
+def transcribe_video(self, video_id: int):
+    """
+        split a video's audio at silences and transcribe the segments in parallel: this task is
+        replaced by a group of segment tasks whose results are stitched back in order
+    """
+    if get_transcription_backend() is None:
+        return {"video_id": video_id, "skipped": "transcription disabled"}
+
+    db = SessionLocal()
+    try:
+        video = db.get(Video, video_id)
+        if not video or not video.azure_file_path:
+            raise ValueError(f"Video {video_id} has no stored source")
+        has_transcript = db.query(FileStorage.id).filter(
+            FileStorage.entity_type == EntityType.VIDEO,
+            FileStorage.entity_id == video.id,
+            FileStorage.file_type == FileType.TRANSCRIPT,
+            FileStorage.is_deleted.is_(False),
+        ).first()
+        if has_transcript:
+            return {"video_id": video_id, "skipped": "transcript exists"}
+
+        azure_service = AzureUploadService()
+        envelope = load_loudness_envelope(video.azure_file_path, azure_service)
+        duration = video.duration_seconds
+        if not duration:
+            duration = probe_media(azure_service.generate_read_sas_url(video.azure_file_path)).get("duration_seconds")
+        if not duration:
+            raise ValueError(f"Video {video_id} has no known duration")
+
+        segments = plan_segments(duration, envelope)
+        # the status to go back to once the transcript is stored (or has failed)
+        previous = video.status if video.status != VideoStatus.TRANSCRIBING else VideoStatus.READY
+        video.status = VideoStatus.TRANSCRIBING
+        db.add(video)
+        db.commit()
+        source_path = video.azure_file_path
+    finally:
+        db.close()
+
+    logger.info(f"Transcribing video {video_id} in {len(segments)} segments")
+    header = group(
+        transcribe_segment.s(video_id, source_path, index, start, end)
+        for index, (start, end) in enumerate(segments)
+    )
+    # called if a segment task or the stitch raises, so the video never stays TRANSCRIBING
+    body = stitch_transcript.s(video_id, previous.value).on_error(
+        transcription_failed.si(video_id, previous.value)
+    )
+    # the caller (e.g. an analysis chord) waits for the stitched transcript, not for this task
+    raise self.replace(chord(header, body))
+
+
+@celery_app.task(bind=True, max_retries=3)
+def transcribe_segment(self, video_id: int, source_path: str, index: int, start: float, end: float):
+    """
+        transcribe one segment; returns [index, words] (words is None once retries are used up)
+    """
+    backend = get_transcription_backend()
+    if backend is None:
+        # transcription was switched off after the video was split up
+        logger.warning(f"Transcription disabled, skipping segment {index} of video {video_id}")
+        return [index, None]
+    try:
+        source_url = AzureUploadService().generate_read_sas_url(source_path, expires_in_minutes=60)
+        return [index, transcribe_segment_audio(backend, source_url, start, end)]
+    except Exception as e:
+        if self.request.retries < self.max_retries:
+            raise self.retry(exc=e, countdown=10 * (self.request.retries + 1))
+        logger.error(f"Transcribing segment {index} ({start}-{end}s) of video {video_id} failed: {e}")
+        return [index, None]
+
+
+def _leave_transcribing(video_id: int, previous: VideoStatus, error: Optional[str] = None) -> None:
+    """Put a video that is still TRANSCRIBING back to `previous`, recording `error` if given."""
+    db = SessionLocal()
+    try:
+        values: Dict[str, Any] = {"status": previous}
+        if error:
+            values["error_message"] = error
+        db.execute(
+            update(Video)
+            .where(Video.id == video_id, Video.status == VideoStatus.TRANSCRIBING)
+            .values(**values)
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+@celery_app.task
+def stitch_transcript(results: List[list], video_id: int, previous_status: str = VideoStatus.READY.value):
+    """
+        join segment transcripts in order, store the video transcript and leave the transcribing stage
+    """
+    failed = [index for index, words in results if words is None]
+    words = stitch_segments([(index, words) for index, words in results if words is not None])
+    previous = VideoStatus(previous_status)
+
+    if failed and len(failed) == len(results):
+        _leave_transcribing(video_id, previous, "Transcription failed")
+        return {"video_id": video_id, "words": 0, "failed_segments": failed}
+
+    db = SessionLocal()
+    try:
+        video = db.get(Video, video_id)
+        if not video or not video.azure_file_path:
+            raise ValueError(f"Video {video_id} has no stored source")
+        save_video_transcript(db, video, words)
+        # someone else may have moved the video on (e.g. marked it failed) in the meantime
+        if video.status == VideoStatus.TRANSCRIBING:
+            video.status = previous
+        if failed:
+            video.error_message = f"Transcription incomplete: {len(failed)} of {len(results)} segments failed"
+        db.add(video)
+        db.commit()
+        return {"video_id": video_id, "words": len(words), "failed_segments": failed}
+    finally:
+        db.close()
+
+
+@celery_app.task
+def transcription_failed(video_id: int, previous_status: str):
+    """
+        error callback of the transcription chord: a segment task or the stitch raised
+    """
+    logger.error(f"Transcription of video {video_id} failed")
+    _leave_transcribing(video_id, VideoStatus(previous_status), "Transcription failed")
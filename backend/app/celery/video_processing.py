@@ -0,0 +1,567 @@
+import logging
+import tempfile
+from array import array
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+import redis
+from celery import chain, chord
+from celery.exceptions import MaxRetriesExceededError, SoftTimeLimitExceeded
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.celery.analysis import compute_loudness, index_scenes, suggest_clips, track_subject
+from app.celery.audio_processing import extract_audio
+from app.celery.celery_app import celery_app, time_limits
+from app.celery.task_waits import wait_for_rehydration, wait_for_slot
+from app.celery.transcription import transcribe_video
+from app.config import settings
+from app.db.database import SessionLocal
+from app.models.clip import Clip
+from app.models.clip_rendition import ClipRendition
+from app.models.enums import ClipStatus, FileType, VideoStatus
+from app.models.post import Post
+from app.models.video import Video
+from app.services.azure_storage import AzureUploadService, derived_blob_name
+from app.services.captions import CaptionWindow, ensure_caption_tracks, get_caption_style
+from app.services.clip_renderer import ClipRenderService, ClipSpec, matches_source_aspect
+from app.services.hls_packager import HlsPackagingService
+from app.services.ingest_assets import IngestAssetService, thumbnail_index_for, thumbnail_name
+from app.services.keyframe_index import KeyframeIndex, load_or_build_keyframe_index
+from app.services.media_probe import probe_media
+from app.services.reframe_track import crop_path, load_reframe_track
+from app.services.rendition_cache import (
+    PLATFORM_PROFILES,
+    acquire_rendition,
+    claim_encode,
+    clip_version,
+    encode_rendition,
+    release_rendition,
+)
+from app.services.node_semaphore import NodeSemaphore
+from app.services.storage_tiering import record_video_access
+from app.services.transcription import load_transcript
+from app.services.video_db_service import save_video_asset
+
+logger = logging.getLogger(__name__)
+
+INGEST_LIMITS = time_limits(settings.INGEST_TIME_LIMIT_SECONDS)
+CLIP_RENDER_LIMITS = time_limits(settings.CLIP_RENDER_TIME_LIMIT_SECONDS)
+HLS_LIMITS = time_limits(settings.HLS_TIME_LIMIT_SECONDS)
+
+# rendering decodes and encodes video; cap concurrent renders per host across worker processes.
+# A lease outlives the hard time limit of the tasks holding it, so a slow encode keeps its slot.
+render_slots = NodeSemaphore(
+    "clip_render", settings.CLIP_RENDER_MAX_CONCURRENT_PER_NODE, lease_seconds=CLIP_RENDER_LIMITS["time_limit"]
+)
+ingest_slots = NodeSemaphore("ingest", settings.INGEST_MAX_CONCURRENT_PER_NODE, lease_seconds=INGEST_LIMITS["time_limit"])
+hls_slots = NodeSemaphore("hls_packaging", settings.HLS_MAX_CONCURRENT_PER_NODE, lease_seconds=HLS_LIMITS["time_limit"])
+
+
+redis_client = redis.Redis.from_url(settings.REDIS_URL, decode_responses=True)
+
+
+def _render_queued_key(video_id: int) -> str:
+    return f"render_clips_queued:{video_id}"
+
+
+PROBED_FIELDS = ("duration_seconds", "resolution_width", "resolution_height")
+
+
+def _probe_one(azure_service: AzureUploadService, video_id: int, file_path: str) -> Dict[str, Any]:
+    # probed_at is recorded whatever the outcome, so audio-only or unreadable files aren't re-probed forever
+    result = {"id": video_id, "probed_at": datetime.now(timezone.utc)}
+    try:
+        probed = probe_media(azure_service.generate_read_sas_url(file_path))
+    except Exception as e:
+        logger.warning(f"Probing video {video_id} failed: {e}")
+        return result
+    for key in PROBED_FIELDS:
+        if probed.get(key) is not None:
+            result[key] = probed[key]
+    return result
+
+
+@celery_app.task
+def probe_videos(video_ids: List[int]):
+    """
+        fill duration and resolution of uploaded videos by probing their blobs (headers only),
+        then write every result back in one bulk update
+    """
+    db = SessionLocal()
+    try:
+        rows = db.execute(
+            select(Video.id, Video.azure_file_path).where(Video.id.in_(video_ids), Video.azure_file_path.is_not(None))
+        ).all()
+        if not rows:
+            return {"probed": 0}
+
+        azure_service = AzureUploadService()
+        with ThreadPoolExecutor(max_workers=settings.PROBE_CONCURRENCY) as pool:
+            results = list(pool.map(lambda row: _probe_one(azure_service, row[0], row[1]), rows))
+
+        # bulk UPDATE by primary key (executemany)
+        db.execute(update(Video), results)
+        db.commit()
+        probed = sum(1 for result in results if any(key in result for key in PROBED_FIELDS))
+        return {"probed": probed, "failed": len(rows) - probed}
+    finally:
+        db.close()
+
+
+@celery_app.task
+def probe_pending_videos(batch_size: int = 100):
+    """
+        catch ready videos that were never probed (e.g. a probe task was lost)
+    """
+    db = SessionLocal()
+    try:
+        video_ids = db.execute(
+            select(Video.id)
+            .where(
+                Video.status == VideoStatus.READY,
+                Video.azure_file_path.is_not(None),
+                Video.probed_at.is_(None),
+            )
+            .order_by(Video.id.desc())
+            .limit(batch_size)
+        ).scalars().all()
+    finally:
+        db.close()
+    if not video_ids:
+        return {"probed": 0}
+    return probe_videos(list(video_ids))
+
+
+@celery_app.task(bind=True, max_retries=20, **INGEST_LIMITS)
+def ingest_video(self, video_id: int):
+    """
+        decode a stored video once and produce its poster, thumbnail candidates, editing proxy,
+        scrub sprite sheets and audio track in the same pass
+    """
+    token = ingest_slots.try_acquire()
+    if token is None:
+        raise wait_for_slot(self, 30)
+
+    db = SessionLocal()
+    try:
+        video = db.get(Video, video_id)
+        if not video or not video.azure_file_path:
+            raise ValueError(f"Video {video_id} has no stored source")
+        if not record_video_access(db, video):
+            # archived source is being rehydrated; try again later
+            raise wait_for_rehydration(self, video_id)
+
+        service = IngestAssetService()
+        azure_service = service.azure_service
+        result = service.ingest(video.azure_file_path)
+        bucket = azure_service.router.shard_for_blob(video.azure_file_path).container_name
+
+        if result.poster_path:
+            video.thumbnail_url = azure_service.get_blob_url(result.poster_path)
+            save_video_asset(db, video, result.poster_path, FileType.THUMBNAIL, "image/jpeg", result.poster_size, bucket)
+        if result.proxy_path:
+            save_video_asset(db, video, result.proxy_path, FileType.VIDEO, "video/mp4", result.proxy_size, bucket)
+        if result.audio_path:
+            video.azure_audio_url = azure_service.get_blob_url(result.audio_path)
+            save_video_asset(db, video, result.audio_path, FileType.AUDIO, "audio/aac", result.audio_size, bucket)
+        db.add(video)
+
+        # clips that already exist get the candidate frame nearest their start
+        clips = db.execute(
+            select(Clip.id, Clip.start_time, Clip.end_time)
+            .where(Clip.video_id == video_id, Clip.thumbnail_url.is_(None))
+        ).all()
+        thumbnails = []
+        for clip_id, start_time, end_time in clips:
+            index = thumbnail_index_for(
+                start_time, end_time, result.thumbnail_count, settings.INGEST_THUMBNAIL_INTERVAL_SECONDS
+            )
+            if index is not None:
+                path = derived_blob_name(video.azure_file_path, thumbnail_name(index))
+                thumbnails.append({"id": clip_id, "thumbnail_url": azure_service.get_blob_url(path)})
+        if thumbnails:
+            db.execute(update(Clip), thumbnails)
+        db.commit()
+        # playback renditions are a second, heavier encode; start it once the cheap assets are in
+        package_video_hls.delay(video_id)
+        # scene detection decodes the small proxy instead of the source; clip suggestions are
+        # scored once every analysis sidecar is in place
+        # the reframe track resets at scene cuts, so it waits for the scene index
+        analyses = [chain(index_scenes.si(video_id), track_subject.si(video_id))]
+        if result.audio_path:
+            # transcription splits the audio at the silences found in the loudness envelope
+            analyses.append(chain(compute_loudness.si(video_id), transcribe_video.si(video_id)))
+        elif result.has_audio:
+            # the audio output of the single pass failed; extract the track on its own instead
+            analyses.append(chain(extract_audio.si(video_id), compute_loudness.si(video_id), transcribe_video.si(video_id)))
+        chord(analyses)(suggest_clips.si(video_id))
+
+        return {
+            "video_id": video_id,
+            "poster": result.poster_path,
+            "proxy": result.proxy_path,
+            "audio": result.audio_path,
+            "thumbnails": result.thumbnail_count,
+            "sprites": result.sprite_count,
+            "errors": result.errors,
+        }
+    finally:
+        db.close()
+        ingest_slots.release(token)
+
+
+@celery_app.task(bind=True, max_retries=20, **CLIP_RENDER_LIMITS)
+def render_clips(self, video_id: int):
+    """
+        render all pending clips of a video in one decode pass and stream them to azure,
+        moving the clip statuses in bulk
+    """
+    token = render_slots.try_acquire()
+    if token is None:
+        raise wait_for_slot(self, 30)
+
+    db = SessionLocal()
+    try:
+        video = db.get(Video, video_id)
+        if not video or not video.azure_file_path:
+            raise ValueError(f"Video {video_id} has no stored source")
+        if not record_video_access(db, video):
+            # archived source is being rehydrated; try again later
+            raise wait_for_rehydration(self, video_id)
+
+        renderer = ClipRenderService()
+        keyframes: Optional[KeyframeIndex] = None
+        transcript = load_transcript(video.azure_file_path, renderer.azure_service)
+        reframe = load_reframe_track(video.azure_file_path, renderer.azure_service)
+        caption_style = get_caption_style()
+        rendered = failed = 0
+        while True:
+            clips = db.execute(
+                select(Clip)
+                .where(Clip.video_id == video_id, Clip.status == ClipStatus.PENDING)
+                .order_by(Clip.start_time)
+                .limit(settings.CLIP_RENDER_BATCH_SIZE)
+                # a second render_clips of this video takes the next batch instead of the same one
+                .with_for_update(skip_locked=True)
+            ).scalars().all()
+            if not clips:
+                break
+
+            clip_ids = [clip.id for clip in clips]
+            db.execute(update(Clip).where(Clip.id.in_(clip_ids)).values(status=ClipStatus.PROCESSING))
+            db.commit()
+
+            specs = [
+                ClipSpec(
+                    clip_id=clip.id,
+                    start_time=clip.start_time,
+                    end_time=clip.end_time,
+                    format=clip.format,
+                    output_path=derived_blob_name(video.azure_file_path, f"clips/{clip.id}.mp4"),
+                    # same geometry as the source: cut at keyframes instead of re-encoding
+                    stream_copy=matches_source_aspect(clip.format, video.resolution_width, video.resolution_height),
+                )
+                for clip in clips
+            ]
+            if reframe is not None:
+                # crops follow the subject; clips sample their path from the per-video track
+                for spec in specs:
+                    spec.crop_path = crop_path(
+                        reframe, spec.start_time, spec.end_time, spec.format,
+                        video.resolution_width, video.resolution_height,
+                    )
+            captions = {}
+            if transcript:
+                try:
+                    # sidecar tracks for every clip, generated for the whole batch in one pass
+                    captions = ensure_caption_tracks(
+                        video.azure_file_path,
+                        transcript,
+                        [
+                            CaptionWindow(
+                                clip_id=clip.id,
+                                start_time=clip.start_time,
+                                end_time=clip.end_time,
+                                format=clip.format,
+                                transcript_start_index=clip.transcript_start_index,
+                                transcript_end_index=clip.transcript_end_index,
+                            )
+                            for clip in clips
+                        ],
+                        caption_style,
+                        renderer.azure_service,
+                    )
+                except Exception as e:
+                    logger.warning(f"Captions of video {video_id} unavailable, rendering without them: {e}")
+            if keyframes is None and any(spec.stream_copy for spec in specs) and not (captions and settings.CLIP_BURN_CAPTIONS):
+                try:
+                    keyframes = load_or_build_keyframe_index(video.azure_file_path, renderer.azure_service)
+                except Exception as e:
+                    logger.warning(f"Keyframe index of video {video_id} unavailable, re-encoding all clips: {e}")
+                    keyframes = KeyframeIndex(array("d"))
+            try:
+                with tempfile.TemporaryDirectory(dir=settings.TEMP_BASE_DIR / "processing") as captions_dir:
+                    if captions and settings.CLIP_BURN_CAPTIONS:
+                        for spec in specs:
+                            track = captions[spec.clip_id]
+                            ass = track.ass
+                            if ass is None:
+                                ass = renderer.azure_service.get_blob_client(track.ass_path).download_blob().readall().decode("utf-8")
+                            spec.captions_file = str(Path(captions_dir) / f"{spec.clip_id}.ass")
+                            Path(spec.captions_file).write_text(ass, encoding="utf-8")
+                    results = renderer.render_batch(video.azure_file_path, specs, keyframes or None)
+            except Exception as e:
+                logger.error(f"Rendering clips of video {video_id} failed: {e}", exc_info=True)
+                db.execute(
+                    update(Clip).where(Clip.id.in_(clip_ids)).values(status=ClipStatus.FAILED, error_message=str(e))
+                )
+                db.commit()
+                if isinstance(e, SoftTimeLimitExceeded):
+                    # out of time: the clips left PENDING are picked up again by render_pending_clips
+                    raise
+                failed += len(clip_ids)
+                continue
+
+            db.execute(update(Clip), [
+                {
+                    "id": result.clip_id,
+                    "status": ClipStatus.FAILED if result.error else ClipStatus.READY,
+                    "file_path": result.file_path,
+                    "file_size": result.file_size or None,
+                    "error_message": result.error,
+                }
+                for result in results.values()
+            ])
+            db.commit()
+            failed += sum(1 for result in results.values() if result.error)
+            rendered += sum(1 for result in results.values() if not result.error)
+            ready_ids = [result.clip_id for result in results.values() if not result.error]
+            if ready_ids:
+                package_clip_hls.delay(ready_ids)
+
+        return {"video_id": video_id, "rendered": rendered, "failed": failed}
+    finally:
+        db.close()
+        render_slots.release(token)
+        try:
+            redis_client.delete(_render_queued_key(video_id))
+        except redis.RedisError as e:
+            logger.warning(f"Failed to clear render marker of video {video_id}: {e}")
+
+
+@celery_app.task
+def render_pending_clips(batch_size: int = 100):
+    """
+        queue render_clips for videos with pending clips, first putting back clips whose render
+        died with its worker (PROCESSING for longer than render_clips may run)
+    """
+    db = SessionLocal()
+    try:
+        stale_before = datetime.now(timezone.utc) - timedelta(seconds=CLIP_RENDER_LIMITS["time_limit"])
+        requeued = db.execute(
+            update(Clip)
+            .where(Clip.status == ClipStatus.PROCESSING, Clip.updated_at < stale_before)
+            .values(status=ClipStatus.PENDING)
+        ).rowcount
+        db.commit()
+        if requeued:
+            logger.warning(f"Put {requeued} clips stuck in PROCESSING back to PENDING")
+
+        rendering = select(Clip.video_id).where(Clip.status == ClipStatus.PROCESSING)
+        video_ids = db.execute(
+            select(Clip.video_id)
+            .where(Clip.status == ClipStatus.PENDING, Clip.video_id.not_in(rendering))
+            .distinct()
+            .limit(batch_size)
+        ).scalars().all()
+    finally:
+        db.close()
+
+    queued = 0
+    for video_id in video_ids:
+        try:
+            # one render_clips per video in the queue, even while it waits for a render slot
+            if not redis_client.set(_render_queued_key(video_id), 1, nx=True, ex=CLIP_RENDER_LIMITS["time_limit"]):
+                continue
+        except redis.RedisError as e:
+            logger.warning(f"Render marker of video {video_id} unavailable, queueing anyway: {e}")
+        render_clips.delay(video_id)
+        queued += 1
+    return {"requeued": requeued, "queued": queued}
+
+
+@celery_app.task(bind=True, max_retries=20, **HLS_LIMITS)
+def package_video_hls(self, video_id: int):
+    """
+        package a stored video as an HLS/fMP4 bitrate ladder and record its master playlist url
+    """
+    token = hls_slots.try_acquire()
+    if token is None:
+        raise wait_for_slot(self, 60)
+
+    db = SessionLocal()
+    try:
+        video = db.get(Video, video_id)
+        if not video or not video.azure_file_path:
+            raise ValueError(f"Video {video_id} has no stored source")
+        if not record_video_access(db, video):
+            # archived source is being rehydrated; try again later
+            raise wait_for_rehydration(self, video_id)
+
+        service = HlsPackagingService()
+        if video.resolution_height is None:
+            # probe_videos hasn't reached this video; without its height the whole ladder would be
+            # packaged, upscaling small sources
+            probed = _probe_one(service.azure_service, video_id, video.azure_file_path)
+            for key in ("probed_at", *PROBED_FIELDS):
+                if key in probed:
+                    setattr(video, key, probed[key])
+            db.add(video)
+            db.commit()
+        result = service.package(video.azure_file_path, video.resolution_height)
+        video.hls_manifest_url = service.azure_service.get_blob_url(result.master_path)
+        db.add(video)
+        db.commit()
+        return {
+            "video_id": video_id,
+            "renditions": [rung.height for rung in result.renditions],
+            "files": result.file_count,
+            "bytes": result.uploaded_bytes,
+        }
+    finally:
+        db.close()
+        hls_slots.release(token)
+
+
+@celery_app.task(bind=True, max_retries=20, **HLS_LIMITS)
+def package_clip_hls(self, clip_ids: List[int]):
+    """
+        package rendered clips as HLS ladders (clips are short, so one task takes a whole batch)
+    """
+    token = hls_slots.try_acquire()
+    if token is None:
+        raise wait_for_slot(self, 60)
+
+    db = SessionLocal()
+    try:
+        clips = db.execute(
+            select(Clip.id, Clip.file_path)
+            .where(Clip.id.in_(clip_ids), Clip.status == ClipStatus.READY, Clip.file_path.is_not(None))
+        ).all()
+        service = HlsPackagingService()
+        manifests, failed = [], 0
+        for clip_id, file_path in clips:
+            try:
+                result = service.package(file_path)
+            except SoftTimeLimitExceeded:
+                raise
+            except Exception as e:
+                logger.error(f"Packaging clip {clip_id} failed: {e}")
+                failed += 1
+                continue
+            manifests.append({"id": clip_id, "hls_manifest_url": service.azure_service.get_blob_url(result.master_path)})
+        if manifests:
+            db.execute(update(Clip), manifests)
+            db.commit()
+        return {"packaged": len(manifests), "failed": failed}
+    finally:
+        db.close()
+        hls_slots.release(token)
+
+
+def _fail_post_media(db: Session, post: Post, reason: str) -> None:
+    """Record why `post` has no media and drop its rendition reference, so the failed encode can be evicted."""
+    release_rendition(db, post)
+    post.error_message = reason
+    db.add(post)
+    db.commit()
+
+
+@celery_app.task(bind=True, max_retries=60)
+def prepare_post_media(self, post_id: int):
+    """
+        point a post's media at the platform encode of its clip: every post of the clip to the
+        same platform shares one cached rendition, so only the first one triggers an encode
+    """
+    db = SessionLocal()
+    try:
+        post = db.get(Post, post_id)
+        if not post or not post.clip_id:
+            raise ValueError(f"Post {post_id} has no clip")
+        clip = post.clip
+        if clip.status != ClipStatus.READY or not clip.file_path:
+            raise self.retry(countdown=60)
+        platform = post.account.platform
+        version = clip_version(clip.file_path)
+
+        rendition = db.get(ClipRendition, post.rendition_id) if post.rendition_id is not None else None
+        if rendition is not None and rendition.clip_version != version:
+            # the clip was rendered again since this post took its reference
+            release_rendition(db, post)
+            rendition = None
+        if rendition is None:
+            # first run, or the rendition went away (evicted after the post released it)
+            rendition = acquire_rendition(db, clip, platform, version)
+            post.rendition_id = rendition.id
+            db.add(post)
+            db.commit()
+
+        if rendition.status != ClipStatus.READY:
+            token = render_slots.try_acquire()
+            if token is None:
+                raise wait_for_slot(self, 30)
+            try:
+                if not claim_encode(db, rendition.id):
+                    # another post of this clip is encoding it; pick up the result later
+                    db.refresh(rendition)
+                    if rendition.status != ClipStatus.READY:
+                        raise self.retry(countdown=30)
+                else:
+                    try:
+                        path, size = encode_rendition(clip.file_path, PLATFORM_PROFILES[platform], version)
+                        rendition.status, rendition.file_path, rendition.file_size = ClipStatus.READY, path, size
+                    except Exception as e:
+                        logger.error(f"Encoding rendition {rendition.id} of clip {clip.id} failed: {e}", exc_info=True)
+                        rendition.status, rendition.error_message = ClipStatus.FAILED, str(e)
+                    db.add(rendition)
+                    db.commit()
+            finally:
+                render_slots.release(token)
+
+        if rendition.status != ClipStatus.READY or not rendition.file_path:
+            _fail_post_media(db, post, f"Preparing media failed: {rendition.error_message}")
+            return {"post_id": post_id, "rendition_id": rendition.id, "status": rendition.status.value}
+
+        post.media_urls = [AzureUploadService().get_blob_url(rendition.file_path)]
+        db.add(post)
+        db.commit()
+        return {"post_id": post_id, "rendition_id": rendition.id, "status": rendition.status.value}
+    except MaxRetriesExceededError:
+        # gave up waiting for the clip or for another post's encode
+        db.rollback()
+        post = db.get(Post, post_id)
+        if post:
+            _fail_post_media(db, post, "Preparing media failed: timed out waiting for the clip")
+        raise
+    finally:
+        db.close()
+
+
+@celery_app.task
+def release_post_media(post_id: int):
+    """
+        drop a post's reference on its rendition once the platform has the upload (or the post
+        was cancelled), making the encode evictable when no other post needs it
+    """
+    db = SessionLocal()
+    try:
+        post = db.get(Post, post_id)
+        if post:
+            release_rendition(db, post)
+            db.commit()
+        return {"post_id": post_id}
+    finally:
+        db.close()
@@ -59,6 +59,11 @@ class Settings:
     # Video upload settings
     MAX_VIDEO_SIZE_MB: int = int(os.getenv('MAX_VIDEO_SIZE_MB', '1000'))
     MAX_CONCURRENT_UPLOADS: int = int(os.getenv('MAX_CONCURRENT_UPLOADS', '10'))
+    # Server-side streaming uploads (/upload/stream): block size and blocks staged in parallel
+    STREAM_UPLOAD_BLOCK_SIZE_MB: int = int(os.getenv('STREAM_UPLOAD_BLOCK_SIZE_MB', '8'))
+    STREAM_UPLOAD_CONCURRENCY: int = int(os.getenv('STREAM_UPLOAD_CONCURRENCY', '4'))
+    # Buffer memory all imports on one node may hold at once (chunks in flight, retries)
+    NODE_MEMORY_BUDGET_MB: int = int(os.getenv('NODE_MEMORY_BUDGET_MB', '256'))
     ALLOWED_VIDEO_FORMATS: list = ['mp4', 'mov', 'avi', 'mkv', 'webm', 'flv']
     ALLOWED_MIME_TYPES: list = [
         'video/mp4', 'video/quicktime', 'video/x-msvideo',
@@ -69,13 +74,135 @@ class Settings:
     AZURE_STORAGE_CONNECTION_STRING: str = os.getenv('AZURE_STORAGE_CONNECTION_STRING', '')
     AZURE_CONTAINER_NAME: str = os.getenv('AZURE_CONTAINER_NAME', 'buzzler-videos')
     AZURE_UPLOAD_TIMEOUT: int = int(os.getenv('AZURE_UPLOAD_TIMEOUT', '300'))
+    AZURE_CONNECTION_TIMEOUT: int = int(os.getenv('AZURE_CONNECTION_TIMEOUT', '20'))
+    # connection pool of the shared per-process blob client
+    AZURE_POOL_CONNECTIONS: int = int(os.getenv('AZURE_POOL_CONNECTIONS', '4'))
+    AZURE_POOL_MAXSIZE: int = int(os.getenv('AZURE_POOL_MAXSIZE', '32'))
+    AZURE_KEEPALIVE_SECONDS: int = int(os.getenv('AZURE_KEEPALIVE_SECONDS', '60'))
     AZURE_STORAGE_ACCOUNT_NAME : str = os.getenv('AZURE_STORAGE_ACCOUNT_NAME', '')
+    # user delegation keys (keyless accounts) are cached and refreshed this long before they expire
+    SAS_DELEGATION_KEY_TTL_HOURS: int = int(os.getenv('SAS_DELEGATION_KEY_TTL_HOURS', '24'))
+    SAS_DELEGATION_KEY_REFRESH_MINUTES: int = int(os.getenv('SAS_DELEGATION_KEY_REFRESH_MINUTES', '30'))
+    # JSON list of {"name", "connection_string", "container", "weight"} to spread blobs over
+    # several accounts/containers. Empty means a single shard built from the settings above.
+    AZURE_STORAGE_SHARDS: str = os.getenv('AZURE_STORAGE_SHARDS', '')
+
+    # Import bandwidth settings (per node, shared by every import running on the host)
+    # 0 disables throttling. Keep this below the NIC capacity to leave headroom for the API.
+    NODE_BANDWIDTH_LIMIT_MBPS: float = float(os.getenv('NODE_BANDWIDTH_LIMIT_MBPS', '0'))
+    NODE_BANDWIDTH_BURST_MB: float = float(os.getenv('NODE_BANDWIDTH_BURST_MB', '16'))
+    # relative share of the node budget an import gets under contention, keyed by UserPlan value
+    IMPORT_BANDWIDTH_WEIGHTS: dict = {
+        'free': float(os.getenv('IMPORT_BANDWIDTH_WEIGHT_FREE', '1')),
+        'basic': float(os.getenv('IMPORT_BANDWIDTH_WEIGHT_BASIC', '2')),
+        'pro': float(os.getenv('IMPORT_BANDWIDTH_WEIGHT_PRO', '4')),
+    }
+
+    # Storage tiering: source blobs nobody read for this long move to cooler tiers (0 disables archive)
+    STORAGE_COOL_AFTER_DAYS: int = int(os.getenv('STORAGE_COOL_AFTER_DAYS', '30'))
+    STORAGE_ARCHIVE_AFTER_DAYS: int = int(os.getenv('STORAGE_ARCHIVE_AFTER_DAYS', '0'))
+    STORAGE_TIERING_BATCH_SIZE: int = int(os.getenv('STORAGE_TIERING_BATCH_SIZE', '256'))
+    # Tasks reading an archived source check back this often, and give up after this many checks
+    REHYDRATION_POLL_SECONDS: int = int(os.getenv('REHYDRATION_POLL_SECONDS', '1800'))
+    REHYDRATION_MAX_WAITS: int = int(os.getenv('REHYDRATION_MAX_WAITS', '36'))
+    # Longest backoff of a task waiting for a free per-node slot
+    SLOT_WAIT_MAX_SECONDS: int = int(os.getenv('SLOT_WAIT_MAX_SECONDS', '300'))
+
+    # Run imports in children of a forkserver with yt-dlp preloaded instead of a fresh `yt-dlp` process.
+    # Turn off to run the `yt-dlp` on PATH, e.g. when it is upgraded apart from the installed package.
+    YTDLP_WARM_EXECUTOR: bool = os.getenv('YTDLP_WARM_EXECUTOR', 'true').lower() == 'true'
 
     # Audio processing settings
     FFMPEG_PATH: str = os.getenv('FFMPEG_PATH', 'ffmpeg')
     FFPROBE_PATH: str = os.getenv('FFPROBE_PATH', 'ffprobe')
     AUDIO_BITRATE: str = os.getenv('AUDIO_BITRATE', '128k')
     AUDIO_SAMPLE_RATE: str = os.getenv('AUDIO_SAMPLE_RATE', '44100')
+    AUDIO_MAX_CONCURRENT_PER_NODE: int = int(os.getenv('AUDIO_MAX_CONCURRENT_PER_NODE', '2'))
+
+    # Clip rendering (all pending clips of a video share one decode)
+    CLIP_RENDER_BATCH_SIZE: int = int(os.getenv('CLIP_RENDER_BATCH_SIZE', '20'))
+    CLIP_RENDER_MAX_CONCURRENT_PER_NODE: int = int(os.getenv('CLIP_RENDER_MAX_CONCURRENT_PER_NODE', '1'))
+    CLIP_RENDER_TIME_LIMIT_SECONDS: int = int(os.getenv('CLIP_RENDER_TIME_LIMIT_SECONDS', '7200'))
+    CLIP_RENDER_PRESET: str = os.getenv('CLIP_RENDER_PRESET', 'veryfast')
+    CLIP_RENDER_CRF: int = int(os.getenv('CLIP_RENDER_CRF', '23'))
+    CLIP_CAPTION_STYLE: str = os.getenv('CLIP_CAPTION_STYLE', 'default')
+    CLIP_BURN_CAPTIONS: bool = os.getenv('CLIP_BURN_CAPTIONS', 'false').lower() == 'true'
+
+    # Clip downloads (streamed ZIP, clips read in ranges)
+    EXPORT_MAX_CLIPS: int = int(os.getenv('EXPORT_MAX_CLIPS', '100'))
+    EXPORT_CHUNK_BYTES: int = int(os.getenv('EXPORT_CHUNK_BYTES', str(4 * 1024 * 1024)))
+
+    # Platform renditions of clips (one encode per clip and platform profile, shared by posts)
+    RENDITION_CACHE_MAX_GB: int = int(os.getenv('RENDITION_CACHE_MAX_GB', '200'))
+    RENDITION_IDLE_DAYS: int = int(os.getenv('RENDITION_IDLE_DAYS', '30'))
+    RENDITION_TIMEOUT_SECONDS: int = int(os.getenv('RENDITION_TIMEOUT_SECONDS', '900'))
+
+    # Media probing (ffprobe over a read SAS URL, headers only)
+    PROBE_MAX_BYTES: int = int(os.getenv('PROBE_MAX_BYTES', str(2 * 1024 * 1024)))
+    PROBE_TIMEOUT_SECONDS: int = int(os.getenv('PROBE_TIMEOUT_SECONDS', '30'))
+    PROBE_CONCURRENCY: int = int(os.getenv('PROBE_CONCURRENCY', '8'))
+
+    # Fused ingest: poster, thumbnail candidates, editing proxy, sprite sheets and audio from one decode
+    INGEST_MAX_CONCURRENT_PER_NODE: int = int(os.getenv('INGEST_MAX_CONCURRENT_PER_NODE', '1'))
+    INGEST_TIME_LIMIT_SECONDS: int = int(os.getenv('INGEST_TIME_LIMIT_SECONDS', '14400'))
+    INGEST_POSTER_SCAN_FRAMES: int = int(os.getenv('INGEST_POSTER_SCAN_FRAMES', '300'))
+    INGEST_THUMBNAIL_INTERVAL_SECONDS: int = int(os.getenv('INGEST_THUMBNAIL_INTERVAL_SECONDS', '5'))
+    INGEST_PROXY_HEIGHT: int = int(os.getenv('INGEST_PROXY_HEIGHT', '360'))
+    INGEST_PROXY_CRF: int = int(os.getenv('INGEST_PROXY_CRF', '28'))
+    INGEST_SPRITE_INTERVAL_SECONDS: int = int(os.getenv('INGEST_SPRITE_INTERVAL_SECONDS', '2'))
+    INGEST_SPRITE_COLUMNS: int = int(os.getenv('INGEST_SPRITE_COLUMNS', '10'))
+    INGEST_SPRITE_ROWS: int = int(os.getenv('INGEST_SPRITE_ROWS', '10'))
+    INGEST_SPRITE_TILE_WIDTH: int = int(os.getenv('INGEST_SPRITE_TILE_WIDTH', '160'))
+    INGEST_SPRITE_TILE_HEIGHT: int = int(os.getenv('INGEST_SPRITE_TILE_HEIGHT', '90'))
+
+    # HLS playback ladder (height:video kbps per rung) packaged as fragmented MP4 segments
+    HLS_LADDER: str = os.getenv('HLS_LADDER', '1080:5000,720:2800,480:1200')
+    HLS_SEGMENT_SECONDS: int = int(os.getenv('HLS_SEGMENT_SECONDS', '4'))
+    HLS_URL_EXPIRY_MINUTES: int = int(os.getenv('HLS_URL_EXPIRY_MINUTES', '240'))
+    HLS_MAX_CONCURRENT_PER_NODE: int = int(os.getenv('HLS_MAX_CONCURRENT_PER_NODE', '1'))
+    HLS_TIME_LIMIT_SECONDS: int = int(os.getenv('HLS_TIME_LIMIT_SECONDS', '21600'))
+
+    # Analysis sidecars (numpy arrays next to the source blob, memory-mapped from a local cache)
+    ANALYSIS_MAX_CONCURRENT_PER_NODE: int = int(os.getenv('ANALYSIS_MAX_CONCURRENT_PER_NODE', '2'))
+    ANALYSIS_CACHE_MAX_MB: int = int(os.getenv('ANALYSIS_CACHE_MAX_MB', '512'))
+    SCENE_INDEX_FPS: int = int(os.getenv('SCENE_INDEX_FPS', '5'))
+    SCENE_INDEX_WIDTH: int = int(os.getenv('SCENE_INDEX_WIDTH', '160'))
+    SCENE_INDEX_MIN_SCORE: float = float(os.getenv('SCENE_INDEX_MIN_SCORE', '0.05'))
+    SCENE_INDEX_TIMEOUT_SECONDS: int = int(os.getenv('SCENE_INDEX_TIMEOUT_SECONDS', '3600'))
+    SCENE_CUT_THRESHOLD: float = float(os.getenv('SCENE_CUT_THRESHOLD', '0.3'))
+    LOUDNESS_ENVELOPE_HZ: int = int(os.getenv('LOUDNESS_ENVELOPE_HZ', '10'))
+    LOUDNESS_TIMEOUT_SECONDS: int = int(os.getenv('LOUDNESS_TIMEOUT_SECONDS', '1800'))
+    REFRAME_TRACK_HZ: int = int(os.getenv('REFRAME_TRACK_HZ', '5'))
+    REFRAME_SMOOTHING_SECONDS: float = float(os.getenv('REFRAME_SMOOTHING_SECONDS', '1.5'))
+    REFRAME_TIMEOUT_SECONDS: int = int(os.getenv('REFRAME_TIMEOUT_SECONDS', '3600'))
+
+    # Transcription: audio split at silences, segments transcribed in parallel ("fake", "whisper_api" or "none")
+    TRANSCRIPTION_BACKEND: str = os.getenv('TRANSCRIPTION_BACKEND', 'none')
+    TRANSCRIPTION_API_URL: str = os.getenv('TRANSCRIPTION_API_URL', 'https://api.openai.com/v1')
+    TRANSCRIPTION_API_KEY: str = os.getenv('TRANSCRIPTION_API_KEY', '')
+    TRANSCRIPTION_MODEL: str = os.getenv('TRANSCRIPTION_MODEL', 'whisper-1')
+    TRANSCRIPTION_SEGMENT_SECONDS: int = int(os.getenv('TRANSCRIPTION_SEGMENT_SECONDS', '300'))
+    TRANSCRIPTION_SEGMENT_SEARCH_SECONDS: int = int(os.getenv('TRANSCRIPTION_SEGMENT_SEARCH_SECONDS', '30'))
+    TRANSCRIPTION_TIMEOUT_SECONDS: int = int(os.getenv('TRANSCRIPTION_TIMEOUT_SECONDS', '600'))
+    # Imported videos reuse the source's captions instead of being transcribed
+    SUBTITLE_LANGUAGES: list[str] = os.getenv('SUBTITLE_LANGUAGES', 'en').split(',')
+    SUBTITLE_USE_AUTOMATIC: bool = os.getenv('SUBTITLE_USE_AUTOMATIC', 'false').lower() == 'true'
+    SUBTITLE_FETCH_TIMEOUT_SECONDS: int = int(os.getenv('SUBTITLE_FETCH_TIMEOUT_SECONDS', '30'))
+
+    # Clip suggestions: candidate windows scored from the analysis sidecars
+    CLIP_CANDIDATE_LENGTHS: list[int] = [int(v) for v in os.getenv('CLIP_CANDIDATE_LENGTHS', '15,30,60').split(',')]
+    CLIP_CANDIDATE_STRIDE_SECONDS: int = int(os.getenv('CLIP_CANDIDATE_STRIDE_SECONDS', '2'))
+    CLIP_LEAD_IN_SECONDS: int = int(os.getenv('CLIP_LEAD_IN_SECONDS', '10'))
+    CLIP_SUGGESTION_COUNT: int = int(os.getenv('CLIP_SUGGESTION_COUNT', '10'))
+    CLIP_SUGGESTION_FORMAT: str = os.getenv('CLIP_SUGGESTION_FORMAT', '9:16')
+    CLIP_MAX_OVERLAP: float = float(os.getenv('CLIP_MAX_OVERLAP', '0.3'))
+    CLIP_WEIGHT_ENERGY: float = float(os.getenv('CLIP_WEIGHT_ENERGY', '1.0'))
+    CLIP_WEIGHT_LIFT: float = float(os.getenv('CLIP_WEIGHT_LIFT', '0.75'))
+    CLIP_WEIGHT_PACING: float = float(os.getenv('CLIP_WEIGHT_PACING', '0.5'))
+    CLIP_WEIGHT_SPEECH: float = float(os.getenv('CLIP_WEIGHT_SPEECH', '1.0'))
+
+    # Keyframe index used to cut clips without re-encoding
+    KEYFRAME_INDEX_TIMEOUT_SECONDS: int = int(os.getenv('KEYFRAME_INDEX_TIMEOUT_SECONDS', '600'))
 
     # Logging settings
     ENABLE_DETAILED_LOGGING: bool = os.getenv('ENABLE_DETAILED_LOGGING', 'false').lower() == 'true'
@@ -88,3 +215,4 @@ settings.TEMP_BASE_DIR.mkdir(parents=True, exist_ok=True)
 (settings.TEMP_BASE_DIR / "videos").mkdir(exist_ok=True)
 (settings.TEMP_BASE_DIR / "audio").mkdir(exist_ok=True)
 (settings.TEMP_BASE_DIR / "processing").mkdir(exist_ok=True)
+(settings.TEMP_BASE_DIR / "analysis").mkdir(exist_ok=True)
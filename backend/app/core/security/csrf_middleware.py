@@ -20,6 +20,7 @@ class CSRFMiddleware(BaseHTTPMiddleware):
             "/health", 
             "/generate-sas",
             "/complete",
+            "/upload/stream",
            "/import/import-video",
            "/auth/setup-session"
         }
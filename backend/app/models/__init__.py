@@ -6,6 +6,7 @@ from .ai_analytics import *
 from .analytics_data import *
 from .audit_logs import *
 from .clip import *
+from .clip_rendition import *
 from .content_template import *
 from .file_storage import *
 from .post import *
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from datetime import datetime
 from typing import Optional, TYPE_CHECKING
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy import JSON, String, Integer, DateTime, Enum as SAEnum, Text, ForeignKey, Index, Float, Date, func
@@ -26,22 +27,26 @@ class Clip(Base):
     file_path: Mapped[Optional[str]] = mapped_column(String(500), nullable=True)
     file_size: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
     thumbnail_url: Mapped[Optional[str]] = mapped_column(String(500), nullable=True)
+    hls_manifest_url: Mapped[Optional[str]] = mapped_column(String(500), nullable=True)
 
     # AI generated metadata
     title: Mapped[Optional[str]] = mapped_column(String(500), nullable=True)
     description: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
-    transcript: Mapped[Optional[list[dict]]] = mapped_column(JSON, nullable=True)
+    # words [start, end) of the video's transcript that fall inside the clip
+    transcript_start_index: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    transcript_end_index: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
     ai_score: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
     ai_reasoning: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
 
     status: Mapped[ClipStatus] = mapped_column(SAEnum(ClipStatus), default=ClipStatus.PENDING, index=True)
     error_message: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
 
-    created_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
-    updated_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
     video: Mapped["Video"] = relationship("Video", back_populates="clips")
     posts: Mapped[list["Post"]] = relationship("Post", back_populates="clip")
+    renditions: Mapped[list["ClipRendition"]] = relationship("ClipRendition", back_populates="clip")
 
     __table_args__ = (
         Index('idx_clip_video_status', 'video_id', 'status'),
@@ -51,3 +56,4 @@ class Clip(Base):
 if TYPE_CHECKING:
     from app.models.video import Video
     from app.models.post import Post
+    from app.models.clip_rendition import ClipRendition
@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Optional, TYPE_CHECKING
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy import BigInteger, String, Integer, DateTime, Enum as SAEnum, Text, ForeignKey, Index, UniqueConstraint, func
+
+from app.models.enums import ClipFormat, ClipStatus
+from app.db.database import Base
+
+class ClipRendition(Base):
+    """
+        platform-ready encodes of a clip, shared by every post of the clip to that platform
+    """
+    __tablename__ = 'clip_rendition'
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+
+    clip_id: Mapped[int] = mapped_column(Integer, ForeignKey('clip.id', ondelete='CASCADE'), nullable=False, index=True)
+
+    # cache key: platform profile name, clip format, a hash of the profile's encode settings and
+    # the version of the rendered clip it was encoded from (a re-rendered clip gets new renditions)
+    profile: Mapped[str] = mapped_column(String(50), nullable=False)
+    format: Mapped[ClipFormat] = mapped_column(SAEnum(ClipFormat), nullable=False)
+    profile_key: Mapped[str] = mapped_column(String(16), nullable=False)
+    clip_version: Mapped[str] = mapped_column(String(16), nullable=False, server_default='')
+
+    status: Mapped[ClipStatus] = mapped_column(SAEnum(ClipStatus), default=ClipStatus.PENDING, nullable=False)
+    file_path: Mapped[Optional[str]] = mapped_column(String(500), nullable=True)
+    file_size: Mapped[Optional[int]] = mapped_column(BigInteger, nullable=True)
+    error_message: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+
+    # posts holding this rendition; only unreferenced renditions are evicted, least recently used first
+    ref_count: Mapped[int] = mapped_column(Integer, default=0, server_default='0', nullable=False)
+    last_used_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    clip: Mapped["Clip"] = relationship("Clip", back_populates="renditions")
+
+    __table_args__ = (
+        UniqueConstraint('clip_id', 'profile', 'format', 'profile_key', 'clip_version', name='uq_clip_rendition_key'),
+        Index('idx_rendition_eviction', 'status', 'ref_count', 'last_used_at'),
+    )
+
+if TYPE_CHECKING:
+    from app.models.clip import Clip
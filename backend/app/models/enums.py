@@ -46,6 +46,7 @@ class ClipFormat(Enum):
     HORIZONTAL_16_9 = "16:9"
 
 class ClipStatus(Enum):
+    SUGGESTED = "suggested"  # scored by suggest_clips, not rendered until someone queues it
     PENDING = "pending"
     PROCESSING = "processing"
     READY = "ready"
@@ -101,6 +102,14 @@ class EntityType(Enum):
     POST = "post"
     TRANSCRIPT = "transcript"
 
+class StorageTier(Enum):
+    # values match Azure's standard blob tier names
+    HOT = "Hot"
+    COOL = "Cool"
+    ARCHIVE = "Archive"
+    # not an Azure tier: an archived blob moving back to Hot, unreadable until Azure finishes
+    REHYDRATING = "Rehydrating"
+
 class FileType(Enum):
     VIDEO = "video"
     THUMBNAIL = "thumbnail"
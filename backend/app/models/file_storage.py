@@ -4,7 +4,7 @@ from typing import Optional, TYPE_CHECKING
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy import JSON, Boolean, String, Integer, DateTime, Enum as SAEnum, Text, ForeignKey, Index, Float, Date, UniqueConstraint, func
 
-from app.models.enums import EntityType, FileType
+from app.models.enums import EntityType, FileType, StorageTier
 from app.db.database import Base
 
 class FileStorage(Base):
@@ -29,6 +29,9 @@ class FileStorage(Base):
     expires_at: Mapped[Optional[DateTime]] = mapped_column(DateTime(timezone=True), nullable=True, index=True)
     is_deleted: Mapped[bool] = mapped_column(Boolean, default=False, index=True)
 
+    access_tier: Mapped[StorageTier] = mapped_column(SAEnum(StorageTier, values_callable=lambda obj: [e.value for e in obj]), default=StorageTier.HOT, server_default=StorageTier.HOT.value, nullable=False)
+    last_accessed_at: Mapped[Optional[DateTime]] = mapped_column(DateTime(timezone=True), nullable=True)
+
     created_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
@@ -36,4 +39,5 @@ class FileStorage(Base):
         Index('idx_file_entity', 'entity_type', 'entity_id'),
         Index('idx_file_cleanup', 'is_temporary', 'expires_at'),
         Index('idx_file_storage_stats', 'storage_provider', 'file_type', 'created_at'),
+        Index('idx_file_tier_accessed', 'access_tier', 'last_accessed_at'),
     )
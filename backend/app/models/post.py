@@ -22,6 +22,8 @@ class Post(Base):
     content: Mapped[str] = mapped_column(Text, nullable=False)
     hashtags: Mapped[Optional[list[str]]] = mapped_column(JSON, nullable=True)
     media_urls: Mapped[Optional[list[str]]] = mapped_column(JSON, nullable=True)
+    # platform encode behind media_urls; the post holds a reference on it until released
+    rendition_id: Mapped[Optional[int]] = mapped_column(Integer, ForeignKey('clip_rendition.id', ondelete='SET NULL'), nullable=True, index=True)
 
     # publishing
     status: Mapped[PostStatus] = mapped_column(SAEnum(PostStatus), default=PostStatus.DRAFT, index=True)
@@ -31,6 +31,7 @@ class User(Base):
     # account status
     is_active: Mapped[bool] = mapped_column(Boolean, default=True, nullable=False)
     is_verified: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
+    plan: Mapped[UserPlan] = mapped_column(SAEnum(UserPlan), nullable=False, default=UserPlan.FREE, server_default=UserPlan.FREE.name)
     email_verification_token: Mapped[Optional[str]] = mapped_column(String, nullable=True)
     password_reset_token: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
     password_reset_expires_at: Mapped[Optional[DateTime]] = mapped_column(DateTime(timezone=True), nullable=True)
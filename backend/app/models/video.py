@@ -4,7 +4,7 @@ from datetime import datetime
 from app.db.database import Base
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy import String, Integer, DateTime, Float, Text, Index, func, ForeignKey, Enum as SAEnum
-from app.models.enums import VideoSource, VideoStatus
+from app.models.enums import StorageTier, VideoSource, VideoStatus
 
 class Video(Base):
     __tablename__ = "video"
@@ -26,6 +26,11 @@ class Video(Base):
     azure_file_path: Mapped[Optional[str]] = mapped_column(String(512), unique=True)  # Relative path in Azure container
     azure_video_url: Mapped[Optional[str]] = mapped_column(Text)                       # Final public/private URL of the video
     azure_audio_url: Mapped[Optional[str]] = mapped_column(Text)                       # URL for the extracted audio
+    hls_manifest_url: Mapped[Optional[str]] = mapped_column(Text)                      # URL of the HLS master playlist
+
+    # Storage tiering (source blobs move to cheaper tiers once nobody reads them)
+    access_tier: Mapped[StorageTier] = mapped_column(SAEnum(StorageTier, values_callable=lambda obj: [e.value for e in obj]), default=StorageTier.HOT, server_default=StorageTier.HOT.value, nullable=False)
+    last_accessed_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
 
     # Upload process
     upload_url: Mapped[Optional[str]] = mapped_column(Text)                      # The pre-signed URL given to the client
@@ -38,6 +43,7 @@ class Video(Base):
     duration_seconds: Mapped[Optional[float]] = mapped_column(Float)
     resolution_width: Mapped[Optional[int]] = mapped_column(Integer)
     resolution_height: Mapped[Optional[int]] = mapped_column(Integer)
+    probed_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)  # set once probed, even if the probe found nothing
 
     # Error handling
     error_message: Mapped[Optional[str]] = mapped_column(Text)
@@ -51,6 +57,7 @@ class Video(Base):
 
     __table_args__ = (
         Index("idx_videos_status_created", "status", "created_at"),
+        Index("idx_videos_tier_accessed", "access_tier", "last_accessed_at"),
     )
 
     def __repr__(self) -> str:
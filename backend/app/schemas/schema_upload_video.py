@@ -1,3 +1,4 @@
+from pydantic import Field
 from pydantic.main import BaseModel
 from typing import Optional
 
@@ -6,6 +7,12 @@ class VideoRequest(BaseModel):
     file_name: str
     file_path: Optional[str] = None
     is_url: bool = False
+    # declared size, required to get a parallel block upload plan back
+    file_size: Optional[int] = Field(None, gt=0)
+    block_plan: bool = False
+
+class VideoBatchRequest(BaseModel):
+    files: list[VideoRequest] = Field(..., min_length=1, max_length=50)
 
 class VideoUploadCompleteRequest(BaseModel):
     file_size: int
@@ -0,0 +1,116 @@
+import hashlib
+import io
+import logging
+import os
+import threading
+import uuid
+import zipfile
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+from azure.core.exceptions import ResourceNotFoundError
+from azure.storage.blob import ContentSettings
+
+from app.config import settings
+from app.services.azure_storage import AzureUploadService
+
+logger = logging.getLogger(__name__)
+
+_evict_lock = threading.Lock()
+
+
+def _cache_path(blob_name: str) -> Path:
+    digest = hashlib.sha1(blob_name.encode("utf-8")).hexdigest()
+    return settings.TEMP_BASE_DIR / "analysis" / f"{digest}{Path(blob_name).suffix}"
+
+
+def _evict(cache_dir: Path, keep: Path) -> None:
+    """Drop least recently used cache files until the cache fits its budget."""
+    budget = settings.ANALYSIS_CACHE_MAX_MB * 1024 * 1024
+    with _evict_lock:
+        files = []
+        for path in cache_dir.iterdir():
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_atime, stat.st_size, path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= budget:
+                break
+            if path != keep:
+                # an open memmap keeps working after unlink; the inode goes when it is closed
+                path.unlink(missing_ok=True)
+                total -= size
+
+
+def _upload(blob_name: str, data: bytes, azure_service: Optional[AzureUploadService]) -> int:
+    azure_service = azure_service or AzureUploadService()
+    azure_service.get_blob_client(blob_name).upload_blob(
+        data,
+        overwrite=True,
+        content_settings=ContentSettings(content_type="application/octet-stream"),
+    )
+    _cache_path(blob_name).unlink(missing_ok=True)
+    return len(data)
+
+
+def _cached_file(blob_name: str, azure_service: Optional[AzureUploadService]) -> Optional[Path]:
+    """Local copy of `blob_name`, downloaded once per node; None if the blob does not exist."""
+    path = _cache_path(blob_name)
+    if not path.exists():
+        azure_service = azure_service or AzureUploadService()
+        tmp_path = path.with_name(f"{path.name}.{uuid.uuid4().hex}.tmp")
+        try:
+            with open(tmp_path, "wb") as f:
+                azure_service.get_blob_client(blob_name).download_blob().readinto(f)
+            os.replace(tmp_path, path)
+        except ResourceNotFoundError:
+            return None
+        finally:
+            tmp_path.unlink(missing_ok=True)
+        _evict(path.parent, keep=path)
+    else:
+        os.utime(path)
+    return path
+
+
+def save_array(blob_name: str, array: np.ndarray, azure_service: Optional[AzureUploadService] = None) -> int:
+    """Store `array` as a .npy blob. Returns its size in bytes."""
+    buffer = io.BytesIO()
+    np.save(buffer, array, allow_pickle=False)
+    return _upload(blob_name, buffer.getvalue(), azure_service)
+
+
+def load_array(blob_name: str, azure_service: Optional[AzureUploadService] = None) -> Optional[np.ndarray]:
+    """
+    Memory-map the .npy blob `blob_name`, or return None if it does not exist.
+
+    The blob is downloaded once per node into a local cache; later loads map the cached file,
+    so tasks only page in the rows they actually touch.
+    """
+    path = _cached_file(blob_name, azure_service)
+    return None if path is None else np.load(path, mmap_mode="r", allow_pickle=False)
+
+
+def save_arrays(blob_name: str, arrays: Dict[str, np.ndarray], azure_service: Optional[AzureUploadService] = None) -> int:
+    """Store several related arrays as one compressed .npz blob. Returns its size in bytes."""
+    buffer = io.BytesIO()
+    # written member by member rather than through np.savez_compressed(**arrays), where an
+    # array named like one of its parameters ("allow_pickle") would be taken as that argument
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, array in arrays.items():
+            with archive.open(f"{name}.npy", "w", force_zip64=True) as member:
+                np.lib.format.write_array(member, np.asanyarray(array), allow_pickle=False)
+    return _upload(blob_name, buffer.getvalue(), azure_service)
+
+
+def load_arrays(blob_name: str, azure_service: Optional[AzureUploadService] = None) -> Optional[Dict[str, np.ndarray]]:
+    """Read every array of the .npz blob `blob_name` (through the same node cache), or None."""
+    path = _cached_file(blob_name, azure_service)
+    if path is None:
+        return None
+    with np.load(path, allow_pickle=False) as npz:
+        return {name: npz[name] for name in npz.files}
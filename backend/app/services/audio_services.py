@@ -0,0 +1,67 @@
+import logging
+import subprocess
+from typing import Any, Callable, Dict, Optional
+
+from app.config import settings
+from app.services.azure_storage import AzureUploadService
+
+logger = logging.getLogger(__name__)
+
+
+class AudioExtractionService:
+    """
+    Extracts the audio track of a stored video with ffmpeg and uploads it to Azure Blob
+    Storage without touching local disk: ffmpeg reads the source through a read SAS URL
+    and its stdout is staged block by block.
+    """
+
+    def __init__(self, azure_service: Optional[AzureUploadService] = None) -> None:
+        self.azure_service = azure_service or AzureUploadService()
+
+    def build_command(self, source_url: str) -> list[str]:
+        return [
+            settings.FFMPEG_PATH,
+            "-nostdin",
+            "-v", "error",
+            "-i", source_url,
+            "-vn",
+            "-ac", "1",                    # mono is all transcription needs
+            "-ar", settings.AUDIO_SAMPLE_RATE,
+            "-c:a", "aac",
+            "-b:a", settings.AUDIO_BITRATE,
+            "-f", "adts",                  # streamable container, no seek-back on the output
+            "pipe:1",
+        ]
+
+    def extract_to_azure(
+        self,
+        source_path: str,
+        audio_path: str,
+        progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ) -> int:
+        """Extract audio from the blob at `source_path` into `audio_path`. Returns the audio size in bytes."""
+        source_url = self.azure_service.generate_read_sas_url(source_path, expires_in_minutes=120)
+        uploaded_bytes = 0
+
+        def track_progress(info: Dict[str, Any]) -> None:
+            nonlocal uploaded_bytes
+            uploaded_bytes = info['uploaded_bytes']
+            if progress_callback:
+                progress_callback(info)
+
+        process = subprocess.Popen(self.build_command(source_url), stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        try:
+            assert process.stdout is not None
+            self.azure_service.upload_stream_in_blocks(audio_path, process.stdout, track_progress)
+            return_code = process.wait()
+            stderr_output = process.stderr.read().decode('utf-8', errors='ignore') if process.stderr else ''
+            if return_code != 0:
+                self.azure_service.delete_blob(audio_path)
+                raise RuntimeError(f"ffmpeg failed with return code {return_code}. Stderr: {stderr_output[:500]}")
+            if uploaded_bytes == 0:
+                raise RuntimeError(f"ffmpeg produced no audio. Stderr: {stderr_output[:500]}")
+            return uploaded_bytes
+        finally:
+            if process.poll() is None:
+                process.kill()
+                process.wait()
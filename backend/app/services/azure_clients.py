@@ -0,0 +1,88 @@
+import os
+import socket
+import threading
+from typing import Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from azure.core.pipeline.transport import RequestsTransport
+from azure.identity import DefaultAzureCredential
+from azure.storage.blob import BlobServiceClient
+
+from app.config import settings
+
+# One BlobServiceClient per connection string per process. Clients are thread-safe and
+# keep a warm connection pool, so every service in the process should share them.
+_clients: Dict[str, BlobServiceClient] = {}
+_clients_lock = threading.Lock()
+
+
+def _reset_after_fork() -> None:
+    """Celery forks workers after import; never share sockets with the parent."""
+    global _clients, _clients_lock
+    _clients = {}
+    _clients_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+class _KeepAliveAdapter(HTTPAdapter):
+    """HTTPAdapter that enables TCP keep-alive on pooled connections."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        socket_options = [(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1), (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+        if hasattr(socket, "TCP_KEEPIDLE"):
+            socket_options.append((socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, settings.AZURE_KEEPALIVE_SECONDS))
+        if hasattr(socket, "TCP_KEEPINTVL"):
+            socket_options.append((socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, settings.AZURE_KEEPALIVE_SECONDS))
+        kwargs["socket_options"] = socket_options
+        super().init_poolmanager(*args, **kwargs)
+
+
+def _build_transport() -> RequestsTransport:
+    session = requests.Session()
+    adapter = _KeepAliveAdapter(
+        pool_connections=settings.AZURE_POOL_CONNECTIONS,
+        pool_maxsize=settings.AZURE_POOL_MAXSIZE,
+        pool_block=False,
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return RequestsTransport(
+        session=session,
+        session_owner=False,
+        connection_timeout=settings.AZURE_CONNECTION_TIMEOUT,
+        read_timeout=settings.AZURE_UPLOAD_TIMEOUT,
+    )
+
+
+def get_blob_service_client(connection_string: Optional[str] = None) -> BlobServiceClient:
+    """
+    Return the process-wide BlobServiceClient for `connection_string`, creating it on first use.
+    """
+    connection_string = connection_string or settings.AZURE_STORAGE_CONNECTION_STRING
+    client = _clients.get(connection_string)
+    if client is not None:
+        return client
+
+    with _clients_lock:
+        client = _clients.get(connection_string)
+        if client is None:
+            if "AccountKey=" in connection_string or "SharedAccessSignature=" in connection_string:
+                client = BlobServiceClient.from_connection_string(
+                    connection_string,
+                    transport=_build_transport(),
+                )
+            else:
+                # keyless account: authenticate with Azure AD (managed identity, CLI login, ...)
+                account_name = dict(
+                    part.split("=", 1) for part in connection_string.split(";") if "=" in part
+                )["AccountName"]
+                client = BlobServiceClient(
+                    f"https://{account_name}.blob.core.windows.net",
+                    credential=DefaultAzureCredential(),
+                    transport=_build_transport(),
+                )
+            _clients[connection_string] = client
+    return client
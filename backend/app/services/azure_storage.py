@@ -1,60 +1,105 @@
 import uuid
-from datetime import datetime, timedelta
-from azure.storage.blob import BlobServiceClient, generate_blob_sas, BlobSasPermissions
-from azure.core.exceptions import AzureError
-from app.config import settings
+from datetime import datetime, timedelta, timezone
+from azure.storage.blob import BlobClient, BlobSasPermissions, ContentSettings
+from azure.core.exceptions import AzureError, ResourceNotFoundError
+from app.services.storage_router import StorageRouter, storage_router
+from app.services.sas_signing import sas_signer
 import base64
 from typing import Optional
-from typing import Callable
-import io
+from typing import IO, Any, AsyncIterator, Callable, Iterable, List, cast
+from collections import defaultdict
+import asyncio
+import math
+
+MIN_BLOCK_SIZE = 4 * 1024 * 1024          # 4 MiB
+MAX_BLOCK_SIZE = 4000 * 1024 * 1024       # Azure limit per block
+MAX_BLOCK_COUNT = 50_000                  # Azure limit per blob
+
+
+def make_block_id(counter: int) -> str:
+    # Azure expects base64-encoded block IDs; keep them fixed-width for ordering.
+    return base64.b64encode(f"{counter:010d}".encode()).decode()
+
+
+def derived_blob_name(file_path: str, name: str) -> str:
+    """
+    Path of an asset derived from the blob at `file_path` (audio, thumbnails, indexes...).
+    It keeps the source's hashed prefix, so it lands on the same storage shard.
+    """
+    return f"{file_path.rsplit('.', 1)[0]}_assets/{name}"
+
+
+def build_block_plan(file_size: int, block_size: Optional[int] = None) -> dict:
+    """
+    Plan a parallel block upload for a file of `file_size` bytes: block size, count and the
+    deterministic block ids the client must stage (in order) before committing the list.
+    """
+    if file_size <= 0:
+        raise ValueError("file_size must be positive")
+    block_size = max(block_size or MIN_BLOCK_SIZE, math.ceil(file_size / MAX_BLOCK_COUNT))
+    # round to whole MiB so clients can slice files cheaply
+    block_size = math.ceil(block_size / (1024 * 1024)) * 1024 * 1024
+    if block_size > MAX_BLOCK_SIZE:
+        raise ValueError("file is too large for a block blob")
+    block_count = math.ceil(file_size / block_size)
+    return {
+        "block_size": block_size,
+        "block_count": block_count,
+        "block_ids": [make_block_id(i) for i in range(block_count)],
+    }
 
 
 class AzureUploadService:
-    def __init__(self):
-        self.container_name = settings.AZURE_CONTAINER_NAME
-        self.blob_service = BlobServiceClient.from_connection_string(
-            settings.AZURE_STORAGE_CONNECTION_STRING
-        )
-        self.account_name = settings.AZURE_STORAGE_ACCOUNT_NAME
+    def __init__(self, router: Optional[StorageRouter] = None):
+        # shards share one client per account per process, so building the service per request is cheap
+        self.router = router or storage_router
         self.chunk_size = 4 *1024 * 1024  # 4 MB
-        
 
-    def generate_sas(self, file_name: str) -> tuple[str, str]:
+    def get_blob_client(self, file_path: str) -> BlobClient:
+        """Blob client on the shard that owns `file_path`."""
+        shard = self.router.shard_for_blob(file_path)
+        return shard.blob_service.get_blob_client(
+            container=shard.container_name,
+            blob=file_path
+        )
+
+    def generate_sas(self, file_name: str, routing_key: Optional[str] = None) -> tuple[str, str]:
         unique_id = str(uuid.uuid4())
-        file_path = f"{unique_id}/{file_name}"
+        file_path = self.router.make_blob_name(f"{unique_id}/{file_name}", routing_key)
+        shard = self.router.shard_for_blob(file_path)
 
-        sas_token = generate_blob_sas(
-            account_name=self.account_name,
-            container_name=self.container_name,
-            blob_name=file_path,
-            account_key=self._get_account_key(),
+        sas_token = sas_signer.sign(
+            shard,
+            file_path,
             permission=BlobSasPermissions(write=True, create=True),
-            expiry=datetime.utcnow() + timedelta(hours=1)
+            expiry=datetime.now(timezone.utc) + timedelta(hours=1)
         )
 
-        blob_url = f"https://{self.account_name}.blob.core.windows.net/{self.container_name}/{file_path}"
-        sas_url = f"{blob_url}?{sas_token}"
+        sas_url = f"{shard.blob_url(file_path)}?{sas_token}"
 
         return sas_url, file_path
 
-    def _get_account_key(self) -> str:
-        """Extract account key from connection string."""
-        connection_string = settings.AZURE_STORAGE_CONNECTION_STRING
-        for part in connection_string.split(';'):
-            if part.startswith('AccountKey='):
-                return part.split('=', 1)[1]
-        raise ValueError("AccountKey not found in connection string")
+    def generate_read_sas_url(self, file_path: str, expires_in_minutes: int = 15) -> str:
+        """Short-lived read-only URL for tools (ffprobe/ffmpeg) that fetch the blob themselves."""
+        shard = self.router.shard_for_blob(file_path)
+        sas_token = sas_signer.sign(
+            shard,
+            file_path,
+            permission=BlobSasPermissions(read=True),
+            expiry=datetime.now(timezone.utc) + timedelta(minutes=expires_in_minutes)
+        )
+        return f"{shard.blob_url(file_path)}?{sas_token}"
 
+    def generate_sas_batch(self, file_names: list[str], routing_key: Optional[str] = None) -> list[tuple[str, str]]:
+        """Upload SAS URLs and blob paths for several files, in the order given."""
+        return [self.generate_sas(file_name, routing_key) for file_name in file_names]
 
     def get_blob_url(self, file_path: str) -> str:
-        return f"https://{self.account_name}.blob.core.windows.net/{self.container_name}/{file_path}"
+        return self.router.shard_for_blob(file_path).blob_url(file_path)
 
     def delete_blob(self, file_path: str) -> bool:
         try:
-            blob_client = self.blob_service.get_blob_client(
-                container=self.container_name,
-                blob=file_path
-            )
+            blob_client = self.get_blob_client(file_path)
             blob_client.delete_blob()
             return True
         except Exception as e:
@@ -64,15 +109,12 @@ class AzureUploadService:
     def upload_stream_in_blocks(
         self, 
         blob_name: str, 
-        data_stream: io.BytesIO,
+        data_stream: IO[bytes],
         progress_callback: Optional[Callable] = None
     ) -> str:
         """Upload stream data using Azure's block upload mechanism."""
         
-        blob_client = self.blob_service.get_blob_client(
-            container=self.container_name, 
-            blob=blob_name
-        )
+        blob_client = self.get_blob_client(blob_name)
         
         block_list = []
         block_id_counter = 0
@@ -85,7 +127,7 @@ class AzureUploadService:
                     break
                 
                 # Create block ID
-                block_id = base64.b64encode(f"{block_id_counter:010d}".encode()).decode()
+                block_id = make_block_id(block_id_counter)
                 
                 # Stage block
                 blob_client.stage_block(block_id, chunk)
@@ -115,12 +157,146 @@ class AzureUploadService:
                 pass
             raise Exception(f"Azure upload failed: {str(e)}")
 
-    def blob_exists(self, file_path: str) -> bool:
+    async def upload_async_stream_in_blocks(
+        self,
+        blob_name: str,
+        chunks: AsyncIterator[bytes],
+        block_size: Optional[int] = None,
+        max_concurrency: int = 4,
+        max_size: Optional[int] = None,
+        content_type: Optional[str] = None,
+    ) -> int:
+        """
+        Re-chunk an async byte stream into blocks and stage them with at most `max_concurrency`
+        uploads in flight, then commit the block list. Nothing touches local disk and memory is
+        bounded by (max_concurrency + 1) blocks. Returns the number of bytes uploaded.
+        """
+        block_size = block_size or self.chunk_size
+        blob_client = self.get_blob_client(blob_name)
+        slots = asyncio.Semaphore(max_concurrency)
+        in_flight: set[asyncio.Task] = set()
+        failures: list[BaseException] = []
+        block_list: list[str] = []
+        buffer = bytearray()
+        total_size = 0
+
+        async def stage(block_id: str, data: bytes) -> None:
+            try:
+                await asyncio.to_thread(blob_client.stage_block, block_id, data)
+            except Exception as e:
+                # kept for the uploader to raise, so no task is left with an unretrieved exception
+                failures.append(e)
+            finally:
+                slots.release()
+
+        async def submit(data: bytes) -> None:
+            # waiting for a free slot is what keeps memory flat when Azure is slower than the client
+            await slots.acquire()
+            if failures:
+                slots.release()
+                raise failures[0]
+            block_id = make_block_id(len(block_list))
+            block_list.append(block_id)
+            task = asyncio.create_task(stage(block_id, data))
+            in_flight.add(task)
+            task.add_done_callback(in_flight.discard)
+
         try:
-            blob_client = self.blob_service.get_blob_client(
-                container=self.container_name,
-                blob=file_path
+            async for chunk in chunks:
+                total_size += len(chunk)
+                if max_size is not None and total_size > max_size:
+                    raise ValueError(f"Upload exceeds the maximum size of {max_size} bytes")
+                buffer += chunk
+                while len(buffer) >= block_size:
+                    await submit(bytes(buffer[:block_size]))
+                    del buffer[:block_size]
+            if buffer:
+                await submit(bytes(buffer))
+                buffer.clear()
+
+            await asyncio.gather(*in_flight)
+            if failures:
+                raise failures[0]
+            if not block_list:
+                raise ValueError("Upload body is empty")
+
+            await asyncio.to_thread(
+                blob_client.commit_block_list,
+                cast(List[Any], block_list),
+                content_settings=ContentSettings(content_type=content_type) if content_type else None,
             )
+            return total_size
+        except BaseException:
+            pending = list(in_flight)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            # uncommitted blocks are garbage collected by Azure; nothing was committed
+            raise
+
+    def blob_exists(self, file_path: str) -> bool:
+        try:
+            blob_client = self.get_blob_client(file_path)
             return blob_client.exists()
         except Exception:
             return False
+
+    def set_blob_tier(self, file_path: str, tier: str, rehydrate_priority: Optional[str] = None) -> bool:
+        """
+        Move a single blob to `tier` ("Hot", "Cool" or "Archive"). `rehydrate_priority`
+        ("Standard" or "High") only applies when the blob is leaving the archive tier.
+        """
+        try:
+            blob_client = self.get_blob_client(file_path)
+            if rehydrate_priority:
+                blob_client.set_standard_blob_tier(tier, rehydrate_priority=rehydrate_priority)
+            else:
+                blob_client.set_standard_blob_tier(tier)
+            return True
+        except Exception as e:
+            print(f"Error setting tier {tier} on blob {file_path}: {e}")
+            return False
+
+    def is_rehydrating(self, file_path: str) -> bool:
+        """Whether an archived blob is still being brought back (and so can't be read yet)."""
+        try:
+            properties = self.get_blob_client(file_path).get_blob_properties()
+        except Exception as e:
+            print(f"Error reading archive status of blob {file_path}: {e}")
+            return True
+        return bool(properties.archive_status) or properties.blob_tier == "Archive"
+
+    def set_blob_tiers(self, file_paths: Iterable[str], tier: str) -> list[str]:
+        """
+        Move blobs to `tier` using batch requests (one per shard container, 256 blobs each).
+        Returns the paths that were moved successfully.
+        """
+        by_shard = defaultdict(list)
+        for file_path in file_paths:
+            by_shard[self.router.shard_for_blob(file_path)].append(file_path)
+
+        moved = []
+        for shard, paths in by_shard.items():
+            container_client = shard.blob_service.get_container_client(shard.container_name)
+            for start in range(0, len(paths), 256):
+                batch = paths[start:start + 256]
+                try:
+                    responses = container_client.set_standard_blob_tier_blobs(
+                        tier, *batch, raise_on_any_failure=False
+                    )
+                    for file_path, response in zip(batch, responses):
+                        if response.status_code in (200, 202):
+                            moved.append(file_path)
+                except AzureError as e:
+                    print(f"Error setting tier {tier} on {len(batch)} blobs in {shard.name}: {e}")
+        return moved
+
+    def get_staged_blocks(self, file_path: str) -> tuple[list[str], list[str]]:
+        """Return (committed, uncommitted) block ids Azure currently holds for `file_path`."""
+        blob_client = self.get_blob_client(file_path)
+        try:
+            committed, uncommitted = blob_client.get_block_list("all")
+        except ResourceNotFoundError:
+            # nothing staged yet
+            return [], []
+        return [block.id for block in committed], [block.id for block in uncommitted]
@@ -0,0 +1,171 @@
+import logging
+import socket
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional, cast
+
+import redis
+
+from app.config import settings
+from app.models.enums import UserPlan
+
+logger = logging.getLogger(__name__)
+
+# Refills the node bucket, records the caller's heartbeat/weight and either takes the
+# requested tokens or returns how long the caller should wait. Uses the redis clock so
+# every worker process on the node agrees on elapsed time.
+_TOKEN_BUCKET_LUA = """
+local now_t = redis.call('TIME')
+local now = tonumber(now_t[1]) + tonumber(now_t[2]) / 1000000
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local requested = tonumber(ARGV[3])
+local import_id = ARGV[4]
+local weight = tonumber(ARGV[5])
+local stale_after = tonumber(ARGV[6])
+
+redis.call('HSET', KEYS[2], import_id, weight)
+redis.call('HSET', KEYS[3], import_id, now)
+
+local total_weight = 0
+local seen = redis.call('HGETALL', KEYS[3])
+for i = 1, #seen, 2 do
+    if now - tonumber(seen[i + 1]) > stale_after then
+        redis.call('HDEL', KEYS[3], seen[i])
+        redis.call('HDEL', KEYS[2], seen[i])
+    else
+        total_weight = total_weight + (tonumber(redis.call('HGET', KEYS[2], seen[i])) or 0)
+    end
+end
+
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(now - ts, 0) * rate)
+
+local wait = 0
+if tokens >= requested then
+    tokens = tokens - requested
+else
+    local share = weight / math.max(total_weight, weight)
+    wait = (requested - tokens) / (rate * share)
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+for i = 1, 3 do
+    redis.call('EXPIRE', KEYS[i], math.ceil(stale_after * 2))
+end
+return tostring(wait)
+"""
+
+
+class NodeBandwidthLimiter:
+    """
+    Token bucket shared by every import running on this node, stored in redis.
+
+    Each import pays for the bytes it moves. Under contention an import waits in
+    proportion to the inverse of its plan weight, so higher plans get a bigger share
+    of the node budget while the total never exceeds it.
+    """
+
+    STALE_AFTER_SECONDS = 60
+    MAX_SLEEP_SECONDS = 1.0
+
+    def __init__(
+        self,
+        rate_bytes_per_sec: Optional[float] = None,
+        burst_bytes: Optional[float] = None,
+        node_id: Optional[str] = None,
+        redis_client: Optional[redis.Redis] = None,
+    ):
+        if rate_bytes_per_sec is None:
+            rate_bytes_per_sec = settings.NODE_BANDWIDTH_LIMIT_MBPS * 1024 * 1024
+        if burst_bytes is None:
+            burst_bytes = settings.NODE_BANDWIDTH_BURST_MB * 1024 * 1024
+        self.rate_bytes_per_sec = rate_bytes_per_sec
+        self.burst_bytes = burst_bytes
+        self.node_id = node_id or socket.gethostname()
+        self._redis = redis_client
+        self._script = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate_bytes_per_sec > 0
+
+    def _keys(self) -> list[str]:
+        prefix = f"import_bandwidth:{self.node_id}"
+        return [f"{prefix}:bucket", f"{prefix}:weights", f"{prefix}:heartbeats"]
+
+    def _get_script(self):
+        if self._script is None:
+            if self._redis is None:
+                self._redis = redis.Redis.from_url(settings.REDIS_URL, decode_responses=True)
+            self._script = self._redis.register_script(_TOKEN_BUCKET_LUA)
+        return self._script
+
+    @staticmethod
+    def weight_for_plan(plan: Optional[UserPlan]) -> float:
+        plan_value = (plan or UserPlan.FREE).value
+        return float(settings.IMPORT_BANDWIDTH_WEIGHTS.get(plan_value, 1.0))
+
+    def throttle(self, import_id: str, nbytes: int, plan: Optional[UserPlan] = None) -> float:
+        """
+        Block until `nbytes` may be moved by `import_id`. Returns the seconds spent waiting.
+        Redis errors disable throttling for the call instead of failing the import.
+        """
+        if not self.enabled or nbytes <= 0:
+            return 0.0
+
+        weight = self.weight_for_plan(plan)
+        waited = 0.0
+        remaining = nbytes
+        try:
+            script = self._get_script()
+            while remaining > 0:
+                # never ask for more than the bucket can hold, or we would wait forever
+                requested = min(remaining, self.burst_bytes)
+                # the script replies with the wait in seconds as a string
+                wait = float(cast(str, script(
+                    keys=self._keys(),
+                    args=[
+                        self.rate_bytes_per_sec,
+                        self.burst_bytes,
+                        requested,
+                        import_id,
+                        weight,
+                        self.STALE_AFTER_SECONDS,
+                    ],
+                )))
+                if wait <= 0:
+                    remaining -= requested
+                    continue
+                sleep_for = min(wait, self.MAX_SLEEP_SECONDS)
+                time.sleep(sleep_for)
+                waited += sleep_for
+        except redis.RedisError as e:
+            logger.warning(f"Bandwidth limiter unavailable, continuing unthrottled: {e}")
+        return waited
+
+    def release(self, import_id: str) -> None:
+        """Drop `import_id` from the active set so its weight stops counting."""
+        if not self.enabled:
+            return
+        try:
+            self._get_script()
+            _, weights_key, heartbeats_key = self._keys()
+            assert self._redis is not None
+            self._redis.hdel(weights_key, import_id)
+            self._redis.hdel(heartbeats_key, import_id)
+        except redis.RedisError as e:
+            logger.warning(f"Failed to release bandwidth share for {import_id}: {e}")
+
+    @contextmanager
+    def share(self, import_id: str, plan: Optional[UserPlan] = None) -> Iterator:
+        """Yield a `throttle(nbytes)` callable bound to one import, releasing it on exit."""
+        try:
+            yield lambda nbytes: self.throttle(import_id, nbytes, plan)
+        finally:
+            self.release(import_id)
+
+
+node_bandwidth_limiter = NodeBandwidthLimiter()
@@ -0,0 +1,242 @@
+import hashlib
+import logging
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from azure.storage.blob import ContentSettings
+
+from app.config import settings
+from app.models.enums import ClipFormat
+from app.services.azure_storage import AzureUploadService, derived_blob_name
+from app.services.transcription import Transcript
+
+logger = logging.getLogger(__name__)
+
+# bump when the generated tracks change for the same inputs, so cached tracks are rebuilt
+CAPTION_VERSION = 1
+
+# ASS canvas per clip format; matches the renderer's output geometry
+PLAY_RESOLUTIONS: Dict[ClipFormat, Tuple[int, int]] = {
+    ClipFormat.VERTICAL_9_16: (1080, 1920),
+    ClipFormat.SQUARE_1_1: (1080, 1080),
+    ClipFormat.HORIZONTAL_16_9: (1920, 1080),
+}
+
+
+@dataclass(frozen=True)
+class CaptionStyle:
+    name: str
+    font: str = "Arial"
+    font_size: int = 64
+    bold: bool = True
+    uppercase: bool = False
+    # ASS colours are &HAABBGGRR
+    primary_colour: str = "&H00FFFFFF"
+    outline_colour: str = "&H00000000"
+    outline: int = 4
+    shadow: int = 0
+    # 2 = bottom centre, 5 = middle centre (numpad layout)
+    alignment: int = 2
+    margin_v: int = 220
+    # line breaking
+    max_chars: int = 32
+    max_seconds: float = 3.0
+    max_gap_seconds: float = 0.6
+
+    def cache_key(self) -> str:
+        return hashlib.sha1(repr(sorted(asdict(self).items())).encode("utf-8")).hexdigest()[:10]
+
+
+CAPTION_STYLES: Dict[str, CaptionStyle] = {
+    "default": CaptionStyle(name="default"),
+    "bold": CaptionStyle(name="bold", font_size=84, uppercase=True, outline=6, alignment=5, margin_v=0, max_chars=18, max_seconds=1.6),
+    "minimal": CaptionStyle(name="minimal", font_size=48, bold=False, outline=2, shadow=1, margin_v=120, max_chars=42),
+}
+
+
+def get_caption_style(name: Optional[str] = None) -> CaptionStyle:
+    name = name or settings.CLIP_CAPTION_STYLE
+    if name not in CAPTION_STYLES:
+        raise ValueError(f"Unknown caption style: {name}")
+    return CAPTION_STYLES[name]
+
+
+@dataclass
+class CaptionWindow:
+    """A clip to caption: its time window and, when known, its word range in the video transcript."""
+
+    clip_id: int
+    start_time: float
+    end_time: float
+    format: ClipFormat
+    transcript_start_index: Optional[int] = None
+    transcript_end_index: Optional[int] = None
+
+
+@dataclass
+class CaptionTrack:
+    clip_id: int
+    ass_path: str
+    srt_path: str
+    # contents, when generated in this call rather than found in the cache
+    ass: Optional[str] = None
+
+
+Cue = Tuple[float, float, str]
+
+
+def caption_cues(
+    starts: np.ndarray,
+    ends: np.ndarray,
+    words: Sequence[str],
+    style: CaptionStyle,
+) -> List[Cue]:
+    """
+    Group timed words (seconds relative to the clip) into caption lines: a line ends when it
+    would pass `max_chars` or `max_seconds`, or at a pause longer than `max_gap_seconds`.
+    """
+    cues: List[Cue] = []
+    line: List[str] = []
+    line_start = line_end = 0.0
+    length = 0
+    for start, end, word in zip(starts.tolist(), ends.tolist(), words):
+        if line and (
+            length + 1 + len(word) > style.max_chars
+            or end - line_start > style.max_seconds
+            or start - line_end > style.max_gap_seconds
+        ):
+            cues.append((line_start, line_end, " ".join(line)))
+            line, length = [], 0
+        if not line:
+            line_start, length = start, len(word)
+        else:
+            length += 1 + len(word)
+        line.append(word)
+        line_end = end
+    if line:
+        cues.append((line_start, line_end, " ".join(line)))
+    return cues
+
+
+def _srt_time(seconds: float) -> str:
+    ms = int(round(seconds * 1000))
+    return f"{ms // 3600000:02d}:{ms // 60000 % 60:02d}:{ms // 1000 % 60:02d},{ms % 1000:03d}"
+
+
+def _ass_time(seconds: float) -> str:
+    cs = int(round(seconds * 100))
+    return f"{cs // 360000}:{cs // 6000 % 60:02d}:{cs // 100 % 60:02d}.{cs % 100:02d}"
+
+
+def format_srt(cues: Sequence[Cue]) -> str:
+    return "".join(
+        f"{i}\n{_srt_time(start)} --> {_srt_time(end)}\n{text}\n\n"
+        for i, (start, end, text) in enumerate(cues, start=1)
+    )
+
+
+def format_ass(cues: Sequence[Cue], style: CaptionStyle, clip_format: ClipFormat) -> str:
+    width, height = PLAY_RESOLUTIONS[clip_format]
+    header = (
+        "[Script Info]\n"
+        "ScriptType: v4.00+\n"
+        f"PlayResX: {width}\n"
+        f"PlayResY: {height}\n"
+        "WrapStyle: 0\n"
+        "ScaledBorderAndShadow: yes\n"
+        "\n"
+        "[V4+ Styles]\n"
+        "Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, "
+        "Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, "
+        "Alignment, MarginL, MarginR, MarginV, Encoding\n"
+        f"Style: Default,{style.font},{style.font_size},{style.primary_colour},&H000000FF,{style.outline_colour},"
+        f"&H64000000,{-1 if style.bold else 0},0,0,0,100,100,0,0,1,{style.outline},{style.shadow},"
+        f"{style.alignment},60,60,{style.margin_v},1\n"
+        "\n"
+        "[Events]\n"
+        "Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text\n"
+    )
+    events = "".join(
+        f"Dialogue: 0,{_ass_time(start)},{_ass_time(end)},Default,,0,0,0,,"
+        f"{text.replace('{', '(').replace('}', ')').replace(chr(10), ' ')}\n"
+        for start, end, text in cues
+    )
+    return header + events
+
+
+def build_caption_tracks(
+    transcript: Transcript,
+    clips: Sequence[CaptionWindow],
+    style: CaptionStyle,
+) -> Dict[int, Tuple[str, str]]:
+    """
+    (ass, srt) text for every clip in one pass over the transcript columns. Each clip's words
+    are a slice of the shared arrays, found by its stored index range or by binary search.
+    """
+    tokens = transcript.vocab
+    if style.uppercase:
+        tokens = [token.upper() for token in tokens]
+    tracks = {}
+    for clip in clips:
+        if clip.transcript_start_index is not None and clip.transcript_end_index is not None:
+            first, last = clip.transcript_start_index, clip.transcript_end_index
+        else:
+            first, last = transcript.range_for(clip.start_time, clip.end_time)
+        offset = clip.start_time * 1000
+        duration = clip.end_time - clip.start_time
+        starts = (transcript.starts[first:last] - offset) / 1000.0
+        ends = np.minimum((transcript.ends[first:last] - offset) / 1000.0, duration)
+        words = [tokens[token] for token in transcript.tokens[first:last].tolist()]
+        cues = caption_cues(np.maximum(starts, 0), ends, words, style)
+        tracks[clip.clip_id] = (format_ass(cues, style, clip.format), format_srt(cues))
+    return tracks
+
+
+def caption_blob_name(source_path: str, clip: CaptionWindow, style: CaptionStyle, ext: str) -> str:
+    """Cache location of a clip's track: keyed by everything the track is generated from."""
+    key = hashlib.sha1(
+        f"{CAPTION_VERSION}:{clip.start_time}:{clip.end_time}:{clip.format.value}:"
+        f"{clip.transcript_start_index}:{clip.transcript_end_index}:{style.cache_key()}".encode("utf-8")
+    ).hexdigest()[:12]
+    return derived_blob_name(source_path, f"captions/{clip.clip_id}-{style.name}-{key}.{ext}")
+
+
+def ensure_caption_tracks(
+    source_path: str,
+    transcript: Transcript,
+    clips: Sequence[CaptionWindow],
+    style: Optional[CaptionStyle] = None,
+    azure_service: Optional[AzureUploadService] = None,
+) -> Dict[int, CaptionTrack]:
+    """
+    ASS and SRT tracks for `clips`, generating and uploading only the ones not cached yet, so
+    re-renders of a clip reuse its tracks until the clip window or the style changes.
+    """
+    style = style or get_caption_style()
+    azure_service = azure_service or AzureUploadService()
+    result: Dict[int, CaptionTrack] = {}
+    missing: List[CaptionWindow] = []
+    for clip in clips:
+        track = CaptionTrack(
+            clip_id=clip.clip_id,
+            ass_path=caption_blob_name(source_path, clip, style, "ass"),
+            srt_path=caption_blob_name(source_path, clip, style, "srt"),
+        )
+        result[clip.clip_id] = track
+        # the srt is uploaded last, so its presence means both tracks are complete
+        if not azure_service.blob_exists(track.srt_path):
+            missing.append(clip)
+
+    for clip_id, (ass, srt) in build_caption_tracks(transcript, missing, style).items():
+        track = result[clip_id]
+        for path, text, content_type in ((track.ass_path, ass, "text/x-ssa"), (track.srt_path, srt, "application/x-subrip")):
+            azure_service.get_blob_client(path).upload_blob(
+                text.encode("utf-8"),
+                overwrite=True,
+                content_settings=ContentSettings(content_type=f"{content_type}; charset=utf-8"),
+            )
+        track.ass = ass
+    if missing:
+        logger.info(f"Generated caption tracks for {len(missing)} of {len(clips)} clips of {source_path}")
+    return result
@@ -0,0 +1,272 @@
+import logging
+import os
+import subprocess
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from app.config import settings
+from app.models.enums import ClipFormat
+from app.services.azure_storage import AzureUploadService
+from app.services.keyframe_index import KeyframeIndex
+from app.services.media_probe import has_audio_stream
+
+logger = logging.getLogger(__name__)
+
+# crop size and output scale of the formats that crop the source
+CROP_GEOMETRY: Dict[ClipFormat, Tuple[str, str, str]] = {
+    ClipFormat.VERTICAL_9_16: ("min(iw,ih*9/16)", "min(ih,iw*16/9)", "scale=1080:1920"),
+    ClipFormat.SQUARE_1_1: ("min(iw,ih)", "min(iw,ih)", "scale=1080:1080"),
+}
+
+# output geometry per clip format; crops keep the centre of the frame
+FORMAT_FILTERS: Dict[ClipFormat, str] = {
+    **{fmt: f"crop='{w}':'{h}',{scale},setsar=1" for fmt, (w, h, scale) in CROP_GEOMETRY.items()},
+    ClipFormat.HORIZONTAL_16_9: "scale=1920:1080:force_original_aspect_ratio=decrease,pad=1920:1080:(ow-iw)/2:(oh-ih)/2,setsar=1",
+}
+
+
+def reframe_filter(clip_format: ClipFormat, crop_path: Sequence[Tuple[float, float, float]], name: str) -> str:
+    """
+    Crop that follows the subject: the crop offsets (fractions of iw-ow and ih-oh) are moved
+    along `crop_path` by sendcmd, so the cost is the same as a fixed crop. `name` makes the
+    crop instance unique in the graph, so commands only reach this clip's crop.
+    """
+    w, h, scale = CROP_GEOMETRY[clip_format]
+    target = f"crop@{name}"
+    _, x0, y0 = crop_path[0]
+    last = (round(x0, 4), round(y0, 4))
+    commands = []
+    for t, x, y in crop_path[1:]:
+        x, y = round(x, 4), round(y, 4)
+        if (x, y) != last:
+            commands.append(f"{t:.3f} {target} x (iw-ow)*{x}, {target} y (ih-oh)*{y}")
+            last = (x, y)
+    send = f"sendcmd=c='{';'.join(commands)}'," if commands else ""
+    return f"{send}{target}=w='{w}':h='{h}':x='(iw-ow)*{round(x0, 4)}':y='(ih-oh)*{round(y0, 4)}',{scale},setsar=1"
+
+
+ASPECT_RATIOS: Dict[ClipFormat, float] = {
+    ClipFormat.VERTICAL_9_16: 9 / 16,
+    ClipFormat.SQUARE_1_1: 1.0,
+    ClipFormat.HORIZONTAL_16_9: 16 / 9,
+}
+
+
+def matches_source_aspect(clip_format: ClipFormat, width: Optional[int], height: Optional[int], tolerance: float = 0.03) -> bool:
+    """Whether a source of `width`x`height` already has the aspect ratio of `clip_format`."""
+    if not width or not height:
+        return False
+    target = ASPECT_RATIOS[clip_format]
+    return abs(width / height - target) <= target * tolerance
+
+
+@dataclass
+class ClipSpec:
+    clip_id: int
+    start_time: float
+    end_time: float
+    format: ClipFormat
+    output_path: str
+    # cut without re-encoding (start snapped to a keyframe); only valid when the
+    # source already has the clip's aspect ratio
+    stream_copy: bool = False
+    # local ASS file burned into the picture (forces a re-encode)
+    captions_file: Optional[str] = None
+    # (time in the clip, x, y) crop offsets sampled from the video's reframe track
+    crop_path: Optional[List[Tuple[float, float, float]]] = None
+
+
+@dataclass
+class RenderResult:
+    clip_id: int
+    file_path: Optional[str] = None
+    file_size: int = 0
+    error: Optional[str] = None
+
+
+class ClipRenderService:
+    """
+    Renders every clip of one source video in a single ffmpeg run.
+
+    The source is decoded once; a split/trim filter graph fans the decoded frames out to
+    one encoder per clip. Each encoder writes fragmented MP4 to its own pipe, and a thread
+    per pipe stages the bytes to Azure as they are produced, so nothing touches local disk.
+    """
+
+    def __init__(self, azure_service: Optional[AzureUploadService] = None) -> None:
+        self.azure_service = azure_service or AzureUploadService()
+
+    @staticmethod
+    def build_filter_graph(clips: List[ClipSpec], offset: float, has_audio: bool) -> str:
+        count = len(clips)
+        parts = [f"[0:v]split={count}" + "".join(f"[vsrc{i}]" for i in range(count))]
+        if has_audio:
+            parts.append(f"[0:a]asplit={count}" + "".join(f"[asrc{i}]" for i in range(count)))
+        for i, clip in enumerate(clips):
+            start, end = clip.start_time - offset, clip.end_time - offset
+            # captions are laid out on the output canvas, so they go after the format filter;
+            # quoted so ':' in the path is not read as an option separator
+            captions = f",ass=filename='{clip.captions_file}'" if clip.captions_file else ""
+            geometry = reframe_filter(clip.format, clip.crop_path, f"r{i}") if clip.crop_path else FORMAT_FILTERS[clip.format]
+            parts.append(
+                f"[vsrc{i}]trim=start={start}:end={end},setpts=PTS-STARTPTS,{geometry}{captions}[v{i}]"
+            )
+            if has_audio:
+                parts.append(f"[asrc{i}]atrim=start={start}:end={end},asetpts=PTS-STARTPTS[a{i}]")
+        return ";".join(parts)
+
+    def build_command(self, source_url: str, clips: List[ClipSpec], output_fds: List[int], has_audio: bool) -> List[str]:
+        # seek the input to the first clip and stop decoding after the last one
+        offset = min(clip.start_time for clip in clips)
+        duration = max(clip.end_time for clip in clips) - offset
+        cmd = [
+            settings.FFMPEG_PATH,
+            "-nostdin",
+            "-v", "error",
+            "-ss", str(offset),
+            "-t", str(duration),
+            "-i", source_url,
+            "-filter_complex", self.build_filter_graph(clips, offset, has_audio),
+        ]
+        for i, fd in enumerate(output_fds):
+            cmd += ["-map", f"[v{i}]"]
+            if has_audio:
+                cmd += ["-map", f"[a{i}]", "-c:a", "aac", "-b:a", "128k"]
+            cmd += [
+                "-c:v", "libx264",
+                "-preset", settings.CLIP_RENDER_PRESET,
+                "-crf", str(settings.CLIP_RENDER_CRF),
+                # fragmented mp4 can be written to a pipe (no seek back to write the moov)
+                "-movflags", "frag_keyframe+empty_moov+default_base_moof",
+                "-f", "mp4",
+                f"pipe:{fd}",
+            ]
+        return cmd
+
+    def render_batch(
+        self,
+        source_path: str,
+        clips: List[ClipSpec],
+        keyframes: Optional[KeyframeIndex] = None,
+    ) -> Dict[int, RenderResult]:
+        """
+        Render `clips` from the blob at `source_path`. Returns a result per clip id.
+        Clips marked `stream_copy` are cut at keyframes without re-encoding when `keyframes`
+        is given; all the others share one decode pass.
+        """
+        if not clips:
+            return {}
+        source_url = self.azure_service.generate_read_sas_url(source_path, expires_in_minutes=240)
+
+        copied = [clip for clip in clips if clip.stream_copy and keyframes and not clip.captions_file]
+        decoded = [clip for clip in clips if clip not in copied]
+        results = {clip.clip_id: self.copy_clip(source_url, clip, keyframes) for clip in copied if keyframes}
+        if decoded:
+            results.update(self._render_decoded(source_url, decoded))
+        return results
+
+    def copy_clip(self, source_url: str, clip: ClipSpec, keyframes: KeyframeIndex) -> RenderResult:
+        """
+        Cut a clip without re-encoding. The start is snapped back to the previous keyframe so the
+        first GOP decodes cleanly; only the bytes of the clip's range are read from the blob.
+        """
+        start = keyframes.keyframe_at_or_before(clip.start_time)
+        cmd = [
+            settings.FFMPEG_PATH,
+            "-nostdin",
+            "-v", "error",
+            "-ss", str(start),
+            "-i", source_url,
+            "-t", str(clip.end_time - start),
+            "-map", "0:v:0",
+            "-map", "0:a:0?",
+            "-c", "copy",
+            "-avoid_negative_ts", "make_zero",
+            "-movflags", "frag_keyframe+empty_moov+default_base_moof",
+            "-f", "mp4",
+            "pipe:1",
+        ]
+        result = RenderResult(clip_id=clip.clip_id)
+        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        try:
+            assert process.stdout is not None
+
+            def track(info: dict) -> None:
+                result.file_size = info['uploaded_bytes']
+
+            self.azure_service.upload_stream_in_blocks(clip.output_path, process.stdout, track)
+            return_code = process.wait()
+            if return_code != 0:
+                stderr_output = process.stderr.read().decode('utf-8', errors='ignore') if process.stderr else ''
+                raise RuntimeError(f"ffmpeg failed with return code {return_code}: {stderr_output[:500]}")
+            if not result.file_size:
+                raise RuntimeError("ffmpeg produced no output")
+            result.file_path = clip.output_path
+        except Exception as e:
+            if result.file_size:
+                self.azure_service.delete_blob(clip.output_path)
+            result.file_size, result.error = 0, str(e)
+        finally:
+            if process.poll() is None:
+                process.kill()
+                process.wait()
+        return result
+
+    def _render_decoded(self, source_url: str, clips: List[ClipSpec]) -> Dict[int, RenderResult]:
+        has_audio = has_audio_stream(source_url)
+
+        pipes = [os.pipe() for _ in clips]
+        results = {clip.clip_id: RenderResult(clip_id=clip.clip_id) for clip in clips}
+
+        def upload(clip: ClipSpec, read_fd: int) -> None:
+            result = results[clip.clip_id]
+            with os.fdopen(read_fd, "rb") as stream:
+                try:
+                    def track(info: dict) -> None:
+                        result.file_size = info['uploaded_bytes']
+
+                    self.azure_service.upload_stream_in_blocks(clip.output_path, stream, track)
+                    result.file_path = clip.output_path
+                except Exception as e:
+                    result.error = str(e)
+
+        try:
+            process = subprocess.Popen(
+                self.build_command(source_url, clips, [write_fd for _, write_fd in pipes], has_audio),
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
+                pass_fds=[write_fd for _, write_fd in pipes],
+            )
+        finally:
+            # only ffmpeg holds the write ends now, so readers see EOF when it exits
+            for _, write_fd in pipes:
+                os.close(write_fd)
+
+        threads = [
+            threading.Thread(target=upload, args=(clip, read_fd), daemon=True)
+            for clip, (read_fd, _) in zip(clips, pipes)
+        ]
+        for thread in threads:
+            thread.start()
+
+        try:
+            _, stderr = process.communicate()
+        except BaseException:
+            # e.g. the task's soft time limit: don't leave ffmpeg running without its readers
+            process.kill()
+            process.wait()
+            raise
+        for thread in threads:
+            thread.join()
+
+        if process.returncode != 0:
+            error = f"ffmpeg failed with return code {process.returncode}: {stderr.decode('utf-8', errors='ignore')[:500]}"
+            for result in results.values():
+                if result.file_path:
+                    self.azure_service.delete_blob(result.file_path)
+                result.file_path, result.file_size, result.error = None, 0, error
+        for result in results.values():
+            if not result.error and not result.file_size:
+                result.file_path, result.error = None, "ffmpeg produced no output"
+        return results
@@ -0,0 +1,194 @@
+import logging
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.config import settings
+from app.services.loudness import energy_scores, window_loudness
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ClipCandidate:
+    start_time: int
+    end_time: int
+    score: int
+    reasoning: str
+
+
+def _window_sums(values: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """Sum of values[start:end] for every window, from one cumulative sum."""
+    sums = np.concatenate(([0.0], np.cumsum(values, dtype=np.float64)))
+    starts = np.clip(starts, 0, len(values))
+    ends = np.clip(ends, 0, len(values))
+    return sums[ends] - sums[starts]
+
+
+def _at(values: np.ndarray, indices: np.ndarray) -> np.ndarray:
+    """values[indices], with indices past either end clamped (0 when there are no values)."""
+    if not len(values):
+        return np.zeros(len(indices), dtype=np.float64)
+    return values[np.clip(indices, 0, len(values) - 1)].astype(np.float64)
+
+
+def _window_energy(envelope: np.ndarray, starts: np.ndarray, ends: np.ndarray, rate_hz: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Energy score (see loudness.energy_scores) and mean loudness in dB of every window,
+    computed once per window length.
+    """
+    energy = np.zeros(len(starts), dtype=np.float64)
+    mean_db = np.zeros(len(starts), dtype=np.float64)
+    lengths = ends - starts
+    for length in np.unique(lengths):
+        rows = lengths == length
+        sample_starts = starts[rows] * rate_hz
+        energy[rows] = _at(energy_scores(envelope, float(length), rate_hz), sample_starts)
+        mean_db[rows] = _at(window_loudness(envelope, int(length) * rate_hz), sample_starts)
+    return energy, mean_db
+
+
+def _standardize(values: np.ndarray) -> np.ndarray:
+    std = float(values.std()) if len(values) else 0.0
+    if std < 1e-9:
+        return np.zeros_like(values, dtype=np.float64)
+    return (values - values.mean()) / std
+
+
+def candidate_windows(
+    duration: float,
+    scene_times: Optional[np.ndarray] = None,
+    lengths: Sequence[int] = (),
+    stride: int = 0,
+) -> np.ndarray:
+    """
+    Every (start, end) window worth scoring, in whole seconds: each length on a regular grid,
+    plus windows starting on a scene cut so suggestions open on a fresh shot.
+    """
+    lengths = lengths or settings.CLIP_CANDIDATE_LENGTHS
+    stride = stride or settings.CLIP_CANDIDATE_STRIDE_SECONDS
+    last = int(duration)
+    starts = np.arange(0, last, stride, dtype=np.int64)
+    if scene_times is not None and len(scene_times):
+        cuts = np.floor(np.asarray(scene_times, dtype=np.float64)).astype(np.int64)
+        starts = np.union1d(starts, cuts[(cuts >= 0) & (cuts < last)])
+    windows = [
+        np.stack([starts[starts + length <= last], starts[starts + length <= last] + length], axis=1)
+        for length in lengths
+    ]
+    windows = [w for w in windows if len(w)]
+    if not windows:
+        return np.zeros((0, 2), dtype=np.int64)
+    return np.concatenate(windows)
+
+
+def non_max_suppression(windows: np.ndarray, scores: np.ndarray, top_n: int, max_overlap: float) -> np.ndarray:
+    """
+    Indices of the best windows, highest score first, skipping any window that overlaps an
+    already kept one by more than `max_overlap` of the shorter of the two.
+    """
+    order = np.argsort(-scores, kind="stable")
+    starts, ends = windows[order, 0], windows[order, 1]
+    suppressed = np.zeros(len(order), dtype=bool)
+    keep = []
+    for i in range(len(order)):
+        if suppressed[i]:
+            continue
+        keep.append(order[i])
+        if len(keep) >= top_n:
+            break
+        overlap = np.minimum(ends, ends[i]) - np.maximum(starts, starts[i])
+        shorter = np.minimum(ends - starts, ends[i] - starts[i])
+        suppressed |= overlap > max_overlap * shorter
+    return np.asarray(keep, dtype=np.int64)
+
+
+def score_candidates(
+    duration: float,
+    envelope: Optional[np.ndarray] = None,
+    scene_times: Optional[np.ndarray] = None,
+    speech: Optional[np.ndarray] = None,
+    rate_hz: Optional[int] = None,
+    top_n: Optional[int] = None,
+) -> List[ClipCandidate]:
+    """
+    Score every candidate window of a video at once and return the best `top_n`.
+
+    Signals, each standardized across all windows before weighting:
+      - energy: mean loudness of the window against the voiced part of the whole video
+        (loudness.energy_scores, already in standard deviations),
+      - lift: how much louder the window is than the seconds leading into it,
+      - pacing: scene cuts per minute inside the window,
+      - speech: transcript words per second (when a transcript exists).
+    `envelope` and `speech` are per-sample arrays at `rate_hz`; missing signals drop out.
+    """
+    rate_hz = rate_hz or settings.LOUDNESS_ENVELOPE_HZ
+    top_n = top_n or settings.CLIP_SUGGESTION_COUNT
+    windows = candidate_windows(duration, scene_times)
+    if not len(windows):
+        return []
+    starts, ends = windows[:, 0], windows[:, 1]
+    lengths = (ends - starts).astype(np.float64)
+
+    signals = {}
+    # signals already in standard deviations of their own baseline
+    prescaled = {}
+    if envelope is not None and len(envelope):
+        loudness = np.asarray(envelope, dtype=np.float32)
+        prescaled["energy"], mean_db = _window_energy(loudness, starts, ends, rate_hz)
+        signals["energy"] = mean_db
+        lead = settings.CLIP_LEAD_IN_SECONDS * rate_hz
+        lead_db = _at(window_loudness(loudness, lead), starts * rate_hz - lead)
+        # only windows with a full lead-in before them can rise above it
+        signals["lift"] = np.where(starts * rate_hz >= lead, mean_db - lead_db, 0.0)
+    if scene_times is not None and len(scene_times):
+        cuts = np.sort(np.asarray(scene_times, dtype=np.float64))
+        counts = np.searchsorted(cuts, ends, side="left") - np.searchsorted(cuts, starts, side="right")
+        signals["pacing"] = counts / lengths * 60
+    if speech is not None and len(speech):
+        words = _window_sums(np.asarray(speech, dtype=np.float32), starts * rate_hz, ends * rate_hz)
+        signals["speech"] = words / lengths
+
+    weights = {
+        "energy": settings.CLIP_WEIGHT_ENERGY,
+        "lift": settings.CLIP_WEIGHT_LIFT,
+        "pacing": settings.CLIP_WEIGHT_PACING,
+        "speech": settings.CLIP_WEIGHT_SPEECH,
+    }
+    # a weight of 0 switches its signal off; with every signal off there is nothing to rank by
+    signals = {name: values for name, values in signals.items() if weights[name] > 0}
+    if not signals:
+        return []
+    # standardizing energy across windows again would let silent stretches set its baseline
+    standardized = {
+        name: prescaled[name] if name in prescaled else _standardize(values) for name, values in signals.items()
+    }
+    total_weight = sum(weights[name] for name in standardized)
+    composite = np.sum([weights[name] * values for name, values in standardized.items()], axis=0) / total_weight
+    # 50 is an average window; +/-2 standard deviations lands near 0 and 100
+    ai_scores = np.clip(np.rint(100 / (1 + np.exp(-1.5 * composite))), 0, 100).astype(np.int64)
+
+    keep = non_max_suppression(windows, composite, top_n, settings.CLIP_MAX_OVERLAP)
+    return [
+        ClipCandidate(
+            start_time=int(starts[i]),
+            end_time=int(ends[i]),
+            score=int(ai_scores[i]),
+            reasoning=_explain(i, signals, standardized),
+        )
+        for i in keep
+    ]
+
+
+def _explain(i: int, signals: dict, standardized: dict) -> str:
+    reasons = []
+    if "energy" in signals:
+        reasons.append(f"loudness {signals['energy'][i]:.1f} dBFS ({standardized['energy'][i]:+.1f}σ)")
+    if "lift" in signals and signals["lift"][i] > 0:
+        reasons.append(f"{signals['lift'][i]:.1f} dB louder than the lead-in")
+    if "pacing" in signals:
+        reasons.append(f"{signals['pacing'][i]:.1f} scene cuts/min")
+    if "speech" in signals:
+        reasons.append(f"{signals['speech'][i]:.1f} words/s")
+    return "Suggested for " + ", ".join(reasons) if reasons else "Suggested clip"
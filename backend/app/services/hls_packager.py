@@ -0,0 +1,229 @@
+import logging
+import os
+import re
+import shutil
+import subprocess
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Callable, List, Optional
+
+from azure.storage.blob import BlobSasPermissions, ContentSettings
+
+from app.config import settings
+from app.services.azure_storage import AzureUploadService, derived_blob_name
+from app.services.media_probe import has_audio_stream
+from app.services.sas_signing import sas_signer
+
+logger = logging.getLogger(__name__)
+
+HLS_DIR = "hls"
+MASTER_PLAYLIST = "master.m3u8"
+
+CONTENT_TYPES = {
+    ".m3u8": "application/vnd.apple.mpegurl",
+    ".m4s": "video/iso.segment",
+    ".mp4": "video/mp4",
+}
+
+_URI_ATTR = re.compile(r'URI="([^"]+)"')
+
+
+@dataclass(frozen=True)
+class Rendition:
+    height: int
+    video_kbps: int
+    audio_kbps: int = 128
+
+
+def parse_ladder(spec: str) -> List[Rendition]:
+    """Parse a ladder like "1080:5000,720:2800,480:1200" (height:video kbps), highest first."""
+    rungs = []
+    for part in spec.split(","):
+        height, _, kbps = part.strip().partition(":")
+        rungs.append(Rendition(height=int(height), video_kbps=int(kbps)))
+    return sorted(rungs, key=lambda rung: rung.height, reverse=True)
+
+
+def ladder_for(source_height: Optional[int], ladder: Optional[List[Rendition]] = None) -> List[Rendition]:
+    """Drop rungs that would upscale the source, keeping at least the lowest one."""
+    ladder = ladder or parse_ladder(settings.HLS_LADDER)
+    if not source_height:
+        return ladder
+    return [rung for rung in ladder if rung.height <= source_height] or [ladder[-1]]
+
+
+def hls_blob_name(source_path: str, name: str = MASTER_PLAYLIST) -> str:
+    return derived_blob_name(source_path, f"{HLS_DIR}/{name}")
+
+
+def sign_playlist(playlist: str, sign: Callable[[str], Optional[str]]) -> str:
+    """
+    Rewrite the media references of a playlist. `sign` gets each relative URI (segments, init
+    sections, variant playlists) and returns its replacement, or None to keep it unchanged.
+    """
+    lines = []
+    for line in playlist.splitlines():
+        if line.startswith("#"):
+            line = _URI_ATTR.sub(lambda m: f'URI="{sign(m.group(1)) or m.group(1)}"', line)
+        elif line.strip():
+            line = sign(line.strip()) or line
+        lines.append(line)
+    return "\n".join(lines) + "\n"
+
+
+@dataclass
+class HlsResult:
+    master_path: str
+    renditions: List[Rendition] = field(default_factory=list)
+    uploaded_bytes: int = 0
+    file_count: int = 0
+
+
+class HlsPackagingService:
+    """
+    Packages a stored video as an HLS ladder of fragmented MP4 segments.
+
+    One ffmpeg run decodes the source once and encodes every rung with aligned keyframes, so
+    players can switch bitrate on any segment boundary. The HLS muxer needs a directory to
+    write into: finished segments are uploaded and deleted while encoding continues, so the
+    local footprint stays at a few segments per rung. Playlists go up last, once every segment
+    they reference is in place.
+    """
+
+    def __init__(self, azure_service: Optional[AzureUploadService] = None) -> None:
+        self.azure_service = azure_service or AzureUploadService()
+
+    @staticmethod
+    def build_command(
+        source_url: str,
+        output_dir: Path,
+        renditions: List[Rendition],
+        has_audio: bool,
+    ) -> List[str]:
+        segment_seconds = settings.HLS_SEGMENT_SECONDS
+        cmd = [settings.FFMPEG_PATH, "-nostdin", "-v", "error"]
+        count = len(renditions)
+        graph = [f"[0:v]split={count}" + "".join(f"[vsrc{i}]" for i in range(count))]
+        for i, rung in enumerate(renditions):
+            graph.append(f"[vsrc{i}]scale=-2:{rung.height},setsar=1[v{i}]")
+        cmd += ["-i", source_url, "-filter_complex", ";".join(graph)]
+
+        stream_map = []
+        for i, rung in enumerate(renditions):
+            cmd += [
+                "-map", f"[v{i}]",
+                f"-c:v:{i}", "libx264",
+                f"-b:v:{i}", f"{rung.video_kbps}k",
+                f"-maxrate:v:{i}", f"{int(rung.video_kbps * 1.1)}k",
+                f"-bufsize:v:{i}", f"{rung.video_kbps * 2}k",
+            ]
+            if has_audio:
+                cmd += ["-map", "0:a:0", f"-c:a:{i}", "aac", f"-b:a:{i}", f"{rung.audio_kbps}k"]
+                stream_map.append(f"v:{i},a:{i}")
+            else:
+                stream_map.append(f"v:{i}")
+        cmd += [
+            "-preset", settings.CLIP_RENDER_PRESET,
+            # keyframes exactly on segment boundaries, identical across rungs
+            "-force_key_frames", f"expr:gte(t,n_forced*{segment_seconds})",
+            "-sc_threshold", "0",
+            "-f", "hls",
+            "-hls_time", str(segment_seconds),
+            "-hls_playlist_type", "vod",
+            "-hls_segment_type", "fmp4",
+            "-hls_flags", "independent_segments",
+            "-hls_fmp4_init_filename", "init.mp4",
+            "-hls_segment_filename", str(output_dir / "v%v" / "seg_%05d.m4s"),
+            "-master_pl_name", MASTER_PLAYLIST,
+            "-var_stream_map", " ".join(stream_map),
+            str(output_dir / "v%v" / "index.m3u8"),
+        ]
+        return cmd
+
+    def _upload_file(self, local_path: Path, blob_name: str) -> int:
+        content_type = CONTENT_TYPES.get(local_path.suffix, "application/octet-stream")
+        with open(local_path, "rb") as data:
+            self.azure_service.get_blob_client(blob_name).upload_blob(
+                data,
+                overwrite=True,
+                content_settings=ContentSettings(content_type=content_type),
+            )
+        return local_path.stat().st_size
+
+    def _finished_segments(self, output_dir: Path) -> List[Path]:
+        """Segments ffmpeg has moved past: every one but the newest of each rung."""
+        finished = []
+        for rung_dir in output_dir.glob("v*"):
+            segments = sorted(rung_dir.glob("seg_*.m4s"))
+            finished += segments[:-1]
+        return finished
+
+    def package(self, source_path: str, source_height: Optional[int] = None) -> HlsResult:
+        """Package the blob at `source_path` under its `hls/` prefix."""
+        source_url = self.azure_service.generate_read_sas_url(source_path, expires_in_minutes=240)
+        renditions = ladder_for(source_height)
+        result = HlsResult(master_path=hls_blob_name(source_path), renditions=renditions)
+        output_dir = settings.TEMP_BASE_DIR / "processing" / f"hls_{uuid.uuid4().hex}"
+        for i in range(len(renditions)):
+            (output_dir / f"v{i}").mkdir(parents=True, exist_ok=True)
+
+        def upload(local_path: Path) -> None:
+            relative = local_path.relative_to(output_dir).as_posix()
+            result.uploaded_bytes += self._upload_file(local_path, hls_blob_name(source_path, relative))
+            result.file_count += 1
+            local_path.unlink()
+
+        try:
+            cmd = self.build_command(source_url, output_dir, renditions, has_audio_stream(source_url))
+            process = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+            try:
+                while process.poll() is None:
+                    for segment in self._finished_segments(output_dir):
+                        upload(segment)
+                    time.sleep(0.5)
+                stderr_output = process.stderr.read().decode('utf-8', errors='ignore') if process.stderr else ''
+            finally:
+                if process.poll() is None:
+                    process.kill()
+                    process.wait()
+            if process.returncode != 0:
+                raise RuntimeError(f"ffmpeg failed with return code {process.returncode}: {stderr_output[:500]}")
+
+            # remaining segments and init sections, then the playlists that reference them
+            remaining = sorted(output_dir.rglob("*"), key=lambda path: path.suffix == ".m3u8")
+            for local_path in remaining:
+                if local_path.is_file():
+                    upload(local_path)
+            return result
+        finally:
+            shutil.rmtree(output_dir, ignore_errors=True)
+
+    def signed_playlist(self, playlist_path: str, expires_in_minutes: Optional[int] = None) -> str:
+        """
+        Return the playlist at `playlist_path` with segment and init URIs replaced by read SAS URLs.
+        Variant playlist references stay relative so players fetch them through the same route.
+        """
+        playlist = self.azure_service.get_blob_client(playlist_path).download_blob().readall().decode("utf-8")
+        base = playlist_path.rsplit("/", 1)[0]
+        expiry = datetime.now(timezone.utc) + timedelta(minutes=expires_in_minutes or settings.HLS_URL_EXPIRY_MINUTES)
+        permission = BlobSasPermissions(read=True)
+
+        def sign(uri: str) -> Optional[str]:
+            if "://" in uri or uri.endswith(".m3u8"):
+                return None
+            blob_name = os.path.normpath(f"{base}/{uri}").replace(os.sep, "/")
+            shard = self.azure_service.router.shard_for_blob(blob_name)
+            return f"{shard.blob_url(blob_name)}?{sas_signer.sign(shard, blob_name, permission, expiry)}"
+
+        return sign_playlist(playlist, sign)
+
+
+def validate_playlist_path(manifest: str) -> str:
+    """Check a playlist path requested by a player ("master.m3u8", "v1/index.m3u8") stays inside the prefix."""
+    parts = manifest.split("/")
+    if not manifest.endswith(".m3u8") or len(parts) > 2 or any(part in ("", ".", "..") for part in parts):
+        raise ValueError(f"Invalid playlist path: {manifest}")
+    return manifest
@@ -0,0 +1,308 @@
+import json
+import logging
+import math
+import os
+import subprocess
+import threading
+from dataclasses import dataclass, field
+from typing import BinaryIO, Callable, Dict, Iterator, List, Optional
+
+from azure.core.exceptions import ResourceNotFoundError
+from azure.storage.blob import ContentSettings
+
+from app.config import settings
+from app.services.azure_storage import AzureUploadService, derived_blob_name
+from app.services.media_probe import has_audio_stream
+
+logger = logging.getLogger(__name__)
+
+POSTER_NAME = "poster.jpg"
+PROXY_NAME = "proxy.mp4"
+AUDIO_NAME = "audio.aac"
+MANIFEST_NAME = "assets.json"
+
+
+def thumbnail_name(index: int) -> str:
+    return f"thumbs/{index:05d}.jpg"
+
+
+def sprite_name(index: int) -> str:
+    return f"sprites/{index:04d}.jpg"
+
+
+def thumbnail_index_for(start_time: float, end_time: float, count: int, interval: float) -> Optional[int]:
+    """Candidate thumbnail to use for a clip: the first one inside the clip, else the last one before it."""
+    if count <= 0:
+        return None
+    index = math.ceil(start_time / interval)
+    if index * interval > end_time:
+        index = math.floor(start_time / interval)
+    return max(0, min(index, count - 1))
+
+
+def _jpeg_end(buf: bytearray) -> Optional[int]:
+    """
+    Length of the complete JPEG at the start of `buf`, or None if more bytes are needed.
+
+    Walks the header segments up to start-of-scan, then looks for the EOI marker: inside the
+    entropy-coded data every 0xFF is stuffed, so FF D9 can only be the real end of the image.
+    """
+    pos = 2  # SOI
+    while True:
+        if pos + 4 > len(buf):
+            return None
+        if buf[pos] != 0xFF:
+            raise ValueError(f"Corrupt JPEG stream at byte {pos}")
+        marker = buf[pos + 1]
+        if marker == 0xFF:  # fill byte
+            pos += 1
+            continue
+        if marker == 0xD9:
+            return pos + 2
+        pos += 2 + int.from_bytes(buf[pos + 2:pos + 4], "big")
+        if marker == 0xDA:
+            end = buf.find(b"\xff\xd9", pos)
+            return None if end == -1 else end + 2
+
+
+def iter_jpeg_frames(stream: BinaryIO, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+    """Split a stream of concatenated JPEGs (ffmpeg's image2pipe/mjpeg output) into single images."""
+    buf = bytearray()
+    while True:
+        chunk = stream.read(chunk_size)
+        if chunk:
+            buf += chunk
+        while len(buf) >= 2:
+            if buf[:2] != b"\xff\xd8":
+                raise ValueError("JPEG stream does not start with SOI")
+            end = _jpeg_end(buf)
+            if end is None:
+                break
+            yield bytes(buf[:end])
+            del buf[:end]
+        if not chunk:
+            if buf:
+                raise ValueError(f"JPEG stream ended inside an image ({len(buf)} bytes left)")
+            return
+
+
+@dataclass
+class IngestResult:
+    has_audio: bool = False
+    poster_path: Optional[str] = None
+    poster_size: int = 0
+    proxy_path: Optional[str] = None
+    proxy_size: int = 0
+    audio_path: Optional[str] = None
+    audio_size: int = 0
+    thumbnail_count: int = 0
+    sprite_count: int = 0
+    manifest_path: Optional[str] = None
+    errors: List[str] = field(default_factory=list)
+
+
+class IngestAssetService:
+    """
+    Produces every derived asset of a source video from a single decode.
+
+    One ffmpeg run reads the source once and a split filter graph fans the decoded frames out
+    to the poster, candidate thumbnails, the editing proxy and the scrub sprite sheets; the
+    audio track is encoded from the same demux. Each output is a pipe drained by its own
+    upload thread, so assets land in Azure while the source is still being read.
+    """
+
+    def __init__(self, azure_service: Optional[AzureUploadService] = None) -> None:
+        self.azure_service = azure_service or AzureUploadService()
+
+    @staticmethod
+    def build_filter_graph() -> str:
+        tile_w, tile_h = settings.INGEST_SPRITE_TILE_WIDTH, settings.INGEST_SPRITE_TILE_HEIGHT
+        return ";".join([
+            "[0:v]split=4[vposter][vthumbs][vproxy][vsprite]",
+            # most representative frame of the opening seconds, not a black first frame; scaled
+            # first so the thumbnail filter buffers and compares small frames, not source-sized ones
+            f"[vposter]scale=1280:-2,setsar=1,thumbnail=n={settings.INGEST_POSTER_SCAN_FRAMES}[poster]",
+            f"[vthumbs]fps=1/{settings.INGEST_THUMBNAIL_INTERVAL_SECONDS},scale=480:-2,setsar=1[thumbs]",
+            f"[vproxy]scale=-2:{settings.INGEST_PROXY_HEIGHT},setsar=1[proxy]",
+            f"[vsprite]fps=1/{settings.INGEST_SPRITE_INTERVAL_SECONDS},"
+            f"scale={tile_w}:{tile_h}:force_original_aspect_ratio=decrease,"
+            f"pad={tile_w}:{tile_h}:(ow-iw)/2:(oh-ih)/2,setsar=1,"
+            f"tile={settings.INGEST_SPRITE_COLUMNS}x{settings.INGEST_SPRITE_ROWS}[sprite]",
+        ])
+
+    def build_command(self, source_url: str, fds: Dict[str, int], has_audio: bool) -> List[str]:
+        jpeg = ["-c:v", "mjpeg", "-q:v", "3", "-f", "image2pipe"]
+        cmd = [
+            settings.FFMPEG_PATH,
+            "-nostdin",
+            "-v", "error",
+            "-i", source_url,
+            "-filter_complex", self.build_filter_graph(),
+            "-map", "[poster]", "-frames:v", "1", *jpeg, f"pipe:{fds['poster']}",
+            "-map", "[thumbs]", *jpeg, f"pipe:{fds['thumbs']}",
+            "-map", "[sprite]", *jpeg, f"pipe:{fds['sprite']}",
+            "-map", "[proxy]",
+        ]
+        if has_audio:
+            cmd += ["-map", "0:a:0", "-c:a", "aac", "-b:a", "96k"]
+        cmd += [
+            "-c:v", "libx264",
+            "-preset", "veryfast",
+            "-crf", str(settings.INGEST_PROXY_CRF),
+            "-g", "48",  # short GOPs keep seeking in the editor cheap
+            "-movflags", "frag_keyframe+empty_moov+default_base_moof",
+            "-f", "mp4",
+            f"pipe:{fds['proxy']}",
+        ]
+        if has_audio:
+            cmd += [
+                "-map", "0:a:0",
+                "-ac", "1",
+                "-ar", settings.AUDIO_SAMPLE_RATE,
+                "-c:a", "aac",
+                "-b:a", settings.AUDIO_BITRATE,
+                "-f", "adts",
+                f"pipe:{fds['audio']}",
+            ]
+        return cmd
+
+    def _upload_image(self, path: str, data: bytes) -> None:
+        self.azure_service.get_blob_client(path).upload_blob(
+            data,
+            overwrite=True,
+            content_settings=ContentSettings(content_type="image/jpeg"),
+        )
+
+    def ingest(self, source_path: str) -> IngestResult:
+        """Decode the blob at `source_path` once and upload all derived assets next to it."""
+        source_url = self.azure_service.generate_read_sas_url(source_path, expires_in_minutes=240)
+        has_audio = has_audio_stream(source_url)
+        outputs = ["poster", "thumbs", "sprite", "proxy"] + (["audio"] if has_audio else [])
+        pipes = {name: os.pipe() for name in outputs}
+        result = IngestResult(has_audio=has_audio)
+        lock = threading.Lock()
+
+        def fail(name: str, e: Exception) -> None:
+            logger.error(f"Ingest output {name} of {source_path} failed: {e}")
+            with lock:
+                result.errors.append(f"{name}: {e}")
+
+        def drain_poster(stream: BinaryIO) -> None:
+            for frame in iter_jpeg_frames(stream):
+                path = derived_blob_name(source_path, POSTER_NAME)
+                self._upload_image(path, frame)
+                result.poster_path, result.poster_size = path, len(frame)
+
+        def drain_thumbs(stream: BinaryIO) -> None:
+            for index, frame in enumerate(iter_jpeg_frames(stream)):
+                self._upload_image(derived_blob_name(source_path, thumbnail_name(index)), frame)
+                result.thumbnail_count = index + 1
+
+        def drain_sprite(stream: BinaryIO) -> None:
+            for index, frame in enumerate(iter_jpeg_frames(stream)):
+                self._upload_image(derived_blob_name(source_path, sprite_name(index)), frame)
+                result.sprite_count = index + 1
+
+        def drain_blocks(name: str, file_name: str) -> Callable[[BinaryIO], None]:
+            def drain(stream: BinaryIO) -> None:
+                path = derived_blob_name(source_path, file_name)
+                uploaded = 0
+
+                def track(info: dict) -> None:
+                    nonlocal uploaded
+                    uploaded = info['uploaded_bytes']
+
+                self.azure_service.upload_stream_in_blocks(path, stream, track)
+                if uploaded:
+                    setattr(result, f"{name}_path", path)
+                    setattr(result, f"{name}_size", uploaded)
+            return drain
+
+        drains = {
+            "poster": drain_poster,
+            "thumbs": drain_thumbs,
+            "sprite": drain_sprite,
+            "proxy": drain_blocks("proxy", PROXY_NAME),
+            "audio": drain_blocks("audio", AUDIO_NAME),
+        }
+
+        def run_drain(name: str, read_fd: int) -> None:
+            with os.fdopen(read_fd, "rb") as stream:
+                try:
+                    drains[name](stream)
+                except Exception as e:
+                    fail(name, e)
+                    # keep reading so ffmpeg never blocks on a full pipe
+                    while stream.read(64 * 1024):
+                        pass
+
+        write_fds = {name: write_fd for name, (_, write_fd) in pipes.items()}
+        try:
+            process = subprocess.Popen(
+                self.build_command(source_url, write_fds, has_audio),
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
+                pass_fds=list(write_fds.values()),
+            )
+        except Exception:
+            for read_fd, _ in pipes.values():
+                os.close(read_fd)
+            raise
+        finally:
+            # only ffmpeg holds the write ends now, so readers see EOF when it exits
+            for write_fd in write_fds.values():
+                os.close(write_fd)
+
+        threads = [
+            threading.Thread(target=run_drain, args=(name, read_fd), daemon=True)
+            for name, (read_fd, _) in pipes.items()
+        ]
+        for thread in threads:
+            thread.start()
+        try:
+            _, stderr = process.communicate()
+        except BaseException:
+            # e.g. the task's soft time limit: don't leave ffmpeg running without its readers
+            process.kill()
+            process.wait()
+            raise
+        for thread in threads:
+            thread.join()
+
+        if process.returncode != 0:
+            raise RuntimeError(
+                f"ffmpeg failed with return code {process.returncode}: {stderr.decode('utf-8', errors='ignore')[:500]}"
+            )
+
+        manifest = {
+            "thumbnails": {
+                "interval": settings.INGEST_THUMBNAIL_INTERVAL_SECONDS,
+                "count": result.thumbnail_count,
+            },
+            "sprite": {
+                "interval": settings.INGEST_SPRITE_INTERVAL_SECONDS,
+                "columns": settings.INGEST_SPRITE_COLUMNS,
+                "rows": settings.INGEST_SPRITE_ROWS,
+                "tile_width": settings.INGEST_SPRITE_TILE_WIDTH,
+                "tile_height": settings.INGEST_SPRITE_TILE_HEIGHT,
+                "sheets": result.sprite_count,
+            },
+        }
+        manifest_path = derived_blob_name(source_path, MANIFEST_NAME)
+        self.azure_service.get_blob_client(manifest_path).upload_blob(
+            json.dumps(manifest).encode(),
+            overwrite=True,
+            content_settings=ContentSettings(content_type="application/json"),
+        )
+        result.manifest_path = manifest_path
+        return result
+
+
+def load_manifest(source_path: str, azure_service: Optional[AzureUploadService] = None) -> Optional[dict]:
+    """The assets.json written by the ingest pass of `source_path`, or None if it has not run."""
+    azure_service = azure_service or AzureUploadService()
+    try:
+        raw = azure_service.get_blob_client(derived_blob_name(source_path, MANIFEST_NAME)).download_blob().readall()
+    except ResourceNotFoundError:
+        return None
+    return json.loads(raw)
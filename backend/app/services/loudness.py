@@ -0,0 +1,121 @@
+import logging
+import subprocess
+from typing import IO, Optional
+
+import numpy as np
+
+from app.config import settings
+from app.services.array_sidecar import load_array, save_array
+from app.services.azure_storage import AzureUploadService, derived_blob_name
+
+logger = logging.getLogger(__name__)
+
+LOUDNESS_ENVELOPE_NAME = "loudness.npy"
+
+# 16 kHz mono is plenty for loudness and keeps the decoded stream small
+PCM_SAMPLE_RATE = 16000
+SILENCE_DB = -100.0
+
+
+def envelope_from_pcm(stream: IO[bytes], sample_rate: int = PCM_SAMPLE_RATE, rate_hz: Optional[int] = None) -> np.ndarray:
+    """
+    RMS loudness in dBFS of 16-bit mono PCM, one value per 1/`rate_hz` second, as float16.
+
+    The stream is read a few seconds at a time and reduced with reshape/mean, so memory stays
+    flat however long the audio is.
+    """
+    rate_hz = rate_hz or settings.LOUDNESS_ENVELOPE_HZ
+    frame = sample_rate // rate_hz
+    chunk_frames = rate_hz * 10
+    parts = []
+    tail = b""
+    while True:
+        data = stream.read(chunk_frames * frame * 2)
+        if not data:
+            break
+        data = tail + data
+        usable = len(data) - len(data) % (frame * 2)
+        tail = data[usable:]
+        if usable:
+            samples = np.frombuffer(data[:usable], dtype="<i2").astype(np.float32) / 32768.0
+            parts.append(np.sqrt(np.mean(samples.reshape(-1, frame) ** 2, axis=1)))
+    if len(tail) >= 2:
+        samples = np.frombuffer(tail[:len(tail) - len(tail) % 2], dtype="<i2").astype(np.float32) / 32768.0
+        parts.append(np.sqrt(np.mean(samples ** 2, keepdims=True)))
+    if not parts:
+        return np.zeros(0, dtype=np.float16)
+    rms = np.concatenate(parts)
+    with np.errstate(divide="ignore"):
+        db = 20 * np.log10(rms)
+    return np.maximum(db, SILENCE_DB).astype(np.float16)
+
+
+def compute_loudness_envelope(audio_url: str, timeout: Optional[int] = None) -> np.ndarray:
+    """Decode the audio at `audio_url` to low-rate PCM with ffmpeg and reduce it to an envelope."""
+    cmd = [
+        settings.FFMPEG_PATH,
+        "-nostdin",
+        "-v", "error",
+        "-i", audio_url,
+        "-vn",
+        "-ac", "1",
+        "-ar", str(PCM_SAMPLE_RATE),
+        "-f", "s16le",
+        "pipe:1",
+    ]
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    try:
+        assert process.stdout is not None
+        envelope = envelope_from_pcm(process.stdout)
+        return_code = process.wait(timeout=timeout or settings.LOUDNESS_TIMEOUT_SECONDS)
+        if return_code != 0:
+            stderr_output = process.stderr.read().decode('utf-8', errors='ignore') if process.stderr else ''
+            raise RuntimeError(f"ffmpeg failed with return code {return_code}: {stderr_output[:500]}")
+        return envelope
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+
+
+def build_loudness_envelope(
+    source_path: str,
+    audio_path: Optional[str] = None,
+    azure_service: Optional[AzureUploadService] = None,
+) -> np.ndarray:
+    """Compute and store the loudness envelope of `source_path`, decoding `audio_path` when given."""
+    azure_service = azure_service or AzureUploadService()
+    url = azure_service.generate_read_sas_url(audio_path or source_path, expires_in_minutes=120)
+    envelope = compute_loudness_envelope(url)
+    save_array(derived_blob_name(source_path, LOUDNESS_ENVELOPE_NAME), envelope, azure_service)
+    logger.info(f"Stored loudness envelope of {source_path} ({len(envelope)} values)")
+    return envelope
+
+
+def load_loudness_envelope(source_path: str, azure_service: Optional[AzureUploadService] = None) -> Optional[np.ndarray]:
+    """Memory-map the stored loudness envelope of `source_path` (None if it was never built)."""
+    return load_array(derived_blob_name(source_path, LOUDNESS_ENVELOPE_NAME), azure_service)
+
+
+def window_loudness(envelope: np.ndarray, window: int) -> np.ndarray:
+    """Mean loudness (dB) of every `window`-sample window; element i covers envelope[i:i + window]."""
+    if window <= 0 or len(envelope) < window:
+        return np.zeros(0, dtype=np.float32)
+    sums = np.concatenate(([0.0], np.cumsum(envelope, dtype=np.float64)))
+    return ((sums[window:] - sums[:-window]) / window).astype(np.float32)
+
+
+def energy_scores(envelope: np.ndarray, window_seconds: float, rate_hz: Optional[int] = None) -> np.ndarray:
+    """
+    How much louder each window is than the video as a whole, in standard deviations.
+    Silence is left out of the baseline so quiet intros don't inflate every score.
+    """
+    rate_hz = rate_hz or settings.LOUDNESS_ENVELOPE_HZ
+    means = window_loudness(envelope, max(1, int(round(window_seconds * rate_hz))))
+    if not len(means):
+        return means
+    voiced = np.asarray(envelope, dtype=np.float32)
+    voiced = voiced[voiced > SILENCE_DB + 1]
+    if len(voiced) < 2:
+        return np.zeros_like(means)
+    return (means - voiced.mean()) / max(float(voiced.std()), 1e-3)
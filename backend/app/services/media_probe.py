@@ -0,0 +1,86 @@
+import json
+import logging
+import subprocess
+from typing import Any, Dict, Optional
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _to_float(value: Any) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def probe_media(url: str, timeout: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Read duration and resolution of the media at `url` with ffprobe.
+
+    ffprobe reads over HTTP with range requests, so for a blob SAS URL only the container
+    headers (and the moov atom, wherever it sits) are fetched, not the whole file.
+    """
+    cmd = [
+        settings.FFPROBE_PATH,
+        "-v", "error",
+        "-probesize", str(settings.PROBE_MAX_BYTES),
+        "-select_streams", "v:0",
+        "-show_entries", "format=duration,format_name:stream=width,height,codec_name,duration",
+        "-of", "json",
+        url,
+    ]
+    result = subprocess.run(
+        cmd,
+        capture_output=True,
+        timeout=timeout or settings.PROBE_TIMEOUT_SECONDS,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"ffprobe failed with return code {result.returncode}: {result.stderr.decode('utf-8', errors='ignore')[:500]}")
+
+    data = json.loads(result.stdout or b"{}")
+    stream = (data.get("streams") or [{}])[0]
+    fmt = data.get("format") or {}
+    return {
+        "duration_seconds": _to_float(fmt.get("duration")) or _to_float(stream.get("duration")),
+        "resolution_width": stream.get("width"),
+        "resolution_height": stream.get("height"),
+        "video_codec": stream.get("codec_name"),
+        "format_name": fmt.get("format_name"),
+    }
+
+
+def has_audio_stream(url: str, timeout: Optional[int] = None) -> bool:
+    """Whether the media at `url` has at least one audio stream (headers only, like `probe_media`)."""
+    cmd = [
+        settings.FFPROBE_PATH,
+        "-v", "error",
+        "-probesize", str(settings.PROBE_MAX_BYTES),
+        "-select_streams", "a",
+        "-show_entries", "stream=index",
+        "-of", "csv=p=0",
+        url,
+    ]
+    result = subprocess.run(cmd, capture_output=True, timeout=timeout or settings.PROBE_TIMEOUT_SECONDS)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffprobe failed with return code {result.returncode}: {result.stderr.decode('utf-8', errors='ignore')[:500]}")
+    return bool(result.stdout.strip())
+
+
+# container signatures of the upload formats in ALLOWED_MIME_TYPES; enough bytes to hold the
+# EBML header, where Matroska and WebM differ only by their DocType
+SNIFF_BYTES = 64
+
+
+def sniff_video_type(head: bytes) -> Optional[str]:
+    """Guess the MIME type of a video from its first bytes, or None if it isn't a known container."""
+    if head[4:8] == b"ftyp":
+        return "video/quicktime" if head[8:12] == b"qt  " else "video/mp4"
+    if head[:4] == b"\x1a\x45\xdf\xa3":
+        return "video/webm" if b"webm" in head[:SNIFF_BYTES] else "video/x-matroska"
+    if head[:4] == b"RIFF" and head[8:12] == b"AVI ":
+        return "video/x-msvideo"
+    if head[:3] == b"FLV":
+        return "video/x-flv"
+    return None
@@ -0,0 +1,159 @@
+import logging
+import socket
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple, cast
+
+import redis
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Drops expired reservations, then reserves ARGV[1] bytes if they fit in the budget.
+# A caller that has to wait is recorded as a waiting reader until it gets its bytes.
+_RESERVE_LUA = """
+local now_t = redis.call('TIME')
+local now = tonumber(now_t[1]) + tonumber(now_t[2]) / 1000000
+local nbytes = tonumber(ARGV[1])
+local budget = tonumber(ARGV[2])
+local lease = tonumber(ARGV[3])
+local token = ARGV[4]
+
+local expired = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', now)
+for i = 1, #expired do
+    redis.call('HDEL', KEYS[2], expired[i])
+end
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now)
+redis.call('ZREMRANGEBYSCORE', KEYS[3], '-inf', now)
+
+local reserved = 0
+for _, held in ipairs(redis.call('HVALS', KEYS[2])) do
+    reserved = reserved + tonumber(held)
+end
+
+if reserved + nbytes > budget then
+    redis.call('ZADD', KEYS[3], now + 30, token)
+    redis.call('EXPIRE', KEYS[3], 60)
+    return 0
+end
+redis.call('ZREM', KEYS[3], token)
+redis.call('ZADD', KEYS[1], now + lease, token)
+redis.call('HSET', KEYS[2], token, nbytes)
+if reserved + nbytes > (tonumber(redis.call('GET', KEYS[4])) or 0) then
+    redis.call('SET', KEYS[4], reserved + nbytes)
+end
+for i = 1, 2 do
+    redis.call('EXPIRE', KEYS[i], math.ceil(lease) * 2)
+end
+return 1
+"""
+
+
+class NodeMemoryBudget:
+    """
+    Caps the buffer memory held by all imports running on this node, across every
+    worker process, with the reservations kept in redis.
+
+    Imports reserve space before reading a chunk and release it once the chunk has been
+    staged. When the budget is exhausted `reserve` blocks, so the reader stops draining
+    its pipe and the producer (yt-dlp) is back-pressured instead of the node running out
+    of memory. Reservations are leases, so a killed worker can't hold its bytes forever,
+    and redis errors fail open like NodeSemaphore.
+    """
+
+    def __init__(
+        self,
+        budget_bytes: Optional[int] = None,
+        lease_seconds: float = 600,
+        node_id: Optional[str] = None,
+        redis_client: Optional[redis.Redis] = None,
+    ):
+        if budget_bytes is None:
+            budget_bytes = settings.NODE_MEMORY_BUDGET_MB * 1024 * 1024
+        self.budget_bytes = budget_bytes
+        self.lease_seconds = lease_seconds
+        self.node_id = node_id or socket.gethostname()
+        self._redis = redis_client
+        self._script = None
+
+    def _keys(self) -> list[str]:
+        prefix = f"memory_budget:{self.node_id}"
+        return [f"{prefix}:leases", f"{prefix}:reserved", f"{prefix}:waiting", f"{prefix}:peak"]
+
+    def _get_redis(self) -> redis.Redis:
+        if self._redis is None:
+            self._redis = redis.Redis.from_url(settings.REDIS_URL, decode_responses=True)
+        return self._redis
+
+    def acquire(self, nbytes: int, timeout: Optional[float] = None, poll_interval: float = 0.05) -> str:
+        """
+        Block until `nbytes` can be reserved and return the reservation token.
+        Requests larger than the whole budget are clamped so they can still run alone.
+        """
+        nbytes = min(nbytes, self.budget_bytes)
+        token = str(uuid.uuid4())
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            try:
+                if self._script is None:
+                    self._script = self._get_redis().register_script(_RESERVE_LUA)
+                granted = cast(int, self._script(
+                    keys=self._keys(),
+                    args=[nbytes, self.budget_bytes, self.lease_seconds, token],
+                ))
+            except redis.RedisError as e:
+                logger.warning(f"Node memory budget unavailable, reading unbounded: {e}")
+                return token
+            if granted:
+                return token
+            if deadline is not None and time.monotonic() >= deadline:
+                self.release(token)
+                raise TimeoutError(f"Timed out reserving {nbytes} bytes of node memory")
+            time.sleep(poll_interval)
+
+    def _forget(self, token: str) -> None:
+        leases_key, reserved_key, waiting_key, _ = self._keys()
+        pipe = self._get_redis().pipeline()
+        pipe.zrem(leases_key, token)
+        pipe.hdel(reserved_key, token)
+        pipe.zrem(waiting_key, token)
+        pipe.execute()
+
+    def release(self, token: str) -> None:
+        try:
+            self._forget(token)
+        except redis.RedisError as e:
+            logger.warning(f"Failed to release node memory reservation: {e}")
+
+    @contextmanager
+    def reserve(self, nbytes: int, timeout: Optional[float] = None) -> Iterator[int]:
+        token = self.acquire(nbytes, timeout)
+        try:
+            yield min(nbytes, self.budget_bytes)
+        finally:
+            self.release(token)
+
+    def stats(self) -> Dict[str, Any]:
+        _, reserved_key, waiting_key, peak_key = self._keys()
+        try:
+            client = self._get_redis()
+            # a sync client: the replies are values, not awaitables
+            seconds, micros = cast(Tuple[int, int], client.time())
+            reserved = sum(int(held) for held in cast(List[str], client.hvals(reserved_key)))
+            # waiting readers are scored with the redis clock, like the leases
+            waiting = cast(int, client.zcount(waiting_key, seconds + micros / 1000000, "+inf"))
+            peak = int(cast(Optional[str], client.get(peak_key)) or 0)
+        except redis.RedisError as e:
+            logger.warning(f"Failed to read node memory budget stats: {e}")
+            reserved = waiting = peak = 0
+        return {
+            "memory_budget_bytes": self.budget_bytes,
+            "memory_reserved_bytes": reserved,
+            "memory_peak_reserved_bytes": peak,
+            "memory_waiting_readers": waiting,
+        }
+
+
+node_memory_budget = NodeMemoryBudget()
@@ -0,0 +1,85 @@
+import logging
+import socket
+import time
+import uuid
+from typing import Optional, cast
+
+import redis
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Drops expired leases, then takes a slot if fewer than `limit` are held.
+_ACQUIRE_LUA = """
+local now_t = redis.call('TIME')
+local now = tonumber(now_t[1]) + tonumber(now_t[2]) / 1000000
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now)
+if redis.call('ZCARD', KEYS[1]) < tonumber(ARGV[1]) then
+    redis.call('ZADD', KEYS[1], now + tonumber(ARGV[2]), ARGV[3])
+    redis.call('EXPIRE', KEYS[1], math.ceil(tonumber(ARGV[2])) * 2)
+    return 1
+end
+return 0
+"""
+
+
+class NodeSemaphore:
+    """
+    Counting semaphore shared by every worker process on this node, held in redis.
+
+    Slots are leases that expire after `lease_seconds`, so a worker killed mid-task
+    can't hold a slot forever. Redis errors fail open: the work runs unbounded
+    rather than not at all.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        limit: int,
+        lease_seconds: int = 3600,
+        node_id: Optional[str] = None,
+        redis_client: Optional[redis.Redis] = None,
+    ):
+        self.name = name
+        self.limit = limit
+        self.lease_seconds = lease_seconds
+        self.node_id = node_id or socket.gethostname()
+        self._redis = redis_client
+        self._script = None
+
+    @property
+    def key(self) -> str:
+        return f"node_semaphore:{self.node_id}:{self.name}"
+
+    def _get_redis(self) -> redis.Redis:
+        if self._redis is None:
+            self._redis = redis.Redis.from_url(settings.REDIS_URL, decode_responses=True)
+        return self._redis
+
+    def try_acquire(self) -> Optional[str]:
+        """Take a slot without waiting. Returns a lease token, or None when the node is full."""
+        token = str(uuid.uuid4())
+        try:
+            if self._script is None:
+                self._script = self._get_redis().register_script(_ACQUIRE_LUA)
+            # a sync client, so the reply is the script's integer, not an awaitable
+            acquired = cast(int, self._script(keys=[self.key], args=[self.limit, self.lease_seconds, token]))
+        except redis.RedisError as e:
+            logger.warning(f"Node semaphore {self.name} unavailable, running unbounded: {e}")
+            return token
+        return token if int(acquired) == 1 else None
+
+    def acquire(self, timeout: Optional[float] = None, poll_interval: float = 1.0) -> Optional[str]:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            token = self.try_acquire()
+            if token or (deadline is not None and time.monotonic() >= deadline):
+                return token
+            time.sleep(poll_interval)
+
+    def release(self, token: str) -> None:
+        try:
+            self._get_redis().zrem(self.key, token)
+        except redis.RedisError as e:
+            logger.warning(f"Failed to release node semaphore {self.name}: {e}")
@@ -0,0 +1,180 @@
+import logging
+import subprocess
+from typing import IO, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from app.config import settings
+from app.models.enums import ClipFormat
+from app.services.array_sidecar import load_array, save_array
+from app.services.azure_storage import AzureUploadService, derived_blob_name
+
+logger = logging.getLogger(__name__)
+
+REFRAME_TRACK_NAME = "reframe.npy"
+
+# frames are scaled to a fixed tiny canvas; the centre is stored as a fraction of the frame,
+# so stretching the picture does not move it
+TRACK_WIDTH = 64
+TRACK_HEIGHT = 36
+
+# output aspect ratio (width / height) of the formats that crop the source
+CROP_ASPECTS = {
+    ClipFormat.VERTICAL_9_16: 9 / 16,
+    ClipFormat.SQUARE_1_1: 1.0,
+}
+
+
+def subject_centres(stream: IO[bytes], width: int = TRACK_WIDTH, height: int = TRACK_HEIGHT) -> np.ndarray:
+    """
+    Estimate the subject centre of every frame of a raw gray8 stream, as (x, y) fractions.
+
+    Saliency is motion against the previous frame plus local contrast, and the centre is the
+    saliency-weighted centroid (squared, so one strong subject wins over scattered texture).
+    Frames with no usable saliency repeat the previous centre.
+    """
+    frame_size = width * height
+    xs = (np.arange(width, dtype=np.float32) + 0.5) / width
+    ys = (np.arange(height, dtype=np.float32) + 0.5) / height
+    centres = []
+    previous = None
+    centre = (0.5, 0.5)
+    tail = b""
+    while True:
+        data = stream.read(frame_size * 16)
+        if not data:
+            break
+        data = tail + data
+        usable = len(data) - len(data) % frame_size
+        tail = data[usable:]
+        frames = np.frombuffer(data[:usable], dtype=np.uint8).astype(np.float32).reshape(-1, height, width)
+        if not len(frames):
+            continue
+        before = np.concatenate([(frames[:1] if previous is None else previous[None]), frames[:-1]])
+        contrast = np.abs(frames - frames.mean(axis=(1, 2), keepdims=True))
+        saliency = (2 * np.abs(frames - before) + contrast) ** 2
+        totals = saliency.sum(axis=(1, 2))
+        cx = saliency.sum(axis=1) @ xs
+        cy = saliency.sum(axis=2) @ ys
+        for x, y, total in zip(cx.tolist(), cy.tolist(), totals.tolist()):
+            if total > 1e-3:
+                centre = (x / total, y / total)
+            centres.append(centre)
+        previous = frames[-1]
+    return np.asarray(centres, dtype=np.float32).reshape(-1, 2)
+
+
+def smooth_track(
+    centres: np.ndarray,
+    rate_hz: float,
+    cut_times: Optional[Union[Sequence[float], np.ndarray]] = None,
+    window_seconds: Optional[float] = None,
+) -> np.ndarray:
+    """
+    Moving average of the centre path so the crop pans instead of jittering. Scene cuts split
+    the path: each shot is smoothed on its own, so the crop jumps with the cut instead of
+    drifting across it.
+    """
+    window = max(1, int(round((window_seconds or settings.REFRAME_SMOOTHING_SECONDS) * rate_hz)))
+    bounds = [0, len(centres)]
+    if cut_times is not None and len(cut_times):
+        cuts = np.round(np.asarray(cut_times, dtype=np.float64) * rate_hz).astype(np.int64)
+        bounds = sorted(set([0, len(centres)] + [int(c) for c in cuts if 0 < c < len(centres)]))
+    smoothed = np.empty_like(centres, dtype=np.float32)
+    for lo, hi in zip(bounds, bounds[1:]):
+        shot = centres[lo:hi].astype(np.float64)
+        # edge padding keeps the average centred at the ends of the shot
+        half = min(window // 2, len(shot) - 1)
+        padded = np.pad(shot, ((half, half), (0, 0)), mode="edge")
+        kernel = np.ones(2 * half + 1) / (2 * half + 1)
+        smoothed[lo:hi, 0] = np.convolve(padded[:, 0], kernel, mode="valid")
+        smoothed[lo:hi, 1] = np.convolve(padded[:, 1], kernel, mode="valid")
+    return smoothed
+
+
+def compute_reframe_track(video_url: str, timeout: Optional[int] = None) -> np.ndarray:
+    """Decode the video at `video_url` at REFRAME_TRACK_HZ on a tiny gray canvas and track the subject."""
+    cmd = [
+        settings.FFMPEG_PATH,
+        "-nostdin",
+        "-v", "error",
+        "-i", video_url,
+        "-an", "-sn", "-dn",
+        "-vf", f"fps={settings.REFRAME_TRACK_HZ},scale={TRACK_WIDTH}:{TRACK_HEIGHT},format=gray",
+        "-f", "rawvideo",
+        "pipe:1",
+    ]
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    try:
+        assert process.stdout is not None
+        centres = subject_centres(process.stdout)
+        return_code = process.wait(timeout=timeout or settings.REFRAME_TIMEOUT_SECONDS)
+        if return_code != 0:
+            stderr_output = process.stderr.read().decode('utf-8', errors='ignore') if process.stderr else ''
+            raise RuntimeError(f"ffmpeg failed with return code {return_code}: {stderr_output[:500]}")
+        return centres
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+
+
+def build_reframe_track(
+    source_path: str,
+    decode_path: Optional[str] = None,
+    cut_times: Optional[Union[Sequence[float], np.ndarray]] = None,
+    azure_service: Optional[AzureUploadService] = None,
+) -> np.ndarray:
+    """
+    Compute and store the smoothed subject track of `source_path` as an (n, 2) float16 array
+    sampled at REFRAME_TRACK_HZ. `decode_path` can point at the low-resolution ingest proxy.
+    """
+    azure_service = azure_service or AzureUploadService()
+    url = azure_service.generate_read_sas_url(decode_path or source_path, expires_in_minutes=240)
+    track = smooth_track(compute_reframe_track(url), settings.REFRAME_TRACK_HZ, cut_times).astype(np.float16)
+    save_array(derived_blob_name(source_path, REFRAME_TRACK_NAME), track, azure_service)
+    logger.info(f"Stored reframe track of {source_path} ({len(track)} samples)")
+    return track
+
+
+def load_reframe_track(source_path: str, azure_service: Optional[AzureUploadService] = None) -> Optional[np.ndarray]:
+    """Memory-map the stored reframe track of `source_path` (None if it was never built)."""
+    return load_array(derived_blob_name(source_path, REFRAME_TRACK_NAME), azure_service)
+
+
+def crop_path(
+    track: np.ndarray,
+    start: float,
+    end: float,
+    clip_format: ClipFormat,
+    source_width: Optional[int],
+    source_height: Optional[int],
+    rate_hz: Optional[float] = None,
+) -> Optional[List[Tuple[float, float, float]]]:
+    """
+    Sample a clip's crop window from the track as (time relative to the clip, x, y) points,
+    where x and y are the crop offsets as fractions of the free space (iw-ow, ih-oh) so the
+    renderer can use them at any source resolution. None when the format does not crop the source
+    or the source size is unknown.
+    """
+    rate_hz = rate_hz or settings.REFRAME_TRACK_HZ
+    aspect = CROP_ASPECTS.get(clip_format)
+    if aspect is None or not source_width or not source_height or not len(track):
+        return None
+    # crop size as a fraction of the frame, as in the renderer's crop filter
+    crop_w = min(1.0, source_height * aspect / source_width)
+    crop_h = min(1.0, source_width / aspect / source_height)
+    if crop_w >= 1.0 and crop_h >= 1.0:
+        return None
+
+    lo = min(int(np.floor(start * rate_hz)), len(track) - 1)
+    hi = min(max(int(np.ceil(end * rate_hz)), lo + 1), len(track))
+    centres = np.asarray(track[lo:hi], dtype=np.float64)
+    times = np.maximum(np.arange(lo, hi) / rate_hz - start, 0.0)
+
+    def offsets(centre: np.ndarray, size: float) -> np.ndarray:
+        if size >= 1.0:
+            return np.zeros_like(centre)
+        return np.clip((centre - size / 2) / (1 - size), 0.0, 1.0)
+
+    return list(zip(times.tolist(), offsets(centres[:, 0], crop_w).tolist(), offsets(centres[:, 1], crop_h).tolist()))
@@ -0,0 +1,231 @@
+import hashlib
+import logging
+import subprocess
+import tempfile
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Sequence, Tuple, cast
+
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.clip import Clip
+from app.models.clip_rendition import ClipRendition
+from app.models.enums import ClipStatus, SocialPlatform
+from app.models.post import Post
+from app.services.azure_storage import AzureUploadService, derived_blob_name
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class PlatformProfile:
+    """Encode settings a platform accepts without re-processing the upload on its side."""
+
+    name: str
+    long_edge: int
+    video_bitrate_k: int
+    max_fps: int
+    audio_bitrate_k: int
+    max_seconds: int
+
+    def key(self) -> str:
+        return hashlib.sha1(repr(sorted(asdict(self).items())).encode("utf-8")).hexdigest()[:16]
+
+
+PLATFORM_PROFILES: Dict[SocialPlatform, PlatformProfile] = {
+    SocialPlatform.TIKTOK: PlatformProfile("tiktok", 1920, 8000, 60, 128, 600),
+    SocialPlatform.INSTAGRAM: PlatformProfile("instagram", 1920, 5000, 30, 128, 90),
+    SocialPlatform.YOUTUBE_SHORTS: PlatformProfile("youtube", 1920, 8000, 60, 192, 60),
+    SocialPlatform.TWITTER: PlatformProfile("twitter", 1280, 5000, 40, 128, 140),
+    SocialPlatform.LINKEDIN: PlatformProfile("linkedin", 1920, 5000, 30, 192, 600),
+    SocialPlatform.FACEBOOK: PlatformProfile("facebook", 1920, 6000, 30, 128, 90),
+}
+
+
+# inserts retried when the evictor removes the row before acquire_rendition can lock it
+ACQUIRE_ATTEMPTS = 3
+
+
+def rendition_blob_name(clip_path: str, profile: PlatformProfile, clip_version: str) -> str:
+    return derived_blob_name(clip_path, f"renditions/{profile.name}-{profile.key()}-{clip_version}.mp4")
+
+
+def clip_version(clip_path: str, azure_service: Optional[AzureUploadService] = None) -> str:
+    """Version of the rendered clip at `clip_path`, from its blob's ETag (new whenever the clip is rendered again)."""
+    azure_service = azure_service or AzureUploadService()
+    etag = azure_service.get_blob_client(clip_path).get_blob_properties().etag
+    return hashlib.sha1(etag.encode("utf-8")).hexdigest()[:16]
+
+
+def build_encode_command(source_url: str, profile: PlatformProfile, output_path: str) -> List[str]:
+    edge = profile.long_edge
+    return [
+        settings.FFMPEG_PATH,
+        "-nostdin",
+        "-v", "error",
+        "-y",
+        "-i", source_url,
+        "-t", str(profile.max_seconds),
+        # never upscale: only frames longer than the platform's edge are shrunk
+        "-vf", f"scale='min(iw,{edge})':'min(ih,{edge})':force_original_aspect_ratio=decrease:force_divisible_by=2",
+        "-fpsmax", str(profile.max_fps),
+        "-c:v", "libx264",
+        "-profile:v", "high",
+        "-pix_fmt", "yuv420p",
+        "-preset", settings.CLIP_RENDER_PRESET,
+        "-b:v", f"{profile.video_bitrate_k}k",
+        "-maxrate", f"{profile.video_bitrate_k}k",
+        "-bufsize", f"{profile.video_bitrate_k * 2}k",
+        "-c:a", "aac",
+        "-b:a", f"{profile.audio_bitrate_k}k",
+        "-ar", "48000",
+        # platforms want a regular mp4 with the index up front, so this one goes through a file
+        "-movflags", "+faststart",
+        "-f", "mp4",
+        output_path,
+    ]
+
+
+def encode_rendition(
+    clip_path: str,
+    profile: PlatformProfile,
+    clip_version: str,
+    azure_service: Optional[AzureUploadService] = None,
+) -> Tuple[str, int]:
+    """Encode the rendered clip at `clip_path` for `profile` and upload it. Returns (blob path, size)."""
+    azure_service = azure_service or AzureUploadService()
+    source_url = azure_service.generate_read_sas_url(clip_path, expires_in_minutes=60)
+    path = rendition_blob_name(clip_path, profile, clip_version)
+    with tempfile.NamedTemporaryFile(suffix=".mp4", dir=settings.TEMP_BASE_DIR / "processing") as output:
+        result = subprocess.run(
+            build_encode_command(source_url, profile, output.name),
+            capture_output=True,
+            timeout=settings.RENDITION_TIMEOUT_SECONDS,
+        )
+        if result.returncode != 0:
+            raise RuntimeError(f"ffmpeg failed with return code {result.returncode}: {result.stderr.decode('utf-8', errors='ignore')[:500]}")
+        size = 0
+
+        def track(info: dict) -> None:
+            nonlocal size
+            size = info['uploaded_bytes']
+
+        with open(output.name, "rb") as stream:
+            azure_service.upload_stream_in_blocks(path, stream, track)
+    return path, size
+
+
+def acquire_rendition(db: Session, clip: Clip, platform: SocialPlatform, clip_version: str) -> ClipRendition:
+    """
+    Take a reference on the (clip version, platform profile, format) rendition, creating its cache
+    row on first use. Concurrent callers for the same key all end up on the same row (caller commits).
+    """
+    profile = PLATFORM_PROFILES[platform]
+    key = dict(
+        clip_id=clip.id, profile=profile.name, format=clip.format, profile_key=profile.key(), clip_version=clip_version
+    )
+    for _ in range(ACQUIRE_ATTEMPTS):
+        db.execute(
+            pg_insert(ClipRendition)
+            .values(**key, status=ClipStatus.PENDING, ref_count=0)
+            .on_conflict_do_nothing(constraint='uq_clip_rendition_key')
+        )
+        # the evictor may delete an unreferenced row between the insert and the lock; insert again
+        rendition = db.execute(select(ClipRendition).filter_by(**key).with_for_update()).scalar_one_or_none()
+        if rendition is not None:
+            break
+    else:
+        raise RuntimeError(f"Rendition {profile.name} of clip {clip.id} kept being evicted while acquiring it")
+    rendition.ref_count += 1
+    rendition.last_used_at = datetime.now(timezone.utc)
+    db.add(rendition)
+    return rendition
+
+
+def claim_encode(db: Session, rendition_id: int) -> bool:
+    """
+    Whether the caller should encode the rendition: True for exactly one caller while it is
+    missing (or its last encoder failed or went quiet). Commits the claim.
+    """
+    stale = datetime.now(timezone.utc) - timedelta(seconds=settings.RENDITION_TIMEOUT_SECONDS * 2)
+    claimed = db.execute(
+        update(ClipRendition)
+        .where(
+            ClipRendition.id == rendition_id,
+            (ClipRendition.status.in_([ClipStatus.PENDING, ClipStatus.FAILED]))
+            | ((ClipRendition.status == ClipStatus.PROCESSING) & (ClipRendition.updated_at < stale)),
+        )
+        .values(status=ClipStatus.PROCESSING, error_message=None, updated_at=func.now())
+    ).rowcount
+    db.commit()
+    return bool(claimed)
+
+
+def release_rendition(db: Session, post: Post) -> None:
+    """Drop the post's reference on its rendition, e.g. once the platform has the upload (caller commits)."""
+    if post.rendition_id is None:
+        return
+    db.execute(
+        update(ClipRendition)
+        .where(ClipRendition.id == post.rendition_id)
+        .values(ref_count=func.greatest(ClipRendition.ref_count - 1, 0))
+    )
+    post.rendition_id = None
+    db.add(post)
+
+
+def select_evictions(
+    rows: Sequence[Tuple[int, int, datetime]],
+    total_bytes: int,
+    budget_bytes: int,
+    idle_cutoff: datetime,
+) -> List[int]:
+    """
+    Ids to evict from unreferenced renditions `rows` of (id, size, last used), oldest first:
+    anything idle since before `idle_cutoff`, then more until the cache fits `budget_bytes`.
+    """
+    evict = []
+    for rendition_id, size, last_used in sorted(rows, key=lambda row: row[2]):
+        if total_bytes <= budget_bytes and last_used >= idle_cutoff:
+            break
+        evict.append(rendition_id)
+        total_bytes -= size
+    return evict
+
+
+def evict_renditions(db: Session, azure_service: Optional[AzureUploadService] = None) -> Dict[str, int]:
+    """Delete least recently used renditions no post references, keeping the cache within its budget."""
+    azure_service = azure_service or AzureUploadService()
+    total = db.execute(
+        select(func.coalesce(func.sum(ClipRendition.file_size), 0)).where(ClipRendition.status == ClipStatus.READY)
+    ).scalar_one()
+    last_used = func.coalesce(ClipRendition.last_used_at, ClipRendition.created_at)
+    # both columns are coalesced, so no value is None
+    rows = cast(Sequence[Tuple[int, int, datetime]], db.execute(
+        select(ClipRendition.id, func.coalesce(ClipRendition.file_size, 0), last_used)
+        .where(ClipRendition.ref_count == 0, ClipRendition.status.in_([ClipStatus.READY, ClipStatus.FAILED]))
+        .order_by(last_used)
+    ).tuples().all())
+    idle_cutoff = datetime.now(timezone.utc) - timedelta(days=settings.RENDITION_IDLE_DAYS)
+    ids = select_evictions(rows, int(total or 0), settings.RENDITION_CACHE_MAX_GB * 1024 ** 3, idle_cutoff)
+
+    evicted = freed = 0
+    for start in range(0, len(ids), 500):
+        batch = db.execute(
+            select(ClipRendition)
+            .where(ClipRendition.id.in_(ids[start:start + 500]), ClipRendition.ref_count == 0)
+            .with_for_update(skip_locked=True)
+        ).scalars().all()
+        for rendition in batch:
+            if rendition.file_path:
+                azure_service.delete_blob(rendition.file_path)
+            freed += rendition.file_size or 0
+            db.delete(rendition)
+        db.commit()
+        evicted += len(batch)
+    if evicted:
+        logger.info(f"Evicted {evicted} clip renditions ({freed} bytes)")
+    return {"evicted": evicted, "freed_bytes": freed}
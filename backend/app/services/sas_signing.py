@@ -0,0 +1,77 @@
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, Tuple
+
+from azure.storage.blob import BlobSasPermissions, UserDelegationKey, generate_blob_sas
+
+from app.config import settings
+from app.services.storage_router import StorageShard
+
+
+class SasSigner:
+    """
+    Issues blob SAS tokens with signing material loaded once per process.
+
+    Shards with an account key in their connection string sign with that key, parsed once.
+    Keyless shards sign with a user delegation key that is fetched from Azure and refreshed
+    shortly before it expires, instead of on every request.
+    """
+
+    def __init__(self):
+        self._account_keys: Dict[str, Optional[str]] = {}
+        self._delegation_keys: Dict[str, Tuple[UserDelegationKey, datetime]] = {}
+        self._lock = threading.Lock()
+
+    def _account_key(self, shard: StorageShard) -> Optional[str]:
+        if shard.name not in self._account_keys:
+            self._account_keys[shard.name] = shard.account_key
+        return self._account_keys[shard.name]
+
+    def _delegation_key(self, shard: StorageShard, needed_until: datetime) -> UserDelegationKey:
+        cached = self._delegation_keys.get(shard.name)
+        refresh_margin = timedelta(minutes=settings.SAS_DELEGATION_KEY_REFRESH_MINUTES)
+        if cached and cached[1] - refresh_margin > needed_until:
+            return cached[0]
+
+        with self._lock:
+            cached = self._delegation_keys.get(shard.name)
+            if cached and cached[1] - refresh_margin > needed_until:
+                return cached[0]
+            now = datetime.now(timezone.utc)
+            key_expiry = now + timedelta(hours=settings.SAS_DELEGATION_KEY_TTL_HOURS)
+            key = shard.blob_service.get_user_delegation_key(
+                key_start_time=now - timedelta(minutes=5),
+                key_expiry_time=key_expiry,
+            )
+            self._delegation_keys[shard.name] = (key, key_expiry)
+            return key
+
+    def sign(
+        self,
+        shard: StorageShard,
+        blob_name: str,
+        permission: BlobSasPermissions,
+        expiry: datetime,
+    ) -> str:
+        """Return a SAS token for `blob_name` on `shard`."""
+        account_key = self._account_key(shard)
+        if account_key:
+            return generate_blob_sas(
+                account_name=shard.account_name,
+                container_name=shard.container_name,
+                blob_name=blob_name,
+                account_key=account_key,
+                permission=permission,
+                expiry=expiry,
+            )
+        return generate_blob_sas(
+            account_name=shard.account_name,
+            container_name=shard.container_name,
+            blob_name=blob_name,
+            user_delegation_key=self._delegation_key(shard, expiry),
+            permission=permission,
+            expiry=expiry,
+        )
+
+
+sas_signer = SasSigner()
@@ -0,0 +1,116 @@
+import logging
+import subprocess
+from typing import Iterable, Optional
+
+import numpy as np
+
+from app.config import settings
+from app.services.array_sidecar import load_array, save_array
+from app.services.azure_storage import AzureUploadService, derived_blob_name
+
+logger = logging.getLogger(__name__)
+
+SCENE_INDEX_NAME = "scenes.npy"
+
+# one row per sampled frame whose scene-change score reached SCENE_INDEX_MIN_SCORE
+SCENE_DTYPE = np.dtype([("time", "<f4"), ("score", "<f4")])
+
+
+def parse_scene_scores(lines: Iterable[str], min_score: float = 0.0) -> np.ndarray:
+    """
+    Parse the output of ffmpeg's `metadata=print` filter:
+
+        frame:12   pts:61440   pts_time:2.4
+        lavfi.scene_score=0.731000
+    """
+    times, scores = [], []
+    pts_time = None
+    for line in lines:
+        line = line.strip()
+        if line.startswith("frame:"):
+            pts_time = None
+            for field in line.split():
+                if field.startswith("pts_time:"):
+                    try:
+                        pts_time = float(field[len("pts_time:"):])
+                    except ValueError:
+                        pts_time = None
+        elif line.startswith("lavfi.scene_score=") and pts_time is not None:
+            score = float(line.partition("=")[2])
+            if score >= min_score:
+                times.append(pts_time)
+                scores.append(score)
+    index = np.empty(len(times), dtype=SCENE_DTYPE)
+    index["time"] = times
+    index["score"] = scores
+    return index[np.argsort(index["time"], kind="stable")]
+
+
+def compute_scene_index(source_url: str, timeout: Optional[int] = None) -> np.ndarray:
+    """
+    Score scene changes with ffmpeg's `scene` detector on a small, frame-rate reduced copy of
+    the video. Only scores at or above SCENE_INDEX_MIN_SCORE are kept, so later searches can
+    still pick their own threshold.
+    """
+    video_filter = (
+        f"fps={settings.SCENE_INDEX_FPS},scale={settings.SCENE_INDEX_WIDTH}:-2,"
+        "select='gte(scene\\,0)',metadata=print:key=lavfi.scene_score:file=-"
+    )
+    cmd = [
+        settings.FFMPEG_PATH,
+        "-nostdin",
+        "-v", "error",
+        "-i", source_url,
+        "-an", "-sn", "-dn",
+        "-vf", video_filter,
+        "-f", "null",
+        "-",
+    ]
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    try:
+        assert process.stdout is not None
+        index = parse_scene_scores(process.stdout, settings.SCENE_INDEX_MIN_SCORE)
+        return_code = process.wait(timeout=timeout or settings.SCENE_INDEX_TIMEOUT_SECONDS)
+        if return_code != 0:
+            stderr_output = process.stderr.read() if process.stderr else ""
+            raise RuntimeError(f"ffmpeg failed with return code {return_code}: {stderr_output[:500]}")
+        return index
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+
+
+def build_scene_index(
+    source_path: str,
+    decode_path: Optional[str] = None,
+    azure_service: Optional[AzureUploadService] = None,
+) -> np.ndarray:
+    """
+    Compute and store the scene index of the video at `source_path`. `decode_path` can point at
+    a low-resolution rendition of the same video (the ingest proxy) to make the decode cheap.
+    """
+    azure_service = azure_service or AzureUploadService()
+    url = azure_service.generate_read_sas_url(decode_path or source_path, expires_in_minutes=240)
+    index = compute_scene_index(url)
+    save_array(derived_blob_name(source_path, SCENE_INDEX_NAME), index, azure_service)
+    logger.info(f"Stored scene index of {source_path} ({len(index)} scored frames)")
+    return index
+
+
+def load_scene_index(source_path: str, azure_service: Optional[AzureUploadService] = None) -> Optional[np.ndarray]:
+    """Memory-map the stored scene index of `source_path` (None if it was never built)."""
+    return load_array(derived_blob_name(source_path, SCENE_INDEX_NAME), azure_service)
+
+
+def scene_cuts(
+    index: np.ndarray,
+    threshold: Optional[float] = None,
+    start: float = 0.0,
+    end: float = float("inf"),
+) -> np.ndarray:
+    """Timestamps of scene cuts scoring at least `threshold` between `start` and `end`."""
+    threshold = settings.SCENE_CUT_THRESHOLD if threshold is None else threshold
+    lo, hi = np.searchsorted(index["time"], [start, end], side="left")
+    window = index[lo:hi]
+    return np.asarray(window["time"][window["score"] >= threshold])
@@ -0,0 +1,137 @@
+import bisect
+import hashlib
+import json
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from azure.storage.blob import BlobServiceClient
+
+from app.config import settings
+from app.services.azure_clients import get_blob_service_client
+
+# blob names written by the router start with a short hash and the shard they were placed on,
+# e.g. "3fa9~eu2/<uuid>/clip.mp4"; "~" never appears in names written before sharding
+_PREFIX_LENGTH = 4
+_PREFIX_RE = re.compile(rf"^[0-9a-f]{{{_PREFIX_LENGTH}}}~([A-Za-z0-9_-]+)$")
+_SHARD_NAME_RE = re.compile(r"^[A-Za-z0-9_-]+$")
+
+
+def _parse_connection_string(connection_string: str) -> Dict[str, str]:
+    parts = {}
+    for part in connection_string.split(';'):
+        if '=' in part:
+            key, value = part.split('=', 1)
+            parts[key] = value
+    return parts
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.md5(value.encode()).digest()[:8], "big")
+
+
+@dataclass(frozen=True)
+class StorageShard:
+    """One storage account + container that blobs can be routed to."""
+    name: str
+    account_name: str
+    container_name: str
+    connection_string: str = field(repr=False)
+    weight: int = 1
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "StorageShard":
+        connection_string = config['connection_string']
+        parts = _parse_connection_string(connection_string)
+        name = config.get('name') or parts.get('AccountName', '')
+        if not _SHARD_NAME_RE.match(name):
+            raise ValueError(f"Storage shard name must be letters, digits, '-' or '_': {name!r}")
+        return cls(
+            name=name,
+            account_name=config.get('account_name') or parts.get('AccountName', ''),
+            container_name=config.get('container') or settings.AZURE_CONTAINER_NAME,
+            connection_string=connection_string,
+            weight=int(config.get('weight', 1)),
+        )
+
+    @property
+    def account_key(self) -> Optional[str]:
+        return _parse_connection_string(self.connection_string).get('AccountKey')
+
+    @property
+    def blob_service(self) -> BlobServiceClient:
+        return get_blob_service_client(self.connection_string)
+
+    def blob_url(self, blob_name: str) -> str:
+        return f"https://{self.account_name}.blob.core.windows.net/{self.container_name}/{blob_name}"
+
+
+class StorageRouter:
+    """
+    Places new blobs on storage shards with a consistent hash ring.
+
+    Blob names get a short hashed prefix, which spreads keys across storage partitions
+    instead of clustering them lexically, followed by the name of the shard the ring
+    picked. Reads take the shard from the stored blob name rather than the ring, so
+    adding or reweighting shards only changes where new blobs go. Names without a
+    routed prefix predate sharding and live on the primary shard.
+    """
+
+    VIRTUAL_NODES = 64
+
+    def __init__(self, shards: List[StorageShard]):
+        if not shards:
+            raise ValueError("At least one storage shard must be configured")
+        self.shards = shards
+        self.primary = shards[0]
+        self._by_name = {shard.name: shard for shard in shards}
+        if len(self._by_name) != len(shards):
+            raise ValueError("Storage shard names must be unique")
+        self._ring: List[Tuple[int, StorageShard]] = sorted(
+            (_hash(f"{shard.name}#{i}"), shard)
+            for shard in shards
+            for i in range(self.VIRTUAL_NODES * shard.weight)
+        )
+        self._ring_keys = [point for point, _ in self._ring]
+
+    @classmethod
+    def from_settings(cls) -> "StorageRouter":
+        if settings.AZURE_STORAGE_SHARDS:
+            configs = json.loads(settings.AZURE_STORAGE_SHARDS)
+        else:
+            configs = [{
+                'name': 'primary',
+                'account_name': settings.AZURE_STORAGE_ACCOUNT_NAME,
+                'container': settings.AZURE_CONTAINER_NAME,
+                'connection_string': settings.AZURE_STORAGE_CONNECTION_STRING,
+            }]
+        return cls([StorageShard.from_config(config) for config in configs])
+
+    @staticmethod
+    def hash_prefix(key: str) -> str:
+        return hashlib.sha1(key.encode()).hexdigest()[:_PREFIX_LENGTH]
+
+    def shard_for_prefix(self, prefix: str) -> StorageShard:
+        index = bisect.bisect(self._ring_keys, _hash(prefix)) % len(self._ring)
+        return self._ring[index][1]
+
+    def shard_for_blob(self, blob_name: str) -> StorageShard:
+        match = _PREFIX_RE.match(blob_name.split('/', 1)[0]) if '/' in blob_name else None
+        if not match:
+            return self.primary
+        shard = self._by_name.get(match.group(1))
+        if shard is None:
+            raise ValueError(f"Blob {blob_name} is on storage shard {match.group(1)!r}, which is not configured")
+        return shard
+
+    def make_blob_name(self, file_name: str, routing_key: Optional[str] = None) -> str:
+        """
+        Prefix `file_name` with a partition-friendly hash and the shard it is placed on.
+        Pass `routing_key` (e.g. a user id) to keep related blobs together; by default every
+        blob is placed independently.
+        """
+        prefix = self.hash_prefix(routing_key or file_name)
+        return f"{prefix}~{self.shard_for_prefix(prefix).name}/{file_name}"
+
+
+storage_router = StorageRouter.from_settings()
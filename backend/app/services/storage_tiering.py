@@ -0,0 +1,199 @@
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.enums import EntityType, StorageTier, VideoStatus
+from app.models.file_storage import FileStorage
+from app.models.video import Video
+from app.services.azure_storage import AzureUploadService
+
+logger = logging.getLogger(__name__)
+
+
+def _promote(azure_service: AzureUploadService, path: str, tier: StorageTier) -> Tuple[StorageTier, bool]:
+    """
+    Start moving a blob in `tier` back to hot. Returns its new tier and whether it can be read now:
+    cool blobs stay readable while they are promoted, archived ones only once rehydrated.
+    """
+    if tier == StorageTier.HOT:
+        return tier, True
+    if tier == StorageTier.REHYDRATING:
+        if azure_service.is_rehydrating(path):
+            return tier, False
+        return StorageTier.HOT, True
+    if tier == StorageTier.ARCHIVE:
+        # ask for the fast lane, since someone is waiting for this blob
+        if azure_service.set_blob_tier(path, StorageTier.HOT.value, rehydrate_priority="High"):
+            return StorageTier.REHYDRATING, False
+        return tier, False
+    if azure_service.set_blob_tier(path, StorageTier.HOT.value):
+        return StorageTier.HOT, True
+    return tier, True
+
+
+def record_video_access(db: Session, video: Video, azure_service: Optional[AzureUploadService] = None) -> bool:
+    """
+    Mark `video` as read now and bring its source blob back to the hot tier if it was moved.
+
+    Returns False while an archived source is being rehydrated; the video stays REHYDRATING
+    until a later call finds Azure has finished, so callers can retry until it is readable.
+    """
+    video.last_accessed_at = datetime.now(timezone.utc)
+    readable = True
+    if video.azure_file_path and video.access_tier != StorageTier.HOT:
+        video.access_tier, readable = _promote(azure_service or AzureUploadService(), video.azure_file_path, video.access_tier)
+    db.add(video)
+    db.commit()
+    return readable
+
+
+def promote_video_blobs(db: Session, video: Video, azure_service: Optional[AzureUploadService] = None) -> bool:
+    """
+    Bring the source of `video` and the stored files derived from it back to the hot tier,
+    e.g. after a user played or exported it. Returns whether the source is readable.
+    """
+    azure_service = azure_service or AzureUploadService()
+    files = db.execute(
+        select(FileStorage).where(
+            FileStorage.entity_type == EntityType.VIDEO,
+            FileStorage.entity_id == video.id,
+            FileStorage.access_tier != StorageTier.HOT,
+            FileStorage.is_deleted.is_(False),
+        )
+    ).scalars().all()
+    for file_record in files:
+        file_record.access_tier, _ = _promote(azure_service, file_record.file_path, file_record.access_tier)
+        db.add(file_record)
+    return record_video_access(db, video, azure_service)
+
+
+async def record_video_reads(db: AsyncSession, video_ids: Iterable[int]) -> List[int]:
+    """
+    Mark videos and their stored files as read by a user now, so tiering keeps them hot.
+    Returns the ids of videos with a source or file that was already moved to a cooler tier
+    (the caller queues promote_video_blobs for them). Commits.
+    """
+    video_ids = list(set(video_ids))
+    if not video_ids:
+        return []
+    now = datetime.now(timezone.utc)
+    await db.execute(update(Video).where(Video.id.in_(video_ids)).values(last_accessed_at=now))
+    video_files = (FileStorage.entity_type == EntityType.VIDEO) & FileStorage.entity_id.in_(video_ids)
+    await db.execute(update(FileStorage).where(video_files).values(last_accessed_at=now))
+    cold = await db.execute(
+        select(Video.id).where(Video.id.in_(video_ids), Video.access_tier != StorageTier.HOT)
+        .union(select(FileStorage.entity_id).where(video_files, FileStorage.access_tier != StorageTier.HOT))
+    )
+    await db.commit()
+    return sorted(cold.scalars().all())
+
+
+def _move_cold_rows(
+    db: Session,
+    azure_service: AzureUploadService,
+    model: Any,
+    path_column: Any,
+    extra_filters: list,
+    from_tier: StorageTier,
+    to_tier: StorageTier,
+    cutoff: datetime,
+    batch_size: int,
+) -> int:
+    last_access = func.coalesce(model.last_accessed_at, model.created_at)
+    moved_total = 0
+    last_id = 0
+    while True:
+        rows = db.execute(
+            select(model.id, path_column)
+            .where(
+                model.access_tier == from_tier,
+                last_access < cutoff,
+                path_column.is_not(None),
+                model.id > last_id,
+                *extra_filters,
+            )
+            .order_by(model.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1][0]
+
+        ids_by_path = {path: row_id for row_id, path in rows}
+        moved_paths = azure_service.set_blob_tiers(ids_by_path.keys(), to_tier.value)
+        if moved_paths:
+            db.execute(
+                update(model)
+                .where(model.id.in_([ids_by_path[path] for path in moved_paths]))
+                .values(access_tier=to_tier)
+            )
+            db.commit()
+        moved_total += len(moved_paths)
+
+        if len(rows) < batch_size:
+            break
+    return moved_total
+
+
+def _settle_rehydrated(db: Session, azure_service: AzureUploadService, model: Any, path_column: Any, batch_size: int) -> int:
+    """Mark rows whose archived blob has finished rehydrating as hot again."""
+    settled = 0
+    last_id = 0
+    while True:
+        rows = db.execute(
+            select(model.id, path_column)
+            .where(model.access_tier == StorageTier.REHYDRATING, model.id > last_id)
+            .order_by(model.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1][0]
+        done = [row_id for row_id, path in rows if not azure_service.is_rehydrating(path)]
+        if done:
+            db.execute(update(model).where(model.id.in_(done)).values(access_tier=StorageTier.HOT))
+            db.commit()
+        settled += len(done)
+        if len(rows) < batch_size:
+            break
+    return settled
+
+
+def tier_cold_blobs(db: Session, batch_size: Optional[int] = None) -> Dict[str, int]:
+    """
+    Move source videos and stored files nobody has read recently to cheaper tiers, in batches,
+    after marking the ones that finished rehydrating as hot. Returns how many blobs moved per transition.
+    """
+    batch_size = batch_size or settings.STORAGE_TIERING_BATCH_SIZE
+    azure_service = AzureUploadService()
+    now = datetime.now(timezone.utc)
+
+    transitions = [(StorageTier.HOT, StorageTier.COOL, settings.STORAGE_COOL_AFTER_DAYS)]
+    if settings.STORAGE_ARCHIVE_AFTER_DAYS > 0:
+        transitions.append((StorageTier.COOL, StorageTier.ARCHIVE, settings.STORAGE_ARCHIVE_AFTER_DAYS))
+
+    targets = [
+        (Video, Video.azure_file_path, [Video.status == VideoStatus.READY]),
+        (FileStorage, FileStorage.file_path, [FileStorage.is_deleted.is_(False), FileStorage.is_temporary.is_(False)]),
+    ]
+
+    summary: Dict[str, int] = {
+        "rehydrated": sum(
+            _settle_rehydrated(db, azure_service, model, path_column, batch_size) for model, path_column, _ in targets
+        )
+    }
+    for from_tier, to_tier, after_days in transitions:
+        cutoff = now - timedelta(days=after_days)
+        moved = 0
+        for model, path_column, extra_filters in targets:
+            moved += _move_cold_rows(
+                db, azure_service, model, path_column, extra_filters, from_tier, to_tier, cutoff, batch_size
+            )
+        summary[f"{from_tier.value.lower()}_to_{to_tier.value.lower()}"] = moved
+        logger.info(f"Moved {moved} blobs from {from_tier.value} to {to_tier.value}")
+    return summary
@@ -0,0 +1,124 @@
+import json
+import logging
+import re
+from typing import Any, Dict, List, Mapping, Optional, Sequence
+
+import requests
+
+from app.config import settings
+from app.services.transcription import Word
+
+logger = logging.getLogger(__name__)
+
+# formats we can parse, best first; json3 carries per-word offsets for YouTube captions
+SUBTITLE_FORMATS = ("json3", "vtt", "srt")
+
+_CUE_TIME = re.compile(r"(?:(\d+):)?(\d{1,2}):(\d{2})[.,](\d{3})")
+_TAG = re.compile(r"<[^>]*>")
+
+
+def select_subtitle_track(
+    info: Mapping[str, Any],
+    languages: Optional[Sequence[str]] = None,
+    allow_automatic: Optional[bool] = None,
+) -> Optional[Dict[str, Any]]:
+    """
+    Pick the caption track to reuse from yt-dlp info: creator-uploaded subtitles first, then
+    (if allowed) automatic captions, in the video's own language or the preferred languages.
+    Returns {"url", "ext", "language", "automatic"} or None.
+    """
+    languages = list(languages or settings.SUBTITLE_LANGUAGES)
+    allow_automatic = settings.SUBTITLE_USE_AUTOMATIC if allow_automatic is None else allow_automatic
+    if info.get("language"):
+        languages.insert(0, info["language"])
+
+    sources = [("subtitles", False)] + ([("automatic_captions", True)] if allow_automatic else [])
+    for key, automatic in sources:
+        tracks = info.get(key) or {}
+        for language in languages:
+            # yt-dlp keys look like "en", "en-US" or "en-orig"
+            matches = [lang for lang in tracks if lang == language or lang.split("-")[0] == language]
+            for lang in sorted(matches, key=lambda lang: lang != language):
+                by_ext = {fmt.get("ext"): fmt for fmt in tracks[lang] if fmt.get("url")}
+                for ext in SUBTITLE_FORMATS:
+                    if ext in by_ext:
+                        return {"url": by_ext[ext]["url"], "ext": ext, "language": lang, "automatic": automatic}
+    return None
+
+
+def _spread_words(text: str, start: float, end: float) -> List[Word]:
+    """Give each word of a cue a share of its duration proportional to the word's length."""
+    tokens = text.split()
+    if not tokens:
+        return []
+    total = sum(len(token) for token in tokens)
+    words, cursor = [], start
+    for token in tokens:
+        length = (end - start) * len(token) / total
+        words.append({"word": token, "start": round(cursor, 3), "end": round(cursor + length, 3)})
+        cursor += length
+    return words
+
+
+def parse_json3(raw: str) -> List[Word]:
+    """YouTube json3 captions: events with segments, each segment optionally offset in ms."""
+    words: List[Word] = []
+    for event in json.loads(raw).get("events", []):
+        segs = [seg for seg in event.get("segs") or [] if seg.get("utf8", "").strip()]
+        if not segs:
+            continue
+        start = event.get("tStartMs", 0) / 1000
+        end = start + event.get("dDurationMs", 0) / 1000
+        if len(segs) == 1 and "tOffsetMs" not in segs[0]:
+            words += _spread_words(segs[0]["utf8"], start, end)
+            continue
+        offsets = [start + seg.get("tOffsetMs", 0) / 1000 for seg in segs]
+        for seg, seg_start, seg_end in zip(segs, offsets, offsets[1:] + [end]):
+            words += _spread_words(seg["utf8"], seg_start, max(seg_end, seg_start))
+    return words
+
+
+def _cue_seconds(match: re.Match) -> float:
+    hours, minutes, seconds, millis = match.groups()
+    return int(hours or 0) * 3600 + int(minutes) * 60 + int(seconds) + int(millis) / 1000
+
+
+def parse_cues(raw: str) -> List[Word]:
+    """WebVTT or SRT: timing lines ("00:00:01.000 --> 00:00:03.500") followed by cue text."""
+    words: List[Word] = []
+    lines = raw.replace("\r\n", "\n").split("\n")
+    previous_line = None
+    i = 0
+    while i < len(lines):
+        if "-->" not in lines[i]:
+            i += 1
+            continue
+        times = list(_CUE_TIME.finditer(lines[i]))
+        i += 1
+        text = []
+        while i < len(lines) and lines[i].strip():
+            text.append(_TAG.sub("", lines[i]).strip())
+            i += 1
+        text = [line for line in text if line]
+        if not text or len(times) < 2:
+            continue
+        last_line = text[-1]
+        # rolling captions repeat the previous cue's last line at the top of the next one
+        if previous_line is not None and text[0] == previous_line:
+            text = text[1:]
+        previous_line = last_line
+        words += _spread_words(" ".join(text), _cue_seconds(times[0]), _cue_seconds(times[1]))
+    return words
+
+
+def parse_subtitles(raw: str, ext: str) -> List[Word]:
+    """Normalize a caption file into our word-timing transcript format."""
+    words = parse_json3(raw) if ext == "json3" else parse_cues(raw)
+    return sorted(words, key=lambda word: float(word["start"]))
+
+
+def fetch_subtitle_words(track: Dict[str, Any]) -> List[Word]:
+    """Download a track picked by `select_subtitle_track` and parse it."""
+    response = requests.get(track["url"], timeout=settings.SUBTITLE_FETCH_TIMEOUT_SECONDS)
+    response.raise_for_status()
+    return parse_subtitles(response.text, track["ext"])
@@ -0,0 +1,280 @@
+import logging
+import subprocess
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import requests
+
+from app.config import settings
+from app.services.array_sidecar import load_arrays, save_arrays
+from app.services.azure_storage import AzureUploadService, derived_blob_name
+
+logger = logging.getLogger(__name__)
+
+TRANSCRIPT_NAME = "transcript.npz"
+
+# a word is {"word": str, "start": seconds, "end": seconds}, times relative to the whole video
+Word = Dict[str, Any]
+
+
+class TranscriptionBackend(ABC):
+    """Turns a short audio clip into timed words. Times are relative to the start of the clip."""
+
+    name = "base"
+
+    @abstractmethod
+    def transcribe(self, audio: bytes, duration: float, language: Optional[str] = None) -> List[Word]:
+        pass
+
+
+class FakeTranscriptionBackend(TranscriptionBackend):
+    """
+    Deterministic stand-in engine for tests and local development: one word every
+    `word_seconds`, named after its absolute position so stitching can be checked.
+    """
+
+    name = "fake"
+
+    def __init__(self, word_seconds: float = 0.5):
+        self.word_seconds = word_seconds
+
+    def transcribe(self, audio: bytes, duration: float, language: Optional[str] = None) -> List[Word]:
+        count = int(duration / self.word_seconds)
+        return [
+            {
+                "word": f"w{i}",
+                "start": round(i * self.word_seconds, 3),
+                "end": round(i * self.word_seconds + self.word_seconds * 0.8, 3),
+            }
+            for i in range(count)
+        ]
+
+
+class WhisperApiBackend(TranscriptionBackend):
+    """OpenAI-compatible `/audio/transcriptions` endpoint with word-level timestamps."""
+
+    name = "whisper_api"
+
+    def __init__(self, base_url: Optional[str] = None, api_key: Optional[str] = None, model: Optional[str] = None):
+        self.base_url = (base_url or settings.TRANSCRIPTION_API_URL).rstrip("/")
+        self.api_key = api_key or settings.TRANSCRIPTION_API_KEY
+        self.model = model or settings.TRANSCRIPTION_MODEL
+        self.session = requests.Session()
+
+    def transcribe(self, audio: bytes, duration: float, language: Optional[str] = None) -> List[Word]:
+        data = {
+            "model": self.model,
+            "response_format": "verbose_json",
+            "timestamp_granularities[]": "word",
+        }
+        if language:
+            data["language"] = language
+        response = self.session.post(
+            f"{self.base_url}/audio/transcriptions",
+            headers={"Authorization": f"Bearer {self.api_key}"},
+            data=data,
+            files={"file": ("segment.flac", audio, "audio/flac")},
+            timeout=settings.TRANSCRIPTION_TIMEOUT_SECONDS,
+        )
+        response.raise_for_status()
+        return [
+            {"word": word["word"].strip(), "start": float(word["start"]), "end": float(word["end"])}
+            for word in response.json().get("words", [])
+        ]
+
+
+TRANSCRIPTION_BACKENDS = {
+    FakeTranscriptionBackend.name: FakeTranscriptionBackend,
+    WhisperApiBackend.name: WhisperApiBackend,
+}
+
+
+def get_transcription_backend(name: Optional[str] = None) -> Optional[TranscriptionBackend]:
+    """The configured backend, or None when transcription is disabled."""
+    name = name or settings.TRANSCRIPTION_BACKEND
+    if not name or name == "none":
+        return None
+    if name not in TRANSCRIPTION_BACKENDS:
+        raise ValueError(f"Unknown transcription backend: {name}")
+    return TRANSCRIPTION_BACKENDS[name]()
+
+
+def plan_segments(
+    duration: float,
+    envelope: Optional[np.ndarray] = None,
+    rate_hz: Optional[int] = None,
+    target_seconds: Optional[float] = None,
+    search_seconds: Optional[float] = None,
+) -> List[Tuple[float, float]]:
+    """
+    Split `duration` seconds into segments of about `target_seconds`, cutting each one in the
+    quietest half second within `search_seconds` of its target boundary so words are not split.
+    Without a loudness envelope the cuts fall on the fixed grid.
+    """
+    rate_hz = rate_hz or settings.LOUDNESS_ENVELOPE_HZ
+    target = target_seconds or settings.TRANSCRIPTION_SEGMENT_SECONDS
+    search = min(search_seconds or settings.TRANSCRIPTION_SEGMENT_SEARCH_SECONDS, target / 2)
+
+    smooth = None
+    window = max(1, rate_hz // 2)
+    if envelope is not None and len(envelope) > window:
+        sums = np.concatenate(([0.0], np.cumsum(np.asarray(envelope, dtype=np.float64))))
+        smooth = (sums[window:] - sums[:-window]) / window
+
+    boundaries = [0.0]
+    while duration - boundaries[-1] > target + search:
+        cut = boundaries[-1] + target
+        if smooth is not None:
+            lo = int((cut - search) * rate_hz)
+            hi = min(int((cut + search) * rate_hz), len(smooth))
+            if hi > lo:
+                cut = (lo + int(np.argmin(smooth[lo:hi])) + window / 2) / rate_hz
+        boundaries.append(round(cut, 3))
+    boundaries.append(float(duration))
+    return list(zip(boundaries[:-1], boundaries[1:]))
+
+
+def extract_segment_audio(source_url: str, start: float, end: float, timeout: Optional[int] = None) -> bytes:
+    """
+    Cut `start`..`end` out of the media at `source_url` as 16 kHz mono FLAC. Seeking happens on
+    the input, so only the byte ranges of the segment are fetched from the blob.
+    """
+    cmd = [
+        settings.FFMPEG_PATH,
+        "-nostdin",
+        "-v", "error",
+        "-ss", str(start),
+        "-t", str(end - start),
+        "-i", source_url,
+        "-vn",
+        "-ac", "1",
+        "-ar", "16000",
+        "-c:a", "flac",
+        "-f", "flac",
+        "pipe:1",
+    ]
+    result = subprocess.run(cmd, capture_output=True, timeout=timeout or settings.TRANSCRIPTION_TIMEOUT_SECONDS)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed with return code {result.returncode}: {result.stderr.decode('utf-8', errors='ignore')[:500]}")
+    return result.stdout
+
+
+def transcribe_segment_audio(
+    backend: TranscriptionBackend,
+    source_url: str,
+    start: float,
+    end: float,
+    language: Optional[str] = None,
+) -> List[Word]:
+    """Transcribe one segment and shift its word timings to video time."""
+    audio = extract_segment_audio(source_url, start, end)
+    words = backend.transcribe(audio, end - start, language)
+    return [
+        {"word": word["word"], "start": round(start + float(word["start"]), 3), "end": round(start + float(word["end"]), 3)}
+        for word in words
+        if word["word"]
+    ]
+
+
+def stitch_segments(segments: Sequence[Tuple[int, List[Word]]]) -> List[Word]:
+    """
+    Join per-segment word lists in segment order. A word that starts before the previous one
+    ended was heard by both neighbouring segments and is only kept once.
+    """
+    words: List[Word] = []
+    for _, segment_words in sorted(segments, key=lambda item: item[0]):
+        for word in segment_words:
+            if words and float(word["start"]) < float(words[-1]["end"]) - 0.05:
+                continue
+            words.append(word)
+    return words
+
+
+class Transcript:
+    """
+    Word-timed transcript of a video in columnar form.
+
+    Word i runs from starts[i] to ends[i] (milliseconds, sorted by start) and reads
+    vocab[tokens[i]]; each distinct word is stored once in the token table. Clips keep a
+    (first, last) index range into this instead of a copy of their words.
+    """
+
+    def __init__(self, starts: np.ndarray, ends: np.ndarray, tokens: np.ndarray, vocab: Sequence[str]):
+        self.starts = starts
+        self.ends = ends
+        self.tokens = tokens
+        self.vocab = list(vocab)
+
+    @classmethod
+    def from_words(cls, words: Sequence[Word]) -> "Transcript":
+        words = sorted(words, key=lambda word: float(word["start"]))
+        ids: Dict[str, int] = {}
+        tokens = np.fromiter((ids.setdefault(str(word["word"]), len(ids)) for word in words), dtype=np.int32, count=len(words))
+        starts = np.fromiter((round(float(word["start"]) * 1000) for word in words), dtype=np.uint32, count=len(words))
+        ends = np.fromiter((round(float(word["end"]) * 1000) for word in words), dtype=np.uint32, count=len(words))
+        return cls(starts, np.maximum(ends, starts), tokens, list(ids))
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        encoded = [token.encode("utf-8") for token in self.vocab]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.uint32)
+        np.cumsum([len(token) for token in encoded], out=offsets[1:])
+        return {
+            "start_ms": self.starts,
+            "end_ms": self.ends,
+            "token": self.tokens,
+            "vocab": np.frombuffer(b"".join(encoded), dtype=np.uint8),
+            "vocab_offsets": offsets,
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray]) -> "Transcript":
+        blob = arrays["vocab"].tobytes()
+        offsets = arrays["vocab_offsets"].tolist()
+        vocab = [blob[a:b].decode("utf-8") for a, b in zip(offsets, offsets[1:])]
+        return cls(arrays["start_ms"], arrays["end_ms"], arrays["token"], vocab)
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def start_seconds(self) -> np.ndarray:
+        return self.starts / 1000.0
+
+    def range_for(self, start: float, end: float) -> Tuple[int, int]:
+        """Index range [first, last) of the words starting in `start`..`end` seconds, by binary search."""
+        first = int(np.searchsorted(self.starts, round(start * 1000), side="left"))
+        last = int(np.searchsorted(self.starts, round(end * 1000), side="left"))
+        return first, max(first, last)
+
+    def words(self, first: int, last: int) -> List[Word]:
+        return [
+            {"word": self.vocab[token], "start": start / 1000, "end": end / 1000}
+            for token, start, end in zip(
+                self.tokens[first:last].tolist(), self.starts[first:last].tolist(), self.ends[first:last].tolist()
+            )
+        ]
+
+    def text(self, first: int, last: int) -> str:
+        return " ".join(self.vocab[token] for token in self.tokens[first:last].tolist())
+
+
+def speech_activity(starts: np.ndarray, duration: float, rate_hz: Optional[int] = None) -> np.ndarray:
+    """Words starting in each 1/`rate_hz` second bucket (`starts` in seconds), aligned with the loudness envelope."""
+    rate_hz = rate_hz or settings.LOUDNESS_ENVELOPE_HZ
+    size = int(np.ceil(duration * rate_hz))
+    if not len(starts) or size <= 0:
+        return np.zeros(max(size, 0), dtype=np.float32)
+    buckets = np.clip((np.asarray(starts, dtype=np.float64) * rate_hz).astype(np.int64), 0, size - 1)
+    return np.bincount(buckets, minlength=size).astype(np.float32)
+
+
+def save_transcript(source_path: str, words: List[Word], azure_service: Optional[AzureUploadService] = None) -> Tuple[str, int]:
+    """Store the transcript of `source_path` next to it. Returns (blob path, size in bytes)."""
+    path = derived_blob_name(source_path, TRANSCRIPT_NAME)
+    return path, save_arrays(path, Transcript.from_words(words).to_arrays(), azure_service)
+
+
+def load_transcript(source_path: str, azure_service: Optional[AzureUploadService] = None) -> Optional[Transcript]:
+    """The stored transcript of `source_path`, or None if it was never transcribed."""
+    arrays = load_arrays(derived_blob_name(source_path, TRANSCRIPT_NAME), azure_service)
+    return None if arrays is None else Transcript.from_arrays(arrays)
@@ -1,7 +1,12 @@
-from typing import Any, Optional
+from datetime import datetime, timezone
+from typing import Any, List, Optional
+from sqlalchemy.orm import Session
 from app.db.database import SessionLocal
+from app.models.file_storage import FileStorage
 from app.models.video import Video
-from app.models.enums import VideoStatus, VideoSource  # Import if needed
+from app.models.enums import EntityType, FileType, VideoStatus, VideoSource  # Import if needed
+from app.services.azure_storage import AzureUploadService
+from app.services.transcription import Word, save_transcript
 
 def add_video_info_to_db(
     user_id: str,
@@ -20,11 +25,51 @@ def add_video_info_to_db(
             file_extension=metadata.get('file_extension'),
             azure_file_path=metadata.get('azure_file_path'),
             azure_video_url=metadata.get('azure_video_url'),
-            status=metadata.get('status', VideoStatus.PENDING_UPLOAD)
+            status=metadata.get('status', VideoStatus.PENDING_UPLOAD),
+            last_accessed_at=datetime.now(timezone.utc),
         )
         db.add(video)
         db.commit()
         db.refresh(video)
         return video
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+def save_video_asset(
+    db: Session,
+    video: Video,
+    file_path: str,
+    file_type: FileType,
+    mime_type: str,
+    file_size: int,
+    storage_bucket: Optional[str] = None,
+) -> FileStorage:
+    """Create or refresh the FileStorage row of an asset derived from `video` (caller commits)."""
+    file_record = db.query(FileStorage).filter(FileStorage.file_path == file_path).one_or_none() or FileStorage(
+        file_path=file_path,
+        file_name=file_path.rsplit("/", 1)[-1],
+        file_type=file_type,
+        storage_provider="azure",
+        entity_type=EntityType.VIDEO,
+        entity_id=video.id,
+    )
+    file_record.mime_type = mime_type
+    file_record.file_size = file_size
+    file_record.storage_bucket = storage_bucket
+    db.add(file_record)
+    return file_record
+
+
+def save_video_transcript(
+    db: Session,
+    video: Video,
+    words: List[Word],
+    azure_service: Optional[AzureUploadService] = None,
+) -> FileStorage:
+    """Store the word-timed transcript of `video` and its FileStorage row (caller commits)."""
+    if not video.azure_file_path:
+        raise ValueError(f"Video {video.id} has no stored source")
+    azure_service = azure_service or AzureUploadService()
+    path, size = save_transcript(video.azure_file_path, words, azure_service)
+    bucket = azure_service.router.shard_for_blob(path).container_name
+    return save_video_asset(db, video, path, FileType.TRANSCRIPT, "application/octet-stream", size, bucket)
@@ -1,11 +1,16 @@
 import subprocess
-import base64
 import uuid
 import time
 from datetime import datetime, timedelta
 from typing import Any, Dict, Optional, Callable, List, cast
 import logging
-from app.services.azure_storage import AzureUploadService
+from app.services.azure_storage import AzureUploadService, make_block_id
+from app.services.bandwidth_limiter import node_bandwidth_limiter
+from app.services.memory_budget import NodeMemoryBudget, node_memory_budget
+from app.services.subtitles import select_subtitle_track
+from app.services.ytdlp_executor import WarmDownloadProcess
+from app.config import settings
+from app.models.enums import UserPlan
 from yt_dlp import YoutubeDL
 import threading
 
@@ -18,9 +23,10 @@ class StreamingVideoService:
     downloads directly into Azure Blob Storage in block-chunks without using local disk.
     """
 
-    def __init__(self) -> None:
+    def __init__(self, memory_budget: Optional[NodeMemoryBudget] = None) -> None:
         self.azure_service = AzureUploadService()
         self.chunk_size: int = 4 * 1024 * 1024
+        self.memory_budget = memory_budget or node_memory_budget
 
     def extract_video_info(self, url: str) -> Dict[str, Any]:
         """
@@ -46,6 +52,8 @@ class StreamingVideoService:
                     'thumbnail_url': info.get('thumbnail'),
                     'description': (info.get('description') or '')[:500],
                     'file_extension': info.get('ext', 'mp4'),
+                    # creator captions (or auto captions, if enabled) to use instead of transcribing
+                    'subtitle_track': select_subtitle_track(info),
                 }
             except Exception as e:
                 raise RuntimeError("Failed to extract video info") from e
@@ -53,37 +61,38 @@ class StreamingVideoService:
     def generate_blob_name(self, video_info: Dict[str, Any], custom_file_name: Optional[str] = None) -> str:
         """
         Generate a reasonably unique blob name based on video metadata.
+        The name is prefixed with a hash so imports spread across storage partitions and shards.
         """
         ext = video_info.get('ext', 'mp4')
         if custom_file_name:
-            return f"{custom_file_name}.{ext}"
+            return self.azure_service.router.make_blob_name(f"{custom_file_name}.{ext}")
 
         title = (video_info.get('title') or 'video').replace(' ', '_')
         unique_id = video_info.get('id') or str(uuid.uuid4())
         timestamp = datetime.utcnow().strftime('%Y%m%d%H%M%S')
-        return f"{title}_{unique_id}_{timestamp}.{ext}"
+        return self.azure_service.router.make_blob_name(f"{title}_{unique_id}_{timestamp}.{ext}")
 
     def _make_block_id(self, counter: int) -> str:
-        # Azure expects base64-encoded block IDs; keep them fixed-width for ordering.
-        return base64.b64encode(f"{counter:010d}".encode()).decode()
+        return make_block_id(counter)
 
     def stream_download_to_azure(
         self,
         url: str,
         blob_name: str,
         progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+        throttle: Optional[Callable[[int], Any]] = None,
     ) -> str:
         """
         Stream a video from `url` using yt-dlp and upload directly to Azure Blob Storage
         in blocks without writing to local disk.
+
+        `throttle(nbytes)` is called before each chunk is staged and may block to keep
+        the import inside the node bandwidth budget.
         """
         if not url or not blob_name:
             raise ValueError("URL and blob name must be provided")
 
-        blob_client = self.azure_service.blob_service.get_blob_client(
-            container=self.azure_service.container_name,
-            blob=blob_name,
-        )
+        blob_client = self.azure_service.get_blob_client(blob_name)
 
         block_list: List[str] = []
         block_id_counter = 0
@@ -103,12 +112,16 @@ class StreamingVideoService:
             url,
         ]
 
-        process = None
+        process: Any = None
         try:
             if progress_callback:
                 progress_callback({"current_step": "starting_download", "progress_percentage": 5})
 
-            process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, bufsize=0)
+            if settings.YTDLP_WARM_EXECUTOR:
+                # fork from the yt-dlp forkserver, which already has the extractors loaded
+                process = WarmDownloadProcess(cmd[1:])
+            else:
+                process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, bufsize=0)
 
             if progress_callback:
                 progress_callback({"current_step": "streaming_to_azure", "progress_percentage": 10})
@@ -117,33 +130,39 @@ class StreamingVideoService:
                 raise RuntimeError("yt-dlp subprocess stdout unavailable")
 
             while True:
-                chunk = process.stdout.read(self.chunk_size)
-                if not chunk:
-                    break
-
-                block_id = self._make_block_id(block_id_counter)
-
-                # Try to stage the block with a small retry loop for transient failures.
-                for attempt in range(1, MAX_STAGE_RETRIES + 1):
-                    try:
-                        # stage_block typically accepts (block_id, data)
-                        blob_client.stage_block(block_id, chunk)
+                # Reserve the chunk from the node memory budget before reading it. When the
+                # budget is exhausted this blocks, which leaves yt-dlp blocked on a full pipe.
+                with self.memory_budget.reserve(self.chunk_size):
+                    chunk = process.stdout.read(self.chunk_size)
+                    if not chunk:
                         break
-                    except Exception as e:
-                        if attempt < MAX_STAGE_RETRIES:
-                            time.sleep(RETRY_BACKOFF ** (attempt - 1))
-                            continue
-                        else:
-                            # stop the child process and re-raise with context
-                            try:
-                                process.terminate()
-                            except Exception:
-                                pass
-                            raise RuntimeError("Failed to upload chunk to Azure after retries") from e
-
-                block_list.append(block_id)
-                block_id_counter += 1
-                total_uploaded += len(chunk)
+
+                    if throttle:
+                        throttle(len(chunk))
+
+                    block_id = self._make_block_id(block_id_counter)
+
+                    # Try to stage the block with a small retry loop for transient failures.
+                    for attempt in range(1, MAX_STAGE_RETRIES + 1):
+                        try:
+                            # stage_block typically accepts (block_id, data)
+                            blob_client.stage_block(block_id, chunk)
+                            break
+                        except Exception as e:
+                            if attempt < MAX_STAGE_RETRIES:
+                                time.sleep(RETRY_BACKOFF ** (attempt - 1))
+                                continue
+                            else:
+                                # stop the child process and re-raise with context
+                                try:
+                                    process.terminate()
+                                except Exception:
+                                    pass
+                                raise RuntimeError("Failed to upload chunk to Azure after retries") from e
+
+                    block_list.append(block_id)
+                    block_id_counter += 1
+                    total_uploaded += len(chunk)
 
                 if progress_callback:
                     # Heuristic progress (we don't know total size)
@@ -224,10 +243,12 @@ class ConcurrentStreamingVideoService:
         task_id: str,
         url: str,
         blob_name: str,
-        progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None
+        progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+        plan: Optional[UserPlan] = None,
     ) -> str:
         """
         Stream a video with concurrency control.
+        Bandwidth is shared with the other imports on this node, weighted by `plan`.
         """
         if not url or not blob_name:
             raise ValueError("URL and blob name must be provided")
@@ -251,9 +272,10 @@ class ConcurrentStreamingVideoService:
             }
 
             streaming_service = StreamingVideoService()
-            result = streaming_service.stream_download_to_azure(
-                url, blob_name, progress_wrapper if progress_callback else None
-            )
+            with node_bandwidth_limiter.share(task_id, plan) as throttle:
+                result = streaming_service.stream_download_to_azure(
+                    url, blob_name, progress_wrapper if progress_callback else None, throttle=throttle
+                )
 
             self.active_uploads[task_id]['status'] = "completed"
 
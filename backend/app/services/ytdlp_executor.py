@@ -0,0 +1,154 @@
+import io
+import logging
+import multiprocessing
+import os
+import signal
+import subprocess
+import sys
+import time
+from multiprocessing import reduction
+from multiprocessing.context import ForkServerContext, SpawnContext
+from typing import List, Optional, Union, cast
+
+import yt_dlp
+
+logger = logging.getLogger(__name__)
+
+# The forkserver imports these once; every download is forked from it with yt-dlp and its
+# extractor registry already loaded, but without any of the worker's threads or state.
+_PRELOAD = ["yt_dlp", "yt_dlp.extractor.extractors", __name__]
+_context: Optional[Union[ForkServerContext, SpawnContext]] = None
+
+
+def _get_context() -> Union[ForkServerContext, SpawnContext]:
+    global _context
+    if _context is None:
+        if "forkserver" in multiprocessing.get_all_start_methods():
+            forkserver_context = multiprocessing.get_context("forkserver")
+            forkserver_context.set_forkserver_preload(_PRELOAD)
+            _context = forkserver_context
+        else:
+            _context = multiprocessing.get_context("spawn")
+    return _context
+
+
+def warm_up() -> None:
+    """
+    Start the forkserver now, so the first download doesn't wait for yt-dlp and its
+    extractors to load. Safe to call more than once.
+    """
+    context = _get_context()
+    if context.get_start_method() != "forkserver":
+        return
+    started = time.monotonic()
+    from multiprocessing import forkserver
+    forkserver.ensure_running()
+    logger.info(f"yt-dlp forkserver started in {time.monotonic() - started:.2f}s")
+
+
+class _ChildFd:
+    """A file descriptor handed to the child when it is started (duplicated, not inherited)."""
+
+    def __init__(self, fd: int):
+        self.fd = fd
+
+    def __int__(self) -> int:
+        # a fork start passes the object itself, with the fd inherited as is
+        return self.fd
+
+    def __reduce__(self):
+        return _ChildFd._detach, (reduction.DupFd(self.fd),)
+
+    @staticmethod
+    def _detach(dup) -> int:
+        return dup.detach()
+
+
+def _run_yt_dlp(argv: List[str]) -> int:
+    try:
+        yt_dlp.main(argv)
+    except SystemExit as e:
+        if e.code is None:
+            return 0
+        return e.code if isinstance(e.code, int) else 1
+    return 0
+
+
+def _child_main(argv: List[str], stdout_fd: int, stderr_fd: int) -> None:
+    stdout_fd, stderr_fd = int(stdout_fd), int(stderr_fd)
+    os.dup2(stdout_fd, 1)
+    os.dup2(stderr_fd, 2)
+    os.close(stdout_fd)
+    os.close(stderr_fd)
+    # whatever sys.stdout was (Celery swaps in a LoggingProxy without .buffer or fileno),
+    # yt-dlp writes `--output -` to sys.stdout.buffer, so point both streams at the pipes
+    sys.stdout = io.TextIOWrapper(os.fdopen(1, "wb"), encoding="utf-8", errors="replace", line_buffering=True)
+    sys.stderr = io.TextIOWrapper(os.fdopen(2, "wb"), encoding="utf-8", errors="replace", line_buffering=True)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    code = _run_yt_dlp(argv)
+    sys.stdout.flush()
+    sys.stderr.flush()
+    sys.exit(code)
+
+
+class WarmDownloadProcess:
+    """
+    Popen-like handle to a yt-dlp download running in a child of the yt-dlp forkserver.
+    The child starts with the interpreter and extractor registry already loaded, so it
+    skips the start-up and imports a `yt-dlp` subprocess pays.
+
+    `argv` are the yt-dlp command line arguments without the program name. Output written
+    to stdout (`--output -`) is available on `stdout` exactly as with subprocess.PIPE.
+    """
+
+    def __init__(self, argv: List[str]):
+        self.args = argv
+        stdout_r, stdout_w = os.pipe()
+        stderr_r, stderr_w = os.pipe()
+        try:
+            self._process = _get_context().Process(
+                target=_child_main,
+                args=(argv, _ChildFd(stdout_w), _ChildFd(stderr_w)),
+                name="yt-dlp",
+            )
+            self._process.start()
+        except BaseException:
+            os.close(stdout_r)
+            os.close(stderr_r)
+            raise
+        finally:
+            # the child has its own copies; ours must be closed for reads to see EOF
+            os.close(stdout_w)
+            os.close(stderr_w)
+
+        # set once the process has started
+        self.pid = cast(int, self._process.pid)
+        self.stdout = os.fdopen(stdout_r, "rb")
+        self.stderr = os.fdopen(stderr_r, "rb")
+
+    @property
+    def returncode(self) -> Optional[int]:
+        return self._process.exitcode
+
+    def poll(self) -> Optional[int]:
+        return self._process.exitcode
+
+    def wait(self, timeout: Optional[float] = None) -> int:
+        self._process.join(timeout)
+        if self._process.exitcode is None:
+            # join() only returns early when given a timeout
+            raise subprocess.TimeoutExpired(["yt-dlp", *self.args], timeout or 0)
+        return self._process.exitcode
+
+    def send_signal(self, sig: int) -> None:
+        if self._process.exitcode is None:
+            try:
+                os.kill(self.pid, sig)
+            except ProcessLookupError:
+                pass
+
+    def terminate(self) -> None:
+        self.send_signal(signal.SIGTERM)
+
+    def kill(self) -> None:
+        self.send_signal(signal.SIGKILL)
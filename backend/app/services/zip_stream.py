@@ -0,0 +1,172 @@
+import struct
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Iterable, Iterator, List, Optional
+
+from app.services.azure_storage import AzureUploadService
+
+# sizes and offsets at or above this need the ZIP64 fields
+ZIP64_LIMIT = 0xFFFFFFFF
+ZIP64_COUNT_LIMIT = 0xFFFF
+
+# general purpose flags: bit 3 = sizes and CRC follow the data, bit 11 = UTF-8 names
+FLAGS = 0x0808
+VERSION_ZIP64 = 45
+VERSION_DEFAULT = 20
+
+
+@dataclass
+class ZipEntry:
+    """A file to stream into the archive; `size` is a hint that picks 32- or 64-bit fields up front."""
+
+    name: str
+    chunks: Iterable[bytes]
+    size: Optional[int] = None
+    mtime: Optional[float] = None
+
+
+@dataclass
+class _Written:
+    name: bytes
+    offset: int
+    crc: int
+    size: int
+    dos_time: int
+    dos_date: int
+    zip64: bool
+
+
+def _dos_datetime(timestamp: Optional[float]) -> tuple:
+    t = time.localtime(timestamp if timestamp is not None else time.time())
+    if t.tm_year < 1980:
+        return 0, (0 << 9) | (1 << 5) | 1
+    return (t.tm_hour << 11) | (t.tm_min << 5) | (t.tm_sec // 2), ((t.tm_year - 1980) << 9) | (t.tm_mon << 5) | t.tm_mday
+
+
+def stream_zip(entries: Iterable[ZipEntry]) -> Iterator[bytes]:
+    """
+    Yield a store-mode (uncompressed) ZIP archive of `entries` as it is built.
+
+    Each local header goes out before its data, with the CRC and sizes in a data descriptor
+    after it, so nothing is buffered beyond one chunk. Entries without a size hint, or with one
+    past 4 GiB, use ZIP64 local fields; the central directory and end records switch to ZIP64
+    when sizes, offsets or the entry count need it.
+    """
+    offset = 0
+    written: List[_Written] = []
+    for entry in entries:
+        name = entry.name.encode("utf-8")
+        zip64 = entry.size is None or entry.size >= ZIP64_LIMIT
+        dos_time, dos_date = _dos_datetime(entry.mtime)
+        extra = struct.pack("<HHQQ", 0x0001, 16, 0, 0) if zip64 else b""
+        header = struct.pack(
+            "<IHHHHHIIIHH",
+            0x04034B50,
+            VERSION_ZIP64 if zip64 else VERSION_DEFAULT,
+            FLAGS,
+            0,  # stored
+            dos_time,
+            dos_date,
+            0,  # crc, size and compressed size are in the data descriptor
+            ZIP64_LIMIT if zip64 else 0,
+            ZIP64_LIMIT if zip64 else 0,
+            len(name),
+            len(extra),
+        ) + name + extra
+        yield header
+        entry_offset = offset
+        offset += len(header)
+
+        crc = 0
+        size = 0
+        for chunk in entry.chunks:
+            if not chunk:
+                continue
+            crc = zlib.crc32(chunk, crc)
+            size += len(chunk)
+            yield chunk
+        if not zip64 and size >= ZIP64_LIMIT:
+            raise ValueError(f"{entry.name} is larger than its size hint allows without ZIP64")
+        offset += size
+
+        if zip64:
+            descriptor = struct.pack("<IIQQ", 0x08074B50, crc, size, size)
+        else:
+            descriptor = struct.pack("<IIII", 0x08074B50, crc, size, size)
+        yield descriptor
+        offset += len(descriptor)
+        written.append(_Written(name, entry_offset, crc, size, dos_time, dos_date, zip64))
+
+    cd_offset = offset
+    cd_size = 0
+    for item in written:
+        fields = []
+        # entries written with ZIP64 local fields keep them in the directory too
+        if item.zip64 or item.size >= ZIP64_LIMIT:
+            fields += [item.size, item.size]
+        if item.offset >= ZIP64_LIMIT:
+            fields.append(item.offset)
+        extra = struct.pack(f"<HH{len(fields)}Q", 0x0001, 8 * len(fields), *fields) if fields else b""
+        version = VERSION_ZIP64 if item.zip64 or fields else VERSION_DEFAULT
+        record = struct.pack(
+            "<IHHHHHHIIIHHHHHII",
+            0x02014B50,
+            version,  # made by
+            version,  # needed to extract
+            FLAGS,
+            0,
+            item.dos_time,
+            item.dos_date,
+            item.crc,
+            ZIP64_LIMIT if item.zip64 else min(item.size, ZIP64_LIMIT),
+            ZIP64_LIMIT if item.zip64 else min(item.size, ZIP64_LIMIT),
+            len(item.name),
+            len(extra),
+            0,  # comment length
+            0,  # disk number
+            0,  # internal attributes
+            0o100644 << 16,  # regular file, rw-r--r--
+            min(item.offset, ZIP64_LIMIT),
+        ) + item.name + extra
+        yield record
+        cd_size += len(record)
+
+    count = len(written)
+    if count >= ZIP64_COUNT_LIMIT or cd_offset >= ZIP64_LIMIT or cd_size >= ZIP64_LIMIT:
+        zip64_end_offset = cd_offset + cd_size
+        yield struct.pack(
+            "<IQHHIIQQQQ",
+            0x06064B50,
+            44,  # size of the rest of this record
+            VERSION_ZIP64,
+            VERSION_ZIP64,
+            0, 0,
+            count, count,
+            cd_size,
+            cd_offset,
+        )
+        yield struct.pack("<IIQI", 0x07064B50, 0, zip64_end_offset, 1)
+    yield struct.pack(
+        "<IHHHHIIH",
+        0x06054B50,
+        0, 0,
+        min(count, ZIP64_COUNT_LIMIT),
+        min(count, ZIP64_COUNT_LIMIT),
+        min(cd_size, ZIP64_LIMIT),
+        min(cd_offset, ZIP64_LIMIT),
+        0,
+    )
+
+
+def iter_blob_ranges(
+    file_path: str,
+    size: int,
+    chunk_size: int,
+    azure_service: Optional[AzureUploadService] = None,
+) -> Iterator[bytes]:
+    """Read a blob as consecutive ranged GETs, holding one chunk in memory at a time."""
+    azure_service = azure_service or AzureUploadService()
+    blob_client = azure_service.get_blob_client(file_path)
+    for offset in range(0, size, chunk_size):
+        yield blob_client.download_blob(offset=offset, length=min(chunk_size, size - offset)).readall()
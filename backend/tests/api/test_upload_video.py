@@ -0,0 +1,93 @@
+import asyncio
+from types import SimpleNamespace
+from typing import cast
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.endpoints.video import upload_video
+from app.api.endpoints.video.upload_video import generate_sas_batch
+from app.models.enums import VideoSource, VideoStatus
+from app.models.user import User
+from app.schemas.schema_upload_video import VideoBatchRequest
+
+USER = cast(User, SimpleNamespace(id=1))
+
+
+def fake_session():
+    """An async session that gives the added rows ids on commit, as a flush would."""
+    added = []
+    db = MagicMock()
+    db.add_all.side_effect = added.extend
+
+    async def commit():
+        for video_id, video in enumerate(added, start=10):
+            video.id = video_id
+
+    db.commit = AsyncMock(side_effect=commit)
+    db.refresh = AsyncMock()
+    return cast(AsyncSession, db), added
+
+
+@pytest.fixture
+def azure_service():
+    with patch.object(upload_video, "AzureUploadService") as azure:
+        azure.return_value.generate_sas_batch.side_effect = lambda names: [
+            (f"https://blob/{name}?sig", f"ab12/{name}") for name in names
+        ]
+        yield azure.return_value
+
+
+class TestGenerateSasBatch:
+    """Test cases for the batch generate-sas endpoint."""
+
+    def test_one_record_per_file_in_one_commit(self, azure_service):
+        db, added = fake_session()
+        request = VideoBatchRequest.model_validate({"files": [
+            {"file_name": "a.mp4", "file_size": 1024},
+            {"file_name": "b.mp4", "is_url": True},
+        ]})
+
+        response = asyncio.run(generate_sas_batch(request, db=db, current_user=USER))
+
+        assert response == {"uploads": [
+            {"sas_url": "https://blob/a.mp4?sig", "file_path": "ab12/a.mp4", "video_id": 10},
+            {"sas_url": "https://blob/b.mp4?sig", "file_path": "ab12/b.mp4", "video_id": 11},
+        ]}
+        azure_service.generate_sas_batch.assert_called_once_with(["a.mp4", "b.mp4"])
+        cast(AsyncMock, db.commit).assert_awaited_once()
+        cast(AsyncMock, db.refresh).assert_not_awaited()
+        assert [video.source for video in added] == [VideoSource.UPLOAD, VideoSource.URL_IMPORT]
+        assert [video.file_size_bytes for video in added] == [1024, None]
+        assert all(video.status == VideoStatus.PENDING_UPLOAD and video.user_id == 1 for video in added)
+
+    def test_block_plan_is_returned_per_file(self, azure_service):
+        db, _ = fake_session()
+        request = VideoBatchRequest.model_validate({"files": [
+            {"file_name": "a.mp4", "file_size": 64 * 1024 * 1024, "block_plan": True},
+            {"file_name": "b.mp4", "file_size": 1024},
+        ]})
+
+        with patch.object(upload_video, "build_block_plan", return_value={"block_size": 8}) as plan:
+            response = asyncio.run(generate_sas_batch(request, db=db, current_user=USER))
+
+        plan.assert_called_once_with(64 * 1024 * 1024)
+        first, second = response["uploads"]
+        assert first["block_plan"] == {"block_size": 8}
+        assert "block_plan" not in second
+
+    def test_block_plan_without_a_size_rejects_the_batch(self, azure_service):
+        db, added = fake_session()
+        request = VideoBatchRequest.model_validate({"files": [
+            {"file_name": "a.mp4", "file_size": 1024},
+            {"file_name": "b.mp4", "block_plan": True},
+        ]})
+
+        with pytest.raises(HTTPException) as error:
+            asyncio.run(generate_sas_batch(request, db=db, current_user=USER))
+
+        assert error.value.status_code == 400
+        azure_service.generate_sas_batch.assert_not_called()
+        assert added == []
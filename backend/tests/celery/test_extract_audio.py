@@ -0,0 +1,65 @@
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+from celery.exceptions import Retry
+
+from app.celery import audio_processing
+from app.celery.audio_processing import extract_audio
+from app.models.enums import FileType
+
+
+@pytest.fixture
+def slots():
+    with patch.object(audio_processing.audio_slots, "try_acquire", return_value="token") as acquire, \
+            patch.object(audio_processing.audio_slots, "release") as release:
+        yield SimpleNamespace(acquire=acquire, release=release)
+
+
+def make_video():
+    return SimpleNamespace(id=5, azure_file_path="videos/5.mp4", azure_audio_url=None)
+
+
+class TestExtractAudio:
+    """Test cases for the audio extraction task."""
+
+    def test_extracts_and_records_the_audio_asset(self, slots):
+        video = make_video()
+        db = MagicMock()
+        db.get.return_value = video
+        service = MagicMock()
+        service.extract_to_azure.return_value = 2048
+        service.azure_service.router.shard_for_blob.return_value.container_name = "videos-0"
+        service.azure_service.get_blob_url.side_effect = lambda path: f"https://blob/{path}"
+
+        with patch.object(audio_processing, "SessionLocal", return_value=db), \
+                patch.object(audio_processing, "record_video_access", return_value=True), \
+                patch.object(audio_processing, "AudioExtractionService", return_value=service), \
+                patch.object(audio_processing, "save_video_asset") as save:
+            result = extract_audio.run(5)
+
+        audio_path = "videos/5_assets/audio.aac"
+        assert result == {"video_id": 5, "audio_path": audio_path, "audio_size": 2048}
+        service.extract_to_azure.assert_called_once_with("videos/5.mp4", audio_path)
+        assert video.azure_audio_url == f"https://blob/{audio_path}"
+        save.assert_called_once_with(db, video, audio_path, FileType.AUDIO, "audio/aac", 2048, "videos-0")
+        slots.release.assert_called_once_with("token")
+        db.close.assert_called_once()
+
+    def test_busy_node_retries_without_opening_a_session(self, slots):
+        slots.acquire.return_value = None
+        with patch.object(audio_processing, "SessionLocal") as sessions, pytest.raises(Retry):
+            extract_audio.run(5)
+        sessions.assert_not_called()
+        slots.release.assert_not_called()
+
+    def test_rehydrating_source_retries_and_frees_the_slot(self, slots):
+        db = MagicMock()
+        db.get.return_value = make_video()
+        with patch.object(audio_processing, "SessionLocal", return_value=db), \
+                patch.object(audio_processing, "record_video_access", return_value=False), \
+                patch.object(audio_processing, "AudioExtractionService") as service, \
+                pytest.raises(Retry):
+            extract_audio.run(5)
+        service.assert_not_called()
+        slots.release.assert_called_once_with("token")
@@ -0,0 +1,45 @@
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from app.celery import video_processing
+from app.celery.video_processing import package_video_hls
+
+
+def run_packaging(video, probed):
+    db = MagicMock()
+    db.get.return_value = video
+    service = MagicMock()
+    service.package.return_value = SimpleNamespace(master_path="hls/master.m3u8", renditions=[], file_count=0, uploaded_bytes=0)
+    with patch.object(video_processing, "SessionLocal", return_value=db), \
+            patch.object(video_processing.hls_slots, "try_acquire", return_value="token"), \
+            patch.object(video_processing.hls_slots, "release"), \
+            patch.object(video_processing, "record_video_access", return_value=True), \
+            patch.object(video_processing, "HlsPackagingService", return_value=service), \
+            patch.object(video_processing, "probe_media", return_value=probed) as probe:
+        package_video_hls.run(video.id)
+    return service.package, probe
+
+
+def make_video(height=None):
+    return SimpleNamespace(
+        id=4, azure_file_path="videos/4.mp4", resolution_width=None, resolution_height=height,
+        duration_seconds=None, probed_at=None, hls_manifest_url=None,
+    )
+
+
+class TestPackageVideoHls:
+    """Test cases for packaging a video's HLS ladder."""
+
+    def test_unprobed_video_is_probed_before_choosing_the_ladder(self):
+        video = make_video()
+        package, probe = run_packaging(video, {"resolution_width": 854, "resolution_height": 480, "duration_seconds": 12.0})
+
+        probe.assert_called_once()
+        package.assert_called_once_with("videos/4.mp4", 480)
+        assert video.resolution_width == 854 and video.probed_at is not None
+
+    def test_known_height_skips_the_probe(self):
+        package, probe = run_packaging(make_video(height=720), {})
+
+        probe.assert_not_called()
+        package.assert_called_once_with("videos/4.mp4", 720)
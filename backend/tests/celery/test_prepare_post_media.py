@@ -0,0 +1,97 @@
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+from celery.exceptions import MaxRetriesExceededError
+
+from app.celery import video_processing
+from app.celery.video_processing import prepare_post_media
+from app.models.clip_rendition import ClipRendition
+from app.models.enums import ClipStatus, SocialPlatform
+from app.models.post import Post
+
+
+def make_post(rendition_id=None, clip_status=ClipStatus.READY):
+    clip = SimpleNamespace(id=3, status=clip_status, file_path="videos/a_assets/clips/3.mp4")
+    return SimpleNamespace(
+        id=9, clip_id=3, clip=clip, rendition_id=rendition_id, error_message=None, media_urls=None,
+        account=SimpleNamespace(platform=SocialPlatform.TIKTOK),
+    )
+
+
+def make_rendition(rendition_id=5, status=ClipStatus.READY, version="v1"):
+    return SimpleNamespace(
+        id=rendition_id, status=status, clip_version=version, error_message=None,
+        file_path=f"renditions/{rendition_id}.mp4" if status == ClipStatus.READY else None, file_size=None,
+    )
+
+
+def fake_session(post, renditions):
+    db = MagicMock()
+    db.get.side_effect = lambda model, key: {Post: {post.id: post}, ClipRendition: renditions}[model].get(key)
+    return db
+
+
+@pytest.fixture
+def services():
+    with patch.object(video_processing, "clip_version", return_value="v1"), \
+            patch.object(video_processing, "AzureUploadService") as azure, \
+            patch.object(video_processing, "release_rendition") as release, \
+            patch.object(video_processing, "acquire_rendition") as acquire, \
+            patch.object(video_processing.render_slots, "try_acquire", return_value="token"), \
+            patch.object(video_processing.render_slots, "release"):
+        azure.return_value.get_blob_url.side_effect = lambda path: f"https://blob/{path}"
+        yield SimpleNamespace(release=release, acquire=acquire)
+
+
+class TestPreparePostMedia:
+    """Test cases for pointing a post at the cached platform rendition of its clip."""
+
+    def test_rendition_gone_from_the_cache_is_acquired_again(self, services):
+        post = make_post(rendition_id=5)
+        services.acquire.return_value = make_rendition(rendition_id=6)
+        db = fake_session(post, {})
+
+        with patch.object(video_processing, "SessionLocal", return_value=db):
+            result = prepare_post_media.run(post.id)
+
+        assert result["rendition_id"] == 6 and post.rendition_id == 6
+        assert post.media_urls == ["https://blob/renditions/6.mp4"]
+
+    def test_rendition_of_an_older_render_is_swapped(self, services):
+        post = make_post(rendition_id=5)
+        services.acquire.return_value = make_rendition(rendition_id=6)
+        db = fake_session(post, {5: make_rendition(rendition_id=5, version="v0")})
+
+        with patch.object(video_processing, "SessionLocal", return_value=db):
+            prepare_post_media.run(post.id)
+
+        services.release.assert_called_once_with(db, post)
+        services.acquire.assert_called_once_with(db, post.clip, SocialPlatform.TIKTOK, "v1")
+
+    def test_failed_encode_releases_the_reference(self, services):
+        post = make_post(rendition_id=5)
+        db = fake_session(post, {5: make_rendition(status=ClipStatus.PENDING)})
+
+        with patch.object(video_processing, "SessionLocal", return_value=db), \
+                patch.object(video_processing, "claim_encode", return_value=True), \
+                patch.object(video_processing, "encode_rendition", side_effect=RuntimeError("ffmpeg failed")):
+            result = prepare_post_media.run(post.id)
+
+        assert result["status"] == ClipStatus.FAILED.value
+        services.release.assert_called_once_with(db, post)
+        assert "ffmpeg failed" in post.error_message
+
+    def test_giving_up_on_the_clip_releases_the_reference(self, services):
+        post = make_post(rendition_id=5, clip_status=ClipStatus.PROCESSING)
+        db = fake_session(post, {})
+        prepare_post_media.push_request(id="task-1", retries=prepare_post_media.max_retries, called_directly=False)
+        try:
+            with patch.object(video_processing, "SessionLocal", return_value=db), pytest.raises(MaxRetriesExceededError):
+                prepare_post_media.run(post.id)
+        finally:
+            prepare_post_media.pop_request()
+
+        db.rollback.assert_called_once()
+        services.release.assert_called_once_with(db, post)
+        assert "timed out" in post.error_message
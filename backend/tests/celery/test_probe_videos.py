@@ -0,0 +1,58 @@
+from unittest.mock import MagicMock, patch
+
+from app.celery import video_processing
+from app.celery.video_processing import probe_pending_videos, probe_videos
+from app.models.video import Video
+
+
+def fake_probe(url):
+    if "broken" in url:
+        raise RuntimeError("ffprobe failed")
+    return {"duration_seconds": 30.0, "resolution_width": 1280, "resolution_height": 720, "video_codec": "h264"}
+
+
+class TestProbeVideos:
+    """Test cases for probing uploaded videos and writing the results back in bulk."""
+
+    def test_results_are_written_in_one_bulk_update(self):
+        db = MagicMock()
+        db.execute.return_value.all.return_value = [(1, "videos/ok.mp4"), (2, "videos/broken.mp4")]
+        with patch.object(video_processing, "SessionLocal", return_value=db), \
+                patch.object(video_processing, "AzureUploadService") as azure, \
+                patch.object(video_processing, "probe_media", side_effect=fake_probe):
+            azure.return_value.generate_read_sas_url.side_effect = lambda path: f"https://blob/{path}"
+            result = probe_videos([1, 2])
+
+        assert result == {"probed": 1, "failed": 1}
+        statement, rows = db.execute.call_args.args
+        assert statement.is_update and statement.table.name == Video.__tablename__
+        rows = sorted(rows, key=lambda row: row["id"])
+        assert {key: value for key, value in rows[0].items() if key != "probed_at"} == {
+            "id": 1, "duration_seconds": 30.0, "resolution_width": 1280, "resolution_height": 720,
+        }
+        # a failed probe still records probed_at, so the video isn't probed again forever
+        assert set(rows[1]) == {"id", "probed_at"}
+        assert all(row["probed_at"] is not None for row in rows)
+        db.commit.assert_called_once()
+        db.close.assert_called_once()
+
+    def test_nothing_to_probe(self):
+        db = MagicMock()
+        db.execute.return_value.all.return_value = []
+        with patch.object(video_processing, "SessionLocal", return_value=db):
+            assert probe_videos([9]) == {"probed": 0}
+        db.commit.assert_not_called()
+
+    def test_pending_videos_are_probed_in_one_batch(self):
+        db = MagicMock()
+        db.execute.return_value.scalars.return_value.all.return_value = [8, 5]
+        with patch.object(video_processing, "SessionLocal", return_value=db), \
+                patch.object(video_processing, "probe_videos", return_value={"probed": 2, "failed": 0}) as probe:
+            assert probe_pending_videos(batch_size=2) == {"probed": 2, "failed": 0}
+        probe.assert_called_once_with([8, 5])
+
+        db.execute.return_value.scalars.return_value.all.return_value = []
+        with patch.object(video_processing, "SessionLocal", return_value=db), \
+                patch.object(video_processing, "probe_videos") as probe:
+            assert probe_pending_videos() == {"probed": 0}
+        probe.assert_not_called()
@@ -0,0 +1,91 @@
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import fakeredis
+import pytest
+from celery.exceptions import SoftTimeLimitExceeded
+
+from app.celery import video_processing
+from app.celery.video_processing import render_clips, render_pending_clips
+from app.models.enums import ClipFormat, ClipStatus
+
+
+@pytest.fixture
+def redis_client():
+    client = fakeredis.FakeRedis(decode_responses=True)
+    with patch.object(video_processing, "redis_client", client):
+        yield client
+
+
+def fake_session(*results):
+    db = MagicMock()
+    db.execute.side_effect = list(results) + [MagicMock()] * 10
+    return db
+
+
+def scalars(items):
+    result = MagicMock()
+    result.scalars.return_value.all.return_value = items
+    return result
+
+
+def values_of(statement):
+    return {column.key: value.value for column, value in statement._values.items()}
+
+
+class TestRenderPendingClips:
+    """Test cases for the beat task that queues clip renders."""
+
+    def test_puts_back_stale_clips_and_queues_each_video_once(self, redis_client):
+        sessions = []
+
+        def session():
+            sessions.append(fake_session(MagicMock(rowcount=2), scalars([4, 5])))
+            return sessions[-1]
+
+        with patch.object(video_processing, "SessionLocal", side_effect=session), \
+                patch.object(render_clips, "delay") as delay:
+            first = render_pending_clips()
+            second = render_pending_clips()
+
+        assert first == {"requeued": 2, "queued": 2}
+        assert second == {"requeued": 2, "queued": 0}
+        assert [call.args for call in delay.call_args_list] == [(4,), (5,)]
+        sweep = sessions[0].execute.call_args_list[0].args[0]
+        assert values_of(sweep)["status"] == ClipStatus.PENDING
+
+
+class TestRenderClips:
+    """Test cases for rendering the pending clips of a video."""
+
+    def test_soft_time_limit_fails_the_batch_and_stops(self, redis_client, tmp_path):
+        (tmp_path / "processing").mkdir()
+        redis_client.set("render_clips_queued:7", 1)
+        video = SimpleNamespace(id=7, azure_file_path="videos/7.mp4", resolution_width=1920, resolution_height=1080)
+        clip = SimpleNamespace(
+            id=11, start_time=0.0, end_time=5.0, format=ClipFormat.VERTICAL_9_16,
+            transcript_start_index=None, transcript_end_index=None,
+        )
+        db = fake_session(scalars([clip]))
+        db.get.return_value = video
+        renderer = MagicMock()
+        renderer.render_batch.side_effect = SoftTimeLimitExceeded()
+
+        with patch.object(video_processing, "SessionLocal", return_value=db), \
+                patch.object(video_processing.render_slots, "try_acquire", return_value="token"), \
+                patch.object(video_processing.render_slots, "release") as release, \
+                patch.object(video_processing, "record_video_access", return_value=True), \
+                patch.object(video_processing, "ClipRenderService", return_value=renderer), \
+                patch.object(video_processing, "load_transcript", return_value=None), \
+                patch.object(video_processing, "load_reframe_track", return_value=None), \
+                patch.object(video_processing, "load_or_build_keyframe_index", return_value=None), \
+                patch.object(video_processing.settings, "TEMP_BASE_DIR", tmp_path), \
+                pytest.raises(SoftTimeLimitExceeded):
+            render_clips.run(7)
+
+        statements = [call.args[0] for call in db.execute.call_args_list]
+        assert values_of(statements[1])["status"] == ClipStatus.PROCESSING
+        assert values_of(statements[2])["status"] == ClipStatus.FAILED
+        assert len(statements) == 3  # no further batch after running out of time
+        release.assert_called_once_with("token")
+        assert redis_client.get("render_clips_queued:7") is None
@@ -0,0 +1,24 @@
+from app.celery.analysis import compute_loudness, index_scenes, track_subject
+from app.celery.celery_app import celery_app
+from app.celery.video_processing import ingest_video, package_clip_hls, package_video_hls, render_clips
+from app.config import settings
+
+
+class TestTaskTimeLimits:
+    """Test cases for the per-task limits of ffmpeg-heavy tasks."""
+
+    def test_heavy_tasks_outlast_the_global_limits(self):
+        assert ingest_video.soft_time_limit == settings.INGEST_TIME_LIMIT_SECONDS
+        assert render_clips.soft_time_limit == settings.CLIP_RENDER_TIME_LIMIT_SECONDS
+        assert package_video_hls.soft_time_limit == package_clip_hls.soft_time_limit == settings.HLS_TIME_LIMIT_SECONDS
+        for task in (ingest_video, render_clips, package_video_hls):
+            assert task.soft_time_limit > celery_app.conf.task_soft_time_limit
+            assert task.time_limit > task.soft_time_limit
+
+    def test_analysis_subprocess_timeouts_fit_inside_their_task(self):
+        for task, timeout in (
+            (index_scenes, settings.SCENE_INDEX_TIMEOUT_SECONDS),
+            (track_subject, settings.REFRAME_TIMEOUT_SECONDS),
+            (compute_loudness, settings.LOUDNESS_TIMEOUT_SECONDS),
+        ):
+            assert timeout < task.soft_time_limit < task.time_limit
@@ -0,0 +1,88 @@
+from unittest.mock import patch
+
+import pytest
+from celery.canvas import Signature
+from celery.exceptions import Retry
+
+from app.celery.analysis import analysis_slots, compute_loudness
+from app.celery.audio_processing import audio_slots
+from app.celery.celery_app import celery_app
+from app.celery.task_waits import REHYDRATION_WAITS_HEADER, SLOT_WAITS_HEADER, wait_for_rehydration, wait_for_slot
+from app.celery.video_processing import hls_slots, ingest_slots, ingest_video, package_video_hls, render_clips, render_slots
+from app.config import settings
+
+
+@pytest.fixture
+def worker_request():
+    """Run tasks as a worker would: not called directly, with a delivered message's retries and headers."""
+    pushed = []
+
+    def push(task, retries=3, **headers):
+        task.push_request(id="task-1", chord={"task": "callback"}, retries=retries, args=[7], kwargs={},
+                          called_directly=False, **headers)
+        pushed.append(task)
+
+    yield push
+    for task in pushed:
+        task.pop_request()
+
+
+class TestTaskWaits:
+    """Test cases for sending tasks back to wait for a slot or a rehydrating source."""
+
+    def test_slot_wait_keeps_the_task_id_and_retry_count(self, worker_request):
+        worker_request(ingest_video, retries=3, slot_waits=2)
+        with patch.object(Signature, "apply_async", autospec=True) as send:
+            retry = wait_for_slot(ingest_video, 30)
+
+        send.assert_called_once()
+        sig = send.call_args.args[0]
+        assert retry.sig is sig
+        assert sig.options["task_id"] == "task-1"
+        assert sig.options["chord"] == {"task": "callback"}
+        assert sig.options["retries"] == 3
+        assert sig.options["headers"] == {SLOT_WAITS_HEADER: 3, REHYDRATION_WAITS_HEADER: 0}
+
+    def test_slot_wait_backs_off_up_to_the_cap(self, worker_request):
+        countdowns = []
+        for waits in (0, 1, 2, 20):
+            worker_request(render_clips, slot_waits=waits)
+            with patch.object(Signature, "apply_async", autospec=True):
+                countdowns.append(wait_for_slot(render_clips, 30).when)
+
+        assert 24 <= countdowns[0] <= 36
+        assert 48 <= countdowns[1] <= 72
+        assert 96 <= countdowns[2] <= 144
+        assert countdowns[3] <= settings.SLOT_WAIT_MAX_SECONDS * 1.2
+
+    def test_slot_waits_never_exhaust_max_retries(self, worker_request):
+        worker_request(package_video_hls, retries=package_video_hls.max_retries, slot_waits=500)
+        with patch.object(Signature, "apply_async", autospec=True) as send:
+            assert isinstance(wait_for_slot(package_video_hls, 60), Retry)
+        send.assert_called_once()
+
+    def test_rehydration_has_its_own_limit(self, worker_request):
+        worker_request(ingest_video, slot_waits=5, rehydration_waits=1)
+        with patch.object(Signature, "apply_async", autospec=True) as send:
+            retry = wait_for_rehydration(ingest_video, 7)
+        assert retry.when == settings.REHYDRATION_POLL_SECONDS
+        assert send.call_args.args[0].options["headers"] == {SLOT_WAITS_HEADER: 5, REHYDRATION_WAITS_HEADER: 2}
+
+        worker_request(ingest_video, rehydration_waits=settings.REHYDRATION_MAX_WAITS)
+        with patch.object(Signature, "apply_async", autospec=True) as send, pytest.raises(RuntimeError, match="rehydrating"):
+            wait_for_rehydration(ingest_video, 7)
+        send.assert_not_called()
+
+    def test_busy_node_sends_the_task_back(self, worker_request):
+        worker_request(ingest_video)
+        with patch.object(ingest_slots, "try_acquire", return_value=None), \
+                patch.object(Signature, "apply_async", autospec=True) as send, pytest.raises(Retry):
+            ingest_video.run(7)
+        send.assert_called_once()
+
+    def test_leases_outlive_the_tasks_holding_them(self):
+        assert ingest_slots.lease_seconds >= ingest_video.time_limit
+        assert render_slots.lease_seconds >= render_clips.time_limit
+        assert hls_slots.lease_seconds >= package_video_hls.time_limit
+        assert analysis_slots.lease_seconds >= compute_loudness.time_limit
+        assert audio_slots.lease_seconds >= celery_app.conf.task_time_limit
@@ -0,0 +1,76 @@
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.celery import transcription
+from app.celery.transcription import stitch_transcript, transcribe_segment, transcription_failed
+from app.models.enums import VideoStatus
+
+
+def word(text, start, end):
+    return {"word": text, "start": start, "end": end}
+
+
+def values_of(statement):
+    return {column.key: value.value for column, value in statement._values.items()}
+
+
+@pytest.fixture
+def db():
+    session = MagicMock()
+    with patch.object(transcription, "SessionLocal", return_value=session):
+        yield session
+
+
+class TestTranscriptionTasks:
+    """Test cases for the segment, stitch and error callback tasks of a transcription chord."""
+
+    def test_segment_without_a_backend_is_skipped(self):
+        with patch.object(transcription, "get_transcription_backend", return_value=None), \
+                patch.object(transcription, "AzureUploadService") as azure:
+            assert transcribe_segment.run(3, "videos/3.mp4", 2, 60.0, 120.0) == [2, None]
+        azure.assert_not_called()
+
+    def test_all_segments_failed_leaves_transcribing(self, db):
+        with patch.object(transcription, "save_video_transcript") as save:
+            result = stitch_transcript([[0, None], [1, None]], 3, VideoStatus.ANALYZING.value)
+
+        assert result == {"video_id": 3, "words": 0, "failed_segments": [0, 1]}
+        save.assert_not_called()
+        (statement,), _ = db.execute.call_args
+        assert values_of(statement) == {"status": VideoStatus.ANALYZING, "error_message": "Transcription failed"}
+        # only a video still in the transcribing stage is moved back
+        assert "video.status = 'transcribing'" in str(statement.whereclause.compile(compile_kwargs={"literal_binds": True}))
+        db.commit.assert_called_once()
+
+    def test_partly_failed_transcript_is_stored_and_flagged(self, db):
+        video = SimpleNamespace(id=3, azure_file_path="videos/3.mp4", status=VideoStatus.TRANSCRIBING, error_message=None)
+        db.get.return_value = video
+        results = [[1, [word("world", 5.0, 5.5)]], [0, [word("hello", 1.0, 1.5)]], [2, None]]
+
+        with patch.object(transcription, "save_video_transcript") as save:
+            result = stitch_transcript(results, 3, VideoStatus.READY.value)
+
+        assert result == {"video_id": 3, "words": 2, "failed_segments": [2]}
+        save.assert_called_once_with(db, video, [word("hello", 1.0, 1.5), word("world", 5.0, 5.5)])
+        assert video.status == VideoStatus.READY
+        assert video.error_message == "Transcription incomplete: 1 of 3 segments failed"
+
+    def test_stitch_keeps_a_status_someone_else_set(self, db):
+        video = SimpleNamespace(id=3, azure_file_path="videos/3.mp4", status=VideoStatus.FAILED, error_message=None)
+        db.get.return_value = video
+
+        with patch.object(transcription, "save_video_transcript"):
+            stitch_transcript([[0, [word("hi", 0.0, 0.2)]]], 3, VideoStatus.READY.value)
+
+        assert video.status == VideoStatus.FAILED
+        assert video.error_message is None
+
+    def test_error_callback_leaves_transcribing(self, db):
+        transcription_failed(3, VideoStatus.READY.value)
+
+        (statement,), _ = db.execute.call_args
+        assert values_of(statement) == {"status": VideoStatus.READY, "error_message": "Transcription failed"}
+        db.commit.assert_called_once()
+        db.close.assert_called_once()
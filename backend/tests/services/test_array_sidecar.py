@@ -0,0 +1,30 @@
+from unittest.mock import patch
+
+import numpy as np
+
+from app.services import array_sidecar
+from app.services.array_sidecar import load_arrays, save_arrays
+
+
+class TestSaveArrays:
+    """Test cases for storing related arrays as one .npz blob."""
+
+    def test_round_trip_keeps_every_name(self, tmp_path):
+        path = tmp_path / "sidecar.npz"
+        arrays = {
+            "starts": np.array([0.0, 1.5]),
+            "allow_pickle": np.array([1, 2], dtype=np.int32),
+            "file": np.array([True, False]),
+        }
+
+        with patch.object(array_sidecar, "_upload", side_effect=lambda name, data, _: path.write_bytes(data)) as upload:
+            size = save_arrays("videos/a_assets/words.npz", arrays)
+        with patch.object(array_sidecar, "_cached_file", return_value=path):
+            loaded = load_arrays("videos/a_assets/words.npz")
+
+        assert size == path.stat().st_size
+        upload.assert_called_once()
+        assert loaded is not None and loaded.keys() == arrays.keys()
+        for name, array in arrays.items():
+            np.testing.assert_array_equal(loaded[name], array)
+            assert loaded[name].dtype == array.dtype
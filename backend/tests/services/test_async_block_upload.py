@@ -0,0 +1,112 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.services.azure_storage import AzureUploadService, make_block_id
+
+
+class FakeBlobClient:
+    def __init__(self, fail_on_block=None):
+        self.staged = {}
+        self.committed = None
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.fail_on_block = fail_on_block
+        self._lock = threading.Lock()
+
+    def stage_block(self, block_id, data):
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if block_id == self.fail_on_block:
+                raise RuntimeError("stage failed")
+            self.staged[block_id] = data
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def commit_block_list(self, block_list, content_settings=None):
+        self.committed = list(block_list)
+
+
+async def body(*chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+def make_service(blob_client):
+    service = AzureUploadService()
+    service.get_blob_client = lambda file_path: blob_client
+    return service
+
+
+class TestUploadAsyncStreamInBlocks:
+    """Test cases for staging request bodies straight into Azure blocks."""
+
+    def test_rechunks_into_blocks_and_commits_in_order(self):
+        blob_client = FakeBlobClient()
+        service = make_service(blob_client)
+
+        uploaded = asyncio.run(service.upload_async_stream_in_blocks(
+            "ab12/x.mp4", body(b"a" * 3, b"b" * 4, b"c" * 3), block_size=4, max_concurrency=2
+        ))
+
+        assert uploaded == 10
+        block_ids = [make_block_id(0), make_block_id(1), make_block_id(2)]
+        assert blob_client.committed == block_ids
+        assert b"".join(blob_client.staged[block_id] for block_id in block_ids) == b"aaabbbbccc"
+        assert blob_client.max_in_flight <= 2
+
+    def test_rejects_oversized_body(self):
+        blob_client = FakeBlobClient()
+        service = make_service(blob_client)
+
+        with pytest.raises(ValueError):
+            asyncio.run(service.upload_async_stream_in_blocks(
+                "ab12/x.mp4", body(b"a" * 8, b"b" * 8), block_size=4, max_size=10
+            ))
+        assert blob_client.committed is None
+
+    def test_stage_failure_is_raised_and_nothing_committed(self):
+        blob_client = FakeBlobClient(fail_on_block=make_block_id(1))
+        service = make_service(blob_client)
+
+        with pytest.raises(RuntimeError):
+            asyncio.run(service.upload_async_stream_in_blocks(
+                "ab12/x.mp4", body(b"a" * 12), block_size=4, max_concurrency=1
+            ))
+        assert blob_client.committed is None
+
+    def test_in_flight_stages_are_finished_before_raising(self, monkeypatch):
+        class SlowBlobClient(FakeBlobClient):
+            def stage_block(self, block_id, data):
+                if block_id == make_block_id(0):
+                    time.sleep(0.2)
+                super().stage_block(block_id, data)
+
+        service = make_service(SlowBlobClient(fail_on_block=make_block_id(1)))
+        tasks = []
+        create_task = asyncio.create_task
+
+        def track(coro):
+            tasks.append(create_task(coro))
+            return tasks[-1]
+
+        monkeypatch.setattr(asyncio, "create_task", track)
+
+        async def run():
+            with pytest.raises(RuntimeError):
+                await service.upload_async_stream_in_blocks(
+                    "ab12/x.mp4", body(b"a" * 4, b"b" * 4, b"c" * 4), block_size=4, max_concurrency=2
+                )
+            return [task.done() for task in tasks]
+
+        assert asyncio.run(run()) == [True, True]
+
+    def test_empty_body(self):
+        service = make_service(FakeBlobClient())
+        with pytest.raises(ValueError):
+            asyncio.run(service.upload_async_stream_in_blocks("ab12/x.mp4", body(), block_size=4))
@@ -0,0 +1,58 @@
+import sys
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.services.audio_services import AudioExtractionService
+
+
+def fake_ffmpeg(stdout: bytes = b"", code: int = 0, stderr: str = ""):
+    script = f"import sys; sys.stdout.buffer.write({stdout!r}); sys.stderr.write({stderr!r}); sys.exit({code})"
+    return [sys.executable, "-c", script]
+
+
+def make_azure_service():
+    azure_service = MagicMock()
+    azure_service.generate_read_sas_url.return_value = "https://blob/source.mp4?sig=x"
+
+    def upload(path, stream, progress):
+        progress({"uploaded_bytes": len(stream.read())})
+
+    azure_service.upload_stream_in_blocks.side_effect = upload
+    return azure_service
+
+
+def extract(command):
+    azure_service = make_azure_service()
+    service = AudioExtractionService(azure_service=azure_service)
+    with patch.object(service, "build_command", return_value=command):
+        return service.extract_to_azure("videos/a.mp4", "videos/a_assets/audio.aac"), azure_service
+
+
+class TestAudioExtractionService:
+    """Test cases for streaming a video's audio track from ffmpeg into a blob."""
+
+    def test_command_reads_the_sas_url_and_writes_adts_to_stdout(self):
+        cmd = AudioExtractionService(azure_service=MagicMock()).build_command("https://blob/source.mp4")
+        assert cmd[cmd.index("-i") + 1] == "https://blob/source.mp4"
+        assert "-vn" in cmd
+        assert cmd[cmd.index("-f") + 1] == "adts"
+        assert cmd[-1] == "pipe:1"
+
+    def test_streams_ffmpeg_output_into_the_audio_blob(self):
+        size, azure_service = extract(fake_ffmpeg(stdout=b"\xff\xf1" * 512))
+        assert size == 1024
+        assert azure_service.upload_stream_in_blocks.call_args.args[0] == "videos/a_assets/audio.aac"
+        azure_service.delete_blob.assert_not_called()
+
+    def test_failed_ffmpeg_deletes_the_partial_blob(self):
+        azure_service = make_azure_service()
+        service = AudioExtractionService(azure_service=azure_service)
+        with patch.object(service, "build_command", return_value=fake_ffmpeg(stdout=b"x", code=1, stderr="Invalid data")), \
+                pytest.raises(RuntimeError, match="Invalid data"):
+            service.extract_to_azure("videos/a.mp4", "videos/a_assets/audio.aac")
+        azure_service.delete_blob.assert_called_once_with("videos/a_assets/audio.aac")
+
+    def test_source_without_audio_is_an_error(self):
+        with pytest.raises(RuntimeError, match="no audio"):
+            extract(fake_ffmpeg(stdout=b""))
@@ -0,0 +1,57 @@
+import os
+
+import pytest
+
+from app.services import azure_clients
+from app.services.azure_clients import get_blob_service_client
+
+CONNECTION_STRING = (
+    "DefaultEndpointsProtocol=https;AccountName=account;AccountKey=a2V5;EndpointSuffix=core.windows.net"
+)
+OTHER_CONNECTION_STRING = CONNECTION_STRING.replace("AccountName=account", "AccountName=other")
+
+
+@pytest.fixture(autouse=True)
+def empty_registry():
+    azure_clients._reset_after_fork()
+    yield
+    azure_clients._reset_after_fork()
+
+
+class TestBlobServiceClientRegistry:
+    """Test cases for the per-process BlobServiceClient registry."""
+
+    def test_client_is_shared_per_connection_string(self):
+        client = get_blob_service_client(CONNECTION_STRING)
+
+        assert get_blob_service_client(CONNECTION_STRING) is client
+        assert get_blob_service_client(OTHER_CONNECTION_STRING) is not client
+        assert client.account_name == "account"
+
+    def test_reset_hook_rebuilds_the_client(self):
+        client = get_blob_service_client(CONNECTION_STRING)
+        azure_clients._reset_after_fork()
+
+        rebuilt = get_blob_service_client(CONNECTION_STRING)
+        assert rebuilt is not client
+        assert get_blob_service_client(CONNECTION_STRING) is rebuilt
+
+    @pytest.mark.skipif(not hasattr(os, "fork"), reason="needs os.fork")
+    def test_forked_child_builds_its_own_client(self):
+        parent_client = get_blob_service_client(CONNECTION_STRING)
+        read_end, write_end = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            # child: report whether the registry was emptied and the client rebuilt
+            try:
+                ok = not azure_clients._clients and get_blob_service_client(CONNECTION_STRING) is not parent_client
+                os.write(write_end, b"1" if ok else b"0")
+            finally:
+                os._exit(0)
+
+        os.close(write_end)
+        with os.fdopen(read_end, "rb") as reader:
+            result = reader.read()
+        os.waitpid(pid, 0)
+        assert result == b"1"
+        assert get_blob_service_client(CONNECTION_STRING) is parent_client
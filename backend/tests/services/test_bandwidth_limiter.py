@@ -0,0 +1,85 @@
+from typing import cast
+
+import fakeredis
+import pytest
+import redis
+
+from app.models.enums import UserPlan
+from app.services.bandwidth_limiter import NodeBandwidthLimiter
+
+
+@pytest.fixture
+def redis_client():
+    return fakeredis.FakeRedis(decode_responses=True)
+
+
+def make_limiter(redis_client, rate=1000.0, burst=1000.0):
+    return NodeBandwidthLimiter(rate_bytes_per_sec=rate, burst_bytes=burst, node_id="test", redis_client=redis_client)
+
+
+def take(limiter, import_id, nbytes, weight=1.0):
+    """Run the token bucket script once and return the wait it asks for."""
+    return float(limiter._get_script()(
+        keys=limiter._keys(),
+        args=[limiter.rate_bytes_per_sec, limiter.burst_bytes, nbytes, import_id, weight, limiter.STALE_AFTER_SECONDS],
+    ))
+
+
+class TestNodeBandwidthLimiter:
+    """Test cases for the redis token bucket shared by imports on a node."""
+
+    def test_burst_is_granted_without_waiting(self, redis_client):
+        limiter = make_limiter(redis_client)
+        assert take(limiter, "a", 600) == 0
+        assert take(limiter, "a", 400) == 0
+        tokens = float(redis_client.hget(limiter._keys()[0], "tokens"))
+        assert tokens == pytest.approx(0, abs=5)
+
+    def test_empty_bucket_asks_to_wait_for_the_deficit(self, redis_client):
+        limiter = make_limiter(redis_client)
+        take(limiter, "a", 1000)
+        # nothing is taken while waiting, so asking again gives the same answer
+        assert take(limiter, "a", 500) == pytest.approx(0.5, abs=0.02)
+        assert take(limiter, "a", 500) == pytest.approx(0.5, abs=0.02)
+
+    def test_wait_scales_with_share_of_active_weight(self, redis_client):
+        limiter = make_limiter(redis_client)
+        take(limiter, "pro", 1000, weight=3)
+        # "free" holds a quarter of the active weight, "pro" three quarters
+        assert take(limiter, "free", 500, weight=1) == pytest.approx(2.0, abs=0.05)
+        assert take(limiter, "pro", 500, weight=3) == pytest.approx(0.5 / 0.75, abs=0.05)
+
+    def test_stale_imports_stop_counting(self, redis_client):
+        limiter = make_limiter(redis_client)
+        take(limiter, "gone", 1000, weight=3)
+        _, weights_key, heartbeats_key = limiter._keys()
+        redis_client.hset(heartbeats_key, "gone", 0)
+        assert take(limiter, "a", 500, weight=1) == pytest.approx(0.5, abs=0.02)
+        assert redis_client.hget(weights_key, "gone") is None
+
+    def test_release_drops_the_share(self, redis_client):
+        limiter = make_limiter(redis_client)
+        with limiter.share("a", UserPlan.PRO) as throttle:
+            assert throttle(100) == 0
+            assert redis_client.hget(limiter._keys()[1], "a") is not None
+        assert redis_client.hget(limiter._keys()[1], "a") is None
+        assert redis_client.hget(limiter._keys()[2], "a") is None
+
+    def test_large_reads_are_split_into_bursts(self, redis_client, monkeypatch):
+        limiter = make_limiter(redis_client, rate=1e9, burst=1000)
+        sleeps = []
+        monkeypatch.setattr("app.services.bandwidth_limiter.time.sleep", sleeps.append)
+        limiter.throttle("a", 2500)
+        assert all(s <= limiter.MAX_SLEEP_SECONDS for s in sleeps)
+
+    def test_plan_weights(self):
+        assert NodeBandwidthLimiter.weight_for_plan(None) == NodeBandwidthLimiter.weight_for_plan(UserPlan.FREE)
+        assert NodeBandwidthLimiter.weight_for_plan(UserPlan.PRO) > NodeBandwidthLimiter.weight_for_plan(UserPlan.FREE)
+
+    def test_redis_errors_fail_open(self):
+        class BrokenRedis:
+            def register_script(self, script):
+                raise redis.ConnectionError("down")
+
+        limiter = NodeBandwidthLimiter(rate_bytes_per_sec=1000, burst_bytes=1000, node_id="test", redis_client=cast(redis.Redis, BrokenRedis()))
+        assert limiter.throttle("a", 5000) == 0
@@ -0,0 +1,30 @@
+import base64
+
+import pytest
+
+from app.services.azure_storage import MAX_BLOCK_COUNT, build_block_plan
+
+
+class TestBuildBlockPlan:
+    """Test cases for server-provided block upload plans."""
+
+    def test_small_file_uses_minimum_block_size(self):
+        plan = build_block_plan(10 * 1024 * 1024)
+        assert plan["block_size"] == 4 * 1024 * 1024
+        assert plan["block_count"] == 3
+        assert [base64.b64decode(block_id) for block_id in plan["block_ids"]] == [
+            b"0000000000", b"0000000001", b"0000000002"
+        ]
+
+    def test_block_ids_are_deterministic(self):
+        assert build_block_plan(123456789) == build_block_plan(123456789)
+
+    def test_huge_file_stays_under_block_limit(self):
+        plan = build_block_plan(400 * 1024 ** 3)
+        assert plan["block_count"] <= MAX_BLOCK_COUNT
+        assert plan["block_size"] % (1024 * 1024) == 0
+        assert plan["block_size"] * plan["block_count"] >= 400 * 1024 ** 3
+
+    def test_rejects_empty_file(self):
+        with pytest.raises(ValueError):
+            build_block_plan(0)
@@ -0,0 +1,38 @@
+from app.models.enums import ClipFormat
+from app.services.captions import CaptionStyle, CaptionWindow, build_caption_tracks, caption_blob_name
+from app.services.transcription import Transcript
+
+
+def make_transcript():
+    words = [{"word": w, "start": 10 + i * 0.5, "end": 10 + i * 0.5 + 0.4} for i, w in enumerate("one two three four five six".split())]
+    words.append({"word": "later", "start": 20.0, "end": 20.5})
+    return Transcript.from_words(words)
+
+
+class TestCaptions:
+    """Test cases for batched clip caption tracks."""
+
+    def test_tracks_for_overlapping_clips_are_relative_to_each_clip(self):
+        style = CaptionStyle(name="test", max_chars=9)
+        clips = [
+            CaptionWindow(clip_id=1, start_time=10, end_time=15, format=ClipFormat.VERTICAL_9_16),
+            CaptionWindow(clip_id=2, start_time=11, end_time=21, format=ClipFormat.SQUARE_1_1),
+        ]
+        tracks = build_caption_tracks(make_transcript(), clips, style)
+        ass, srt = tracks[1]
+        assert srt.startswith("1\n00:00:00,000 --> 00:00:00,900\none two\n")
+        assert "Dialogue: 0,0:00:01.50,0:00:02.40,Default,,0,0,0,,four five" in ass
+        assert "PlayResY: 1920" in ass
+        ass, srt = tracks[2]
+        # "later" follows a long pause, so it starts a new line
+        assert srt.rstrip().endswith("00:00:09,000 --> 00:00:09,500\nlater")
+        assert "PlayResY: 1080" in ass
+
+    def test_cache_key_changes_with_style_and_window(self):
+        clip = CaptionWindow(clip_id=3, start_time=0, end_time=30, format=ClipFormat.VERTICAL_9_16)
+        name = caption_blob_name("videos/a.mp4", clip, CaptionStyle(name="default"), "ass")
+        assert name.startswith("videos/a_assets/captions/3-default-") and name.endswith(".ass")
+        assert name == caption_blob_name("videos/a.mp4", clip, CaptionStyle(name="default"), "ass")
+        assert name != caption_blob_name("videos/a.mp4", clip, CaptionStyle(name="default", font_size=70), "ass")
+        clip.end_time = 31
+        assert name != caption_blob_name("videos/a.mp4", clip, CaptionStyle(name="default"), "ass")
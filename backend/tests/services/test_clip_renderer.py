@@ -0,0 +1,45 @@
+from typing import cast
+
+from app.models.enums import ClipFormat
+from app.services.azure_storage import AzureUploadService
+from app.services.clip_renderer import ClipRenderService, ClipSpec
+
+
+def make_clips():
+    return [
+        ClipSpec(clip_id=1, start_time=10, end_time=40, format=ClipFormat.VERTICAL_9_16, output_path="a.mp4"),
+        ClipSpec(clip_id=2, start_time=25, end_time=55, format=ClipFormat.SQUARE_1_1, output_path="b.mp4"),
+    ]
+
+
+class TestClipRenderService:
+    """Test cases for the single-decode batch clip renderer."""
+
+    def test_filter_graph_splits_once_and_trims_relative_to_offset(self):
+        graph = ClipRenderService.build_filter_graph(make_clips(), offset=10, has_audio=True)
+        assert graph.count("split=2") == 2  # one video split, one audio asplit
+        assert "[vsrc0]trim=start=0:end=30" in graph
+        assert "[vsrc1]trim=start=15:end=45" in graph
+        assert "[asrc1]atrim=start=15:end=45" in graph
+
+    def test_filter_graph_without_audio(self):
+        graph = ClipRenderService.build_filter_graph(make_clips(), offset=10, has_audio=False)
+        assert "asplit" not in graph and "atrim" not in graph
+
+    def test_command_seeks_to_first_clip_and_writes_each_clip_to_its_pipe(self):
+        service = ClipRenderService(azure_service=cast(AzureUploadService, object()))
+        cmd = service.build_command("https://blob/source.mp4", make_clips(), [7, 9], has_audio=True)
+        assert cmd[cmd.index("-ss") + 1] == "10"
+        assert cmd[cmd.index("-t") + 1] == "45"
+        assert cmd[-1] == "pipe:9"
+        assert "pipe:7" in cmd
+        assert cmd.count("-filter_complex") == 1
+
+    def test_reframed_clip_moves_its_own_crop_with_sendcmd(self):
+        clips = make_clips()
+        clips[0].crop_path = [(0.0, 0.25, 0.0), (0.2, 0.25, 0.0), (0.4, 0.5, 0.0)]
+        graph = ClipRenderService.build_filter_graph(clips, offset=10, has_audio=False)
+        assert "sendcmd=c='0.400 crop@r0 x (iw-ow)*0.5, crop@r0 y (ih-oh)*0.0'" in graph
+        assert "crop@r0=w='min(iw,ih*9/16)':h='min(ih,iw*16/9)':x='(iw-ow)*0.25'" in graph
+        # the other clip keeps the fixed centre crop
+        assert "crop='min(iw,ih)':'min(iw,ih)'" in graph
@@ -0,0 +1,65 @@
+import numpy as np
+
+from app.services.clip_scoring import candidate_windows, non_max_suppression, score_candidates
+from app.services.loudness import SILENCE_DB
+
+
+class TestClipScoring:
+    """Test cases for the vectorized clip candidate scoring engine."""
+
+    def test_candidate_windows_add_scene_cut_starts(self):
+        windows = candidate_windows(40, scene_times=np.array([3.4]), lengths=(15, 30), stride=10)
+        assert [3, 18] in windows.tolist()
+        assert [0, 30] in windows.tolist() and [10, 40] in windows.tolist()
+        assert windows[:, 1].max() <= 40
+
+    def test_non_max_suppression_drops_overlapping_windows(self):
+        windows = np.array([[0, 30], [5, 35], [40, 70], [100, 130]])
+        scores = np.array([0.9, 0.8, 0.7, 0.1])
+        keep = non_max_suppression(windows, scores, top_n=3, max_overlap=0.3)
+        assert keep.tolist() == [0, 2, 3]
+
+    def test_loud_busy_section_wins(self):
+        rate = 10
+        envelope = np.full(600 * rate, -35, dtype=np.float16)
+        envelope[300 * rate:330 * rate] = -8
+        cuts = np.array([301.0, 305.0, 310.0, 318.0, 325.0])
+        candidates = score_candidates(600, envelope, cuts, rate_hz=rate, top_n=3)
+        best = candidates[0]
+        assert best.start_time >= 295 and best.end_time <= 335
+        assert best.score > 80
+        assert "scene cuts/min" in best.reasoning
+        assert all(0 <= c.score <= 100 for c in candidates)
+
+    def test_silence_does_not_set_the_energy_baseline(self, monkeypatch):
+        rate = 10
+        envelope = np.full(600 * rate, SILENCE_DB, dtype=np.float32)
+        envelope[400 * rate:] = np.random.default_rng(0).normal(-20, 1, 200 * rate)
+        for name in ("LIFT", "PACING", "SPEECH"):
+            monkeypatch.setattr(f"app.services.clip_scoring.settings.CLIP_WEIGHT_{name}", 0.0)
+        best = score_candidates(600, envelope, rate_hz=rate, top_n=1)[0]
+        # an ordinary stretch of the voiced audio, not an outlier next to the silent intro
+        assert best.start_time >= 400
+        assert 40 <= best.score <= 60
+
+    def test_zero_weights_switch_signals_off(self, monkeypatch):
+        envelope = np.full(600, -20, dtype=np.float16)
+        cuts = np.array([10.0, 20.0])
+        monkeypatch.setattr("app.services.clip_scoring.settings.CLIP_WEIGHT_PACING", 0.0)
+        candidates = score_candidates(60, envelope, cuts, rate_hz=10, top_n=1)
+        assert "scene cuts/min" not in candidates[0].reasoning
+
+        for name in ("ENERGY", "LIFT", "SPEECH"):
+            monkeypatch.setattr(f"app.services.clip_scoring.settings.CLIP_WEIGHT_{name}", 0.0)
+        assert score_candidates(60, envelope, cuts, rate_hz=10) == []
+
+    def test_two_hour_video_scores_quickly(self):
+        import time
+
+        rng = np.random.default_rng(0)
+        envelope = rng.uniform(-50, -5, 7200 * 10).astype(np.float16)
+        cuts = np.sort(rng.uniform(0, 7200, 1500))
+        started = time.perf_counter()
+        candidates = score_candidates(7200, envelope, cuts, rate_hz=10, top_n=10)
+        assert len(candidates) == 10
+        assert time.perf_counter() - started < 1.0
@@ -0,0 +1,42 @@
+import pytest
+
+from app.services.hls_packager import Rendition, ladder_for, sign_playlist, validate_playlist_path
+
+LADDER = [Rendition(1080, 5000), Rendition(720, 2800), Rendition(480, 1200)]
+
+MEDIA_PLAYLIST = """#EXTM3U
+#EXT-X-VERSION:7
+#EXT-X-TARGETDURATION:4
+#EXT-X-PLAYLIST-TYPE:VOD
+#EXT-X-MAP:URI="init.mp4"
+#EXTINF:4.000000,
+seg_00000.m4s
+#EXTINF:2.500000,
+seg_00001.m4s
+#EXT-X-ENDLIST
+"""
+
+
+class TestHlsPackager:
+    """Test cases for HLS ladder selection and playlist signing."""
+
+    def test_ladder_never_upscales(self):
+        assert [rung.height for rung in ladder_for(720, LADDER)] == [720, 480]
+        assert [rung.height for rung in ladder_for(360, LADDER)] == [480]
+        assert [rung.height for rung in ladder_for(None, LADDER)] == [1080, 720, 480]
+
+    def test_sign_playlist_rewrites_segments_and_init(self):
+        signed = sign_playlist(MEDIA_PLAYLIST, lambda uri: f"https://blob/{uri}?sig")
+        assert '#EXT-X-MAP:URI="https://blob/init.mp4?sig"' in signed
+        assert "https://blob/seg_00001.m4s?sig" in signed
+        assert "#EXT-X-TARGETDURATION:4" in signed
+
+    def test_sign_playlist_keeps_uris_the_signer_skips(self):
+        master = "#EXTM3U\n#EXT-X-STREAM-INF:BANDWIDTH=5500000\nv0/index.m3u8\n"
+        assert sign_playlist(master, lambda uri: None) == master
+
+    def test_playlist_path_must_stay_inside_prefix(self):
+        assert validate_playlist_path("v1/index.m3u8") == "v1/index.m3u8"
+        for bad in ("../other/master.m3u8", "v1/seg_00001.m4s", "a/b/c.m3u8", "/master.m3u8"):
+            with pytest.raises(ValueError):
+                validate_playlist_path(bad)
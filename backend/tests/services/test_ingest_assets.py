@@ -0,0 +1,40 @@
+import io
+
+import pytest
+
+from app.services.ingest_assets import IngestAssetService, iter_jpeg_frames, thumbnail_index_for
+
+
+def fake_jpeg(payload: bytes) -> bytes:
+    app0 = b"\xff\xe0" + (2 + 5).to_bytes(2, "big") + b"JFIF\x00"
+    # a header value that looks like EOI must not end the image
+    dqt = b"\xff\xdb" + (2 + 2).to_bytes(2, "big") + b"\xff\xd9"
+    sos = b"\xff\xda" + (2 + 1).to_bytes(2, "big") + b"\x01"
+    return b"\xff\xd8" + app0 + dqt + sos + payload + b"\xff\xd9"
+
+
+class TestJpegFrames:
+    """Test cases for splitting ffmpeg's concatenated JPEG output."""
+
+    def test_splits_frames_across_chunk_boundaries(self):
+        frames = [fake_jpeg(b"\x12\xff\x00\x34" * 50), fake_jpeg(b"\xff\xd0\x56"), fake_jpeg(b"")]
+        stream = io.BytesIO(b"".join(frames))
+        assert list(iter_jpeg_frames(stream, chunk_size=7)) == frames
+
+    def test_truncated_stream_raises(self):
+        with pytest.raises(ValueError):
+            list(iter_jpeg_frames(io.BytesIO(fake_jpeg(b"\x01\x02")[:-1])))
+
+    def test_thumbnail_candidate_inside_clip(self):
+        assert thumbnail_index_for(12, 30, count=10, interval=5) == 3
+        assert thumbnail_index_for(11, 12, count=10, interval=5) == 2
+        assert thumbnail_index_for(100, 120, count=10, interval=5) == 9
+        assert thumbnail_index_for(0, 10, count=0, interval=5) is None
+
+
+class TestFilterGraph:
+    """Test cases for the single-pass ingest filter graph."""
+
+    def test_poster_is_scaled_before_the_thumbnail_scan(self):
+        poster = next(part for part in IngestAssetService.build_filter_graph().split(";") if part.startswith("[vposter]"))
+        assert poster.index("scale=") < poster.index("thumbnail=")
@@ -0,0 +1,31 @@
+from array import array
+
+from app.models.enums import ClipFormat
+from app.services.clip_renderer import matches_source_aspect
+from app.services.keyframe_index import KeyframeIndex
+
+
+class TestKeyframeIndex:
+    """Test cases for the keyframe index used by stream-copy clip cuts."""
+
+    def test_snaps_to_latest_keyframe_at_or_before(self):
+        index = KeyframeIndex(array("d", [0.0, 2.0, 4.0, 6.0]))
+        assert index.keyframe_at_or_before(5.9) == 4.0
+        assert index.keyframe_at_or_before(4.0) == 4.0
+        assert index.keyframe_at_or_before(100) == 6.0
+
+    def test_time_before_first_keyframe_uses_first_keyframe(self):
+        index = KeyframeIndex(array("d", [0.5, 2.5]))
+        assert index.keyframe_at_or_before(0.1) == 0.5
+
+    def test_round_trips_through_bytes(self):
+        index = KeyframeIndex(array("d", [0.0, 2.002, 4.004]))
+        restored = KeyframeIndex.from_bytes(index.to_bytes())
+        assert list(restored.timestamps) == [0.0, 2.002, 4.004]
+        assert len(index.to_bytes()) == 24
+
+    def test_source_aspect_match(self):
+        assert matches_source_aspect(ClipFormat.HORIZONTAL_16_9, 1920, 1080)
+        assert matches_source_aspect(ClipFormat.VERTICAL_9_16, 1080, 1920)
+        assert not matches_source_aspect(ClipFormat.SQUARE_1_1, 1920, 1080)
+        assert not matches_source_aspect(ClipFormat.HORIZONTAL_16_9, None, None)
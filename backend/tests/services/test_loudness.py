@@ -0,0 +1,34 @@
+import io
+
+import numpy as np
+
+from app.services.loudness import SILENCE_DB, energy_scores, envelope_from_pcm, window_loudness
+
+
+def pcm(amplitudes, sample_rate=16000, seconds_each=1.0):
+    samples = np.concatenate([np.full(int(sample_rate * seconds_each), a, dtype=np.float32) for a in amplitudes])
+    return io.BytesIO((samples * 32767).astype("<i2").tobytes())
+
+
+class TestLoudnessEnvelope:
+    """Test cases for the loudness envelope and window energy scoring."""
+
+    def test_envelope_is_ten_hz_float16_dbfs(self):
+        envelope = envelope_from_pcm(pcm([0.5, 0.0, 0.05]), rate_hz=10)
+        assert envelope.dtype == np.float16
+        assert len(envelope) == 30
+        np.testing.assert_allclose(envelope[:10], -6.02, atol=0.05)
+        assert (envelope[10:20] == SILENCE_DB).all()
+        np.testing.assert_allclose(envelope[20:], -26.02, atol=0.05)
+
+    def test_window_loudness_matches_naive_mean(self):
+        envelope = np.random.default_rng(0).uniform(-60, 0, 500).astype(np.float16)
+        means = window_loudness(envelope, 50)
+        assert len(means) == 451
+        np.testing.assert_allclose(means[123], envelope[123:173].astype(np.float64).mean(), rtol=1e-5)
+
+    def test_energy_scores_peak_at_loud_section(self):
+        envelope = np.full(600, -40, dtype=np.float16)
+        envelope[300:350] = -10
+        scores = energy_scores(envelope, window_seconds=5, rate_hz=10)
+        assert int(np.argmax(scores)) == 300
@@ -0,0 +1,79 @@
+import json
+import subprocess
+from unittest.mock import patch
+
+import pytest
+
+from app.config import settings
+from app.services.media_probe import probe_media, sniff_video_type
+
+
+class TestSniffVideoType:
+    """Test cases for recognising upload containers from their first bytes."""
+
+    def test_iso_bmff(self):
+        assert sniff_video_type(b"\x00\x00\x00\x20ftypisom\x00\x00\x02\x00") == "video/mp4"
+        assert sniff_video_type(b"\x00\x00\x00\x14ftypqt  \x00\x00\x00\x00") == "video/quicktime"
+
+    def test_ebml_doctype(self):
+        header = b"\x1a\x45\xdf\xa3\x9f\x42\x86\x81\x01\x42\x82\x84"
+        assert sniff_video_type(header + b"webm") == "video/webm"
+        assert sniff_video_type(header + b"matroska") == "video/x-matroska"
+
+    def test_avi_and_flv(self):
+        assert sniff_video_type(b"RIFF\x00\x00\x00\x00AVI LIST") == "video/x-msvideo"
+        assert sniff_video_type(b"FLV\x01\x05") == "video/x-flv"
+
+    def test_unknown(self):
+        assert sniff_video_type(b"") is None
+        assert sniff_video_type(b"RIFF\x00\x00\x00\x00WAVEfmt ") is None
+        assert sniff_video_type(b"<html>") is None
+
+
+def ffprobe_output(payload, returncode=0, stderr=b""):
+    stdout = json.dumps(payload).encode() if payload is not None else b""
+    return subprocess.CompletedProcess(args=[], returncode=returncode, stdout=stdout, stderr=stderr)
+
+
+class TestProbeMedia:
+    """Test cases for reading duration and resolution from ffprobe's JSON."""
+
+    def test_reads_format_and_video_stream(self):
+        payload = {
+            "streams": [{"codec_name": "h264", "width": 1920, "height": 1080, "duration": "61.000000"}],
+            "format": {"format_name": "mov,mp4,m4a,3gp,3g2,mj2", "duration": "61.057000"},
+        }
+        with patch("app.services.media_probe.subprocess.run", return_value=ffprobe_output(payload)) as run:
+            probed = probe_media("https://blob/video.mp4?sig=x")
+
+        assert probed == {
+            "duration_seconds": 61.057,
+            "resolution_width": 1920,
+            "resolution_height": 1080,
+            "video_codec": "h264",
+            "format_name": "mov,mp4,m4a,3gp,3g2,mj2",
+        }
+        cmd = run.call_args.args[0]
+        assert cmd[-1] == "https://blob/video.mp4?sig=x"
+        assert cmd[cmd.index("-probesize") + 1] == str(settings.PROBE_MAX_BYTES)
+        assert run.call_args.kwargs["timeout"] == settings.PROBE_TIMEOUT_SECONDS
+
+    def test_falls_back_to_the_stream_duration(self):
+        payload = {"streams": [{"width": 720, "height": 1280, "duration": "12.5"}], "format": {"duration": "N/A"}}
+        with patch("app.services.media_probe.subprocess.run", return_value=ffprobe_output(payload)):
+            probed = probe_media("https://blob/video.webm")
+        assert probed["duration_seconds"] == 12.5
+        assert probed["resolution_height"] == 1280
+
+    def test_audio_only_file_has_no_resolution(self):
+        payload = {"streams": [], "format": {"format_name": "mp3", "duration": "200.1"}}
+        with patch("app.services.media_probe.subprocess.run", return_value=ffprobe_output(payload)):
+            probed = probe_media("https://blob/audio.mp3")
+        assert probed["duration_seconds"] == 200.1
+        assert probed["resolution_width"] is None and probed["resolution_height"] is None
+
+    def test_ffprobe_failure_raises(self):
+        failed = ffprobe_output(None, returncode=1, stderr=b"Invalid data found when processing input")
+        with patch("app.services.media_probe.subprocess.run", return_value=failed), \
+                pytest.raises(RuntimeError, match="Invalid data"):
+            probe_media("https://blob/broken.mp4")
@@ -0,0 +1,79 @@
+import threading
+import time
+from typing import cast
+
+import fakeredis
+import pytest
+import redis
+
+from app.services.memory_budget import NodeMemoryBudget
+
+
+@pytest.fixture
+def redis_client():
+    return fakeredis.FakeRedis(decode_responses=True)
+
+
+def make_budget(redis_client, budget_bytes=100, node_id="test"):
+    return NodeMemoryBudget(budget_bytes=budget_bytes, node_id=node_id, redis_client=redis_client)
+
+
+class TestNodeMemoryBudget:
+    """Test cases for the node memory budget."""
+
+    def test_reserve_and_release(self, redis_client):
+        budget = make_budget(redis_client)
+        with budget.reserve(60) as reserved:
+            assert reserved == 60
+            assert budget.stats()["memory_reserved_bytes"] == 60
+        assert budget.stats()["memory_reserved_bytes"] == 0
+        assert budget.stats()["memory_peak_reserved_bytes"] == 60
+
+    def test_oversized_request_is_clamped(self, redis_client):
+        budget = make_budget(redis_client)
+        with budget.reserve(500) as reserved:
+            assert reserved == 100
+
+    def test_budget_is_shared_across_instances(self, redis_client):
+        # each worker process has its own instance; they meet in redis
+        first, second = make_budget(redis_client), make_budget(redis_client)
+        first.acquire(80)
+        with pytest.raises(TimeoutError):
+            second.acquire(40, timeout=0.1)
+        other_node = make_budget(redis_client, node_id="other")
+        other_node.release(other_node.acquire(40, timeout=0.1))
+
+    def test_reader_blocks_until_space_is_released(self, redis_client):
+        budget = make_budget(redis_client)
+        token = budget.acquire(80)
+        acquired = threading.Event()
+
+        def reader():
+            with make_budget(redis_client).reserve(40):
+                acquired.set()
+
+        thread = threading.Thread(target=reader)
+        thread.start()
+        time.sleep(0.2)
+        assert not acquired.is_set()
+        assert budget.stats()["memory_waiting_readers"] == 1
+
+        budget.release(token)
+        thread.join(timeout=1)
+        assert acquired.is_set()
+        assert budget.stats()["memory_waiting_readers"] == 0
+
+    def test_expired_leases_free_their_bytes(self, redis_client):
+        budget = NodeMemoryBudget(budget_bytes=100, lease_seconds=0.1, node_id="test", redis_client=redis_client)
+        budget.acquire(100)
+        time.sleep(0.2)
+        budget.acquire(100, timeout=0.1)
+
+    def test_redis_errors_fail_open(self):
+        class BrokenRedis:
+            def register_script(self, script):
+                raise redis.ConnectionError("down")
+
+        budget = NodeMemoryBudget(budget_bytes=100, node_id="test", redis_client=cast(redis.Redis, BrokenRedis()))
+        assert budget.acquire(100)
+        assert budget.acquire(100)
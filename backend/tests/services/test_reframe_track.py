@@ -0,0 +1,36 @@
+import io
+
+import numpy as np
+
+from app.models.enums import ClipFormat
+from app.services.reframe_track import crop_path, smooth_track, subject_centres
+
+
+class TestReframeTrack:
+    """Test cases for the per-video subject track and clip crop paths."""
+
+    def test_centre_follows_a_moving_subject(self):
+        frames = np.zeros((8, 36, 64), dtype=np.uint8)
+        for i in range(8):
+            frames[i, 12:24, 4 + 6 * i:10 + 6 * i] = 255
+        centres = subject_centres(io.BytesIO(frames.tobytes()))
+        assert centres.shape == (8, 2)
+        assert np.all(np.diff(centres[:, 0]) > 0)
+        assert abs(centres[0, 1] - 0.5) < 0.05
+
+    def test_smoothing_does_not_cross_scene_cuts(self):
+        centres = np.array([[0.2, 0.5]] * 10 + [[0.8, 0.5]] * 10, dtype=np.float32)
+        smoothed = smooth_track(centres, rate_hz=5, cut_times=[2.0], window_seconds=2)
+        assert np.allclose(smoothed[:10, 0], 0.2) and np.allclose(smoothed[10:, 0], 0.8)
+        blurred = smooth_track(centres, rate_hz=5, window_seconds=2)
+        assert 0.2 < blurred[9, 0] < 0.8
+
+    def test_crop_path_is_relative_to_clip_and_clamped(self):
+        track = np.array([[0.0, 0.5], [0.5, 0.5], [1.0, 0.5], [0.5, 0.5]], dtype=np.float16)
+        path = crop_path(track, 0.2, 0.6, ClipFormat.VERTICAL_9_16, 1920, 1080, rate_hz=5)
+        assert path is not None
+        assert [round(t, 3) for t, _, _ in path] == [0.0, 0.2]
+        assert [x for _, x, _ in path] == [0.5, 1.0]
+        assert crop_path(track, 0, 1, ClipFormat.HORIZONTAL_16_9, 1920, 1080, rate_hz=5) is None
+        assert crop_path(track, 0, 1, ClipFormat.VERTICAL_9_16, 1080, 1920, rate_hz=5) is None
+        assert crop_path(track, 0, 1, ClipFormat.VERTICAL_9_16, None, None, rate_hz=5) is None
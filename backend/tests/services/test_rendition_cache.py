@@ -0,0 +1,222 @@
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from typing import Callable, Optional, cast
+
+import pytest
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.evaluator import _EvaluatorCompiler
+from sqlalchemy.sql import functions
+
+import app.models  # noqa: F401  registers every mapped class
+from app.models.clip import Clip
+from app.models.clip_rendition import ClipRendition
+from app.models.enums import ClipFormat, ClipStatus, SocialPlatform
+from app.models.post import Post
+from app.services.rendition_cache import (
+    PLATFORM_PROFILES,
+    PlatformProfile,
+    acquire_rendition,
+    build_encode_command,
+    claim_encode,
+    release_rendition,
+    rendition_blob_name,
+    select_evictions,
+)
+
+
+class TestRenditionCache:
+    """Test cases for the per-platform clip rendition cache."""
+
+    def test_blob_name_is_keyed_by_profile_settings_and_clip_version(self):
+        profile = PLATFORM_PROFILES[SocialPlatform.TIKTOK]
+        name = rendition_blob_name("videos/a_assets/clips/7.mp4", profile, "v1")
+        assert name.startswith("videos/a_assets/clips/7_assets/renditions/tiktok-")
+        changed = PlatformProfile("tiktok", 1920, 6000, 60, 128, 600)
+        assert rendition_blob_name("videos/a_assets/clips/7.mp4", changed, "v1") != name
+        assert rendition_blob_name("videos/a_assets/clips/7.mp4", profile, "v2") != name
+
+    def test_encode_command_caps_size_rate_and_length(self):
+        cmd = build_encode_command("https://blob/clip.mp4", PLATFORM_PROFILES[SocialPlatform.TWITTER], "/tmp/out.mp4")
+        assert cmd[cmd.index("-t") + 1] == "140"
+        assert cmd[cmd.index("-fpsmax") + 1] == "40"
+        assert "min(iw,1280)" in cmd[cmd.index("-vf") + 1]
+        assert cmd[-1] == "/tmp/out.mp4"
+
+    def test_evicts_idle_then_least_recently_used_until_within_budget(self):
+        now = datetime.now(timezone.utc)
+        rows = [
+            (1, 100, now - timedelta(hours=1)),
+            (2, 100, now - timedelta(days=40)),
+            (3, 100, now - timedelta(hours=5)),
+            (4, 100, now),
+        ]
+        cutoff = now - timedelta(days=30)
+        assert select_evictions(rows, total_bytes=1000, budget_bytes=2000, idle_cutoff=cutoff) == [2]
+        assert select_evictions(rows, total_bytes=1000, budget_bytes=750, idle_cutoff=cutoff) == [2, 3, 1]
+
+
+
+class FakeRenditionTable:
+    """
+    In-memory clip_rendition table shared by the sessions of concurrent callers.
+
+    WHERE clauses and SET values built by rendition_cache are evaluated by SQLAlchemy against the
+    stored rows. A session takes the table lock with its first statement and holds it until it
+    commits, the way FOR UPDATE and UPDATE row locks serialize callers in postgres.
+    """
+
+    KEY = ("clip_id", "profile", "format", "profile_key", "clip_version")
+
+    def __init__(self):
+        self.rows = {}
+        self.ids = itertools.count(1)
+        self.lock = threading.Lock()
+        self.evaluator = _EvaluatorCompiler(ClipRendition)
+        self.after_insert: Optional[Callable[["FakeRenditionTable"], None]] = None
+
+    def matching(self, whereclause):
+        match = self.evaluator.process(whereclause)
+        return [row for row in self.rows.values() if match(row)]
+
+    def evaluate(self, row, expression):
+        if isinstance(expression, functions.now):
+            return datetime.now(timezone.utc)
+        if isinstance(expression, functions.Function) and expression.name == "greatest":
+            return max(self.evaluate(row, clause) for clause in expression.clauses)
+        return self.evaluator.process(expression)(row)
+
+    def insert(self, values):
+        key = {name: values[name] for name in self.KEY}
+        if not any(all(getattr(row, name) == value for name, value in key.items()) for row in self.rows.values()):
+            row_id = next(self.ids)
+            self.rows[row_id] = ClipRendition(id=row_id, **values, updated_at=datetime.now(timezone.utc))
+        if self.after_insert:
+            self.after_insert(self)
+
+
+class FakeSession(Session):
+    def __init__(self, table):
+        super().__init__()
+        self.table = table
+        self.locked = False
+
+    def execute(self, stmt):
+        if not self.locked:
+            assert self.table.lock.acquire(timeout=5), "another session never committed"
+            self.locked = True
+        if stmt.is_insert:
+            self.table.insert(stmt.compile(dialect=postgresql.dialect()).params)
+            return SimpleNamespace(rowcount=1)
+        matched = self.table.matching(stmt.whereclause)
+        if stmt.is_select:
+            return SimpleNamespace(scalar_one_or_none=lambda: matched[0] if matched else None)
+        for row in matched:
+            for column, expression in stmt._values.items():
+                setattr(row, column.key, self.table.evaluate(row, expression))
+        return SimpleNamespace(rowcount=len(matched))
+
+    def add(self, obj):
+        pass
+
+    def commit(self):
+        if self.locked:
+            self.locked = False
+            self.table.lock.release()
+
+
+CLIP = cast(Clip, SimpleNamespace(id=7, format=ClipFormat.VERTICAL_9_16))
+
+
+def post_of(rendition_id):
+    return cast(Post, SimpleNamespace(rendition_id=rendition_id))
+
+
+def acquire_and_claim(table, version="v1"):
+    db = FakeSession(table)
+    rendition = acquire_rendition(db, CLIP, SocialPlatform.TIKTOK, version)
+    db.commit()
+    return rendition.id, claim_encode(db, rendition.id)
+
+
+class TestRenditionReferences:
+    """Test cases for sharing one rendition between posts: references, encode claims and eviction races."""
+
+    def test_ten_accounts_share_one_encode(self):
+        table = FakeRenditionTable()
+        with ThreadPoolExecutor(max_workers=10) as pool:
+            results = list(pool.map(lambda _: acquire_and_claim(table), range(10)))
+
+        assert len({rendition_id for rendition_id, _ in results}) == 1
+        assert sum(claimed for _, claimed in results) == 1
+        (rendition,) = table.rows.values()
+        assert rendition.ref_count == 10
+        assert rendition.status == ClipStatus.PROCESSING
+
+    def test_rerendered_clip_gets_its_own_rendition(self):
+        table = FakeRenditionTable()
+        old_id, _ = acquire_and_claim(table, "v1")
+        new_id, claimed = acquire_and_claim(table, "v2")
+        assert new_id != old_id and claimed
+        assert table.rows[old_id].ref_count == table.rows[new_id].ref_count == 1
+
+    def test_release_drops_references_without_going_negative(self):
+        table = FakeRenditionTable()
+        rendition_id, _ = acquire_and_claim(table)
+        acquire_and_claim(table)
+        posts = [post_of(rendition_id) for _ in range(3)]
+        for post in posts:
+            db = FakeSession(table)
+            release_rendition(db, post)
+            db.commit()
+            assert post.rendition_id is None
+        assert table.rows[rendition_id].ref_count == 0
+
+        db = FakeSession(table)
+        release_rendition(db, post_of(None))
+        db.commit()
+        assert table.rows[rendition_id].ref_count == 0
+
+    def test_failed_or_stale_encodes_can_be_claimed_again(self):
+        table = FakeRenditionTable()
+        rendition_id, claimed = acquire_and_claim(table)
+        assert claimed
+        assert not claim_encode(FakeSession(table), rendition_id)
+
+        table.rows[rendition_id].status = ClipStatus.FAILED
+        assert claim_encode(FakeSession(table), rendition_id)
+
+        table.rows[rendition_id].updated_at = datetime.now(timezone.utc) - timedelta(days=1)
+        assert claim_encode(FakeSession(table), rendition_id)
+
+        table.rows[rendition_id].status = ClipStatus.READY
+        assert not claim_encode(FakeSession(table), rendition_id)
+
+    def test_row_evicted_between_insert_and_lock_is_inserted_again(self):
+        table = FakeRenditionTable()
+        rendition_id, _ = acquire_and_claim(table)
+        db = FakeSession(table)
+        release_rendition(db, post_of(rendition_id))
+        db.commit()
+        evictions = []
+
+        def evict_once(table):
+            if not evictions:
+                evictions.append(table.rows.pop(rendition_id))
+
+        table.after_insert = evict_once
+        db = FakeSession(table)
+        rendition = acquire_rendition(db, CLIP, SocialPlatform.TIKTOK, "v1")
+        db.commit()
+        assert evictions and rendition.id != rendition_id
+        assert rendition.ref_count == 1
+        assert rendition.status == ClipStatus.PENDING
+
+    def test_gives_up_when_the_row_keeps_disappearing(self):
+        table = FakeRenditionTable()
+        table.after_insert = lambda table: table.rows.clear()
+        with pytest.raises(RuntimeError):
+            acquire_rendition(FakeSession(table), CLIP, SocialPlatform.TIKTOK, "v1")
@@ -0,0 +1,79 @@
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from typing import cast
+from unittest.mock import MagicMock, patch
+
+import pytest
+from azure.storage.blob import BlobSasPermissions
+
+from app.config import settings
+from app.services import sas_signing
+from app.services.sas_signing import SasSigner
+from app.services.storage_router import StorageShard
+
+
+def make_shard(account_key=None):
+    """A shard and the mock that fetches its user delegation keys."""
+    fetch_key = MagicMock(side_effect=lambda **kwargs: SimpleNamespace(**kwargs))
+    shard = SimpleNamespace(
+        name="shard-a", account_name="account", container_name="videos",
+        account_key=account_key, blob_service=SimpleNamespace(get_user_delegation_key=fetch_key),
+    )
+    return cast(StorageShard, shard), fetch_key
+
+
+def in_hours(hours):
+    return datetime.now(timezone.utc) + timedelta(hours=hours)
+
+
+@pytest.fixture
+def generate_blob_sas():
+    with patch.object(sas_signing, "generate_blob_sas", return_value="token") as generate:
+        yield generate
+
+
+class TestSasSigner:
+    """Test cases for signing SAS tokens with cached keys."""
+
+    def test_account_key_signs_without_a_delegation_key(self, generate_blob_sas):
+        shard, fetch_key = make_shard(account_key="a2V5")
+        assert SasSigner().sign(shard, "ab12/x.mp4", BlobSasPermissions(read=True), in_hours(1)) == "token"
+
+        assert generate_blob_sas.call_args.kwargs["account_key"] == "a2V5"
+        fetch_key.assert_not_called()
+
+    def test_delegation_key_is_fetched_once(self, generate_blob_sas):
+        shard, fetch_key = make_shard()
+        signer = SasSigner()
+        for blob_name in ("ab12/x.mp4", "cd34/y.mp4"):
+            signer.sign(shard, blob_name, BlobSasPermissions(write=True), in_hours(1))
+
+        fetch_key.assert_called_once()
+        first, second = (call.kwargs["user_delegation_key"] for call in generate_blob_sas.call_args_list)
+        assert first is second
+
+    def test_delegation_key_is_refreshed_before_it_expires(self, generate_blob_sas):
+        shard, fetch_key = make_shard()
+        signer = SasSigner()
+        signer.sign(shard, "ab12/x.mp4", BlobSasPermissions(read=True), in_hours(1))
+        key = generate_blob_sas.call_args.kwargs["user_delegation_key"]
+
+        # a token that would outlive the key, less the refresh margin, needs a new key
+        ttl = settings.SAS_DELEGATION_KEY_TTL_HOURS
+        signer.sign(shard, "ab12/x.mp4", BlobSasPermissions(read=True), in_hours(ttl) - timedelta(minutes=1))
+
+        assert fetch_key.call_count == 2
+        refreshed = generate_blob_sas.call_args.kwargs["user_delegation_key"]
+        assert refreshed is not key
+        assert refreshed.key_expiry_time >= key.key_expiry_time
+
+    def test_expired_delegation_key_is_replaced(self, generate_blob_sas):
+        shard, fetch_key = make_shard()
+        signer = SasSigner()
+        stale = SimpleNamespace(key_expiry_time=in_hours(-1))
+        signer._delegation_keys[shard.name] = (cast(sas_signing.UserDelegationKey, stale), in_hours(-1))
+
+        signer.sign(shard, "ab12/x.mp4", BlobSasPermissions(read=True), in_hours(1))
+
+        fetch_key.assert_called_once()
+        assert generate_blob_sas.call_args.kwargs["user_delegation_key"] is not stale
@@ -0,0 +1,28 @@
+import numpy as np
+
+from app.services.scene_index import SCENE_DTYPE, parse_scene_scores, scene_cuts
+
+METADATA_OUTPUT = """frame:0    pts:0       pts_time:0
+lavfi.scene_score=0.000000
+frame:1    pts:1024    pts_time:0.2
+lavfi.scene_score=0.012000
+frame:2    pts:2048    pts_time:0.4
+lavfi.scene_score=0.731000
+frame:3    pts:3072    pts_time:0.6
+lavfi.scene_score=0.090000
+""".splitlines()
+
+
+class TestSceneIndex:
+    """Test cases for the scene-change index sidecar."""
+
+    def test_parse_keeps_scores_above_floor(self):
+        index = parse_scene_scores(METADATA_OUTPUT, min_score=0.05)
+        assert index.dtype == SCENE_DTYPE
+        np.testing.assert_allclose(index["time"], [0.4, 0.6])
+        np.testing.assert_allclose(index["score"], [0.731, 0.09], rtol=1e-6)
+
+    def test_scene_cuts_filters_by_threshold_and_range(self):
+        index = np.array([(1.0, 0.5), (2.0, 0.1), (3.0, 0.8), (9.0, 0.9)], dtype=SCENE_DTYPE)
+        np.testing.assert_allclose(scene_cuts(index, threshold=0.3), [1.0, 3.0, 9.0])
+        np.testing.assert_allclose(scene_cuts(index, threshold=0.3, start=2.0, end=9.0), [3.0])
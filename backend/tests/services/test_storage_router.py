@@ -0,0 +1,77 @@
+from collections import Counter
+
+import pytest
+
+from app.services.storage_router import StorageRouter, StorageShard
+
+
+def make_shard(name: str) -> StorageShard:
+    return StorageShard.from_config({
+        "name": name,
+        "container": f"{name}-videos",
+        "connection_string": f"DefaultEndpointsProtocol=https;AccountName={name};AccountKey=a2V5;EndpointSuffix=core.windows.net",
+    })
+
+
+class TestStorageRouter:
+    """Test cases for consistent-hash storage routing."""
+
+    def test_shard_parsed_from_connection_string(self):
+        shard = make_shard("acct1")
+        assert shard.account_name == "acct1"
+        assert shard.account_key == "a2V5"
+        assert shard.blob_url("ab12/x.mp4") == "https://acct1.blob.core.windows.net/acct1-videos/ab12/x.mp4"
+
+    def test_blob_names_are_prefixed_and_resolve_to_the_same_shard(self):
+        router = StorageRouter([make_shard("a"), make_shard("b"), make_shard("c")])
+        blob_name = router.make_blob_name("some-uuid/video.mp4")
+        prefix, rest = blob_name.split("/", 1)
+        hashed, shard_name = prefix.split("~")
+        assert len(hashed) == 4 and rest == "some-uuid/video.mp4"
+        assert router.shard_for_blob(blob_name).name == shard_name
+        assert router.shard_for_blob(blob_name) is router.shard_for_prefix(hashed)
+
+    def test_existing_blobs_stay_on_their_shard_when_shards_change(self):
+        router = StorageRouter([make_shard("a"), make_shard("b")])
+        names = [router.make_blob_name(f"{i}/video.mp4") for i in range(200)]
+        placed = {name: router.shard_for_blob(name).name for name in names}
+        grown = StorageRouter([make_shard("a"), make_shard("b"), make_shard("c"), make_shard("d")])
+        assert {name: grown.shard_for_blob(name).name for name in names} == placed
+        # new blobs do use the new shards
+        assert {grown.shard_for_blob(grown.make_blob_name(f"{i}/new.mp4")).name for i in range(200)} >= {"c", "d"}
+
+    def test_blob_on_removed_shard_is_an_error(self):
+        router = StorageRouter([make_shard("a"), make_shard("b")])
+        with pytest.raises(ValueError):
+            router.shard_for_blob("cafe~gone/video.mp4")
+
+    def test_routing_key_groups_blobs(self):
+        router = StorageRouter([make_shard("a"), make_shard("b")])
+        first = router.make_blob_name("one.mp4", routing_key="user:1")
+        second = router.make_blob_name("two.mp4", routing_key="user:1")
+        assert first.split("/")[0] == second.split("/")[0]
+
+    def test_legacy_names_go_to_primary(self):
+        router = StorageRouter([make_shard("a"), make_shard("b")])
+        assert router.shard_for_blob("My_Title_abc_20250101000000.mp4") is router.primary
+        assert router.shard_for_blob("0b8e4a34-5d7e-4a8e-9d55-7f1f0f0c1d11/video.mp4") is router.primary
+        # a custom name that looks like a bare hash prefix is not routed
+        assert router.shard_for_blob("cafe/x.mp4") is router.primary
+
+    def test_shard_names_must_be_path_safe(self):
+        with pytest.raises(ValueError):
+            make_shard("bad/name")
+        with pytest.raises(ValueError):
+            StorageRouter([make_shard("a"), make_shard("a")])
+
+    def test_blobs_spread_over_shards(self):
+        router = StorageRouter([make_shard("a"), make_shard("b"), make_shard("c")])
+        counts = Counter(
+            router.shard_for_blob(router.make_blob_name(f"{i}/video.mp4")).name for i in range(3000)
+        )
+        assert set(counts) == {"a", "b", "c"}
+        assert min(counts.values()) > 500
+
+    def test_requires_a_shard(self):
+        with pytest.raises(ValueError):
+            StorageRouter([])
@@ -0,0 +1,56 @@
+from types import SimpleNamespace
+from typing import cast
+from unittest.mock import Mock
+
+from app.models.enums import StorageTier
+from app.models.video import Video
+from app.services.storage_tiering import record_video_access
+
+
+class FakeAzure:
+    def __init__(self, rehydrating=False):
+        self.calls = []
+        self.rehydrating = rehydrating
+
+    def set_blob_tier(self, path, tier, rehydrate_priority=None):
+        self.calls.append((path, tier, rehydrate_priority))
+        return True
+
+    def is_rehydrating(self, path):
+        return self.rehydrating
+
+
+def access(tier, azure):
+    video = cast(Video, SimpleNamespace(azure_file_path="ab12~a/x.mp4", access_tier=tier, last_accessed_at=None))
+    readable = record_video_access(Mock(), video, azure)
+    return video, readable
+
+
+class TestRecordVideoAccess:
+    """Test cases for bringing read videos back to the hot tier."""
+
+    def test_hot_video_is_untouched(self):
+        azure = FakeAzure()
+        video, readable = access(StorageTier.HOT, azure)
+        assert readable and video.access_tier == StorageTier.HOT and azure.calls == []
+        assert video.last_accessed_at is not None
+
+    def test_cool_video_is_promoted_without_rehydrate_priority(self):
+        azure = FakeAzure()
+        video, readable = access(StorageTier.COOL, azure)
+        assert readable and video.access_tier == StorageTier.HOT
+        assert azure.calls == [("ab12~a/x.mp4", "Hot", None)]
+
+    def test_archived_video_waits_for_rehydration(self):
+        azure = FakeAzure(rehydrating=True)
+        video, readable = access(StorageTier.ARCHIVE, azure)
+        assert not readable and video.access_tier == StorageTier.REHYDRATING
+        assert azure.calls == [("ab12~a/x.mp4", "Hot", "High")]
+
+        video, readable = access(StorageTier.REHYDRATING, azure)
+        assert not readable and video.access_tier == StorageTier.REHYDRATING
+        assert len(azure.calls) == 1
+
+        azure.rehydrating = False
+        video, readable = access(StorageTier.REHYDRATING, azure)
+        assert readable and video.access_tier == StorageTier.HOT
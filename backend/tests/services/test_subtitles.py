@@ -0,0 +1,49 @@
+import json
+
+from app.services.subtitles import parse_subtitles, select_subtitle_track
+
+INFO = {
+    "language": "fr",
+    "subtitles": {
+        "en": [{"ext": "vtt", "url": "https://subs/en.vtt"}],
+        "fr-FR": [{"ext": "srv3", "url": "https://subs/fr.srv3"}, {"ext": "json3", "url": "https://subs/fr.json3"}],
+    },
+    "automatic_captions": {"de": [{"ext": "vtt", "url": "https://subs/de.vtt"}]},
+}
+
+VTT = """WEBVTT
+
+00:00:01.000 --> 00:00:02.000
+hello there
+
+00:00:02.000 --> 00:00:04.000 align:start
+hello there
+<00:00:02.500><c>general</c> kenobi
+"""
+
+
+class TestSubtitles:
+    """Test cases for reusing source captions as transcripts."""
+
+    def test_prefers_manual_track_in_video_language(self):
+        track = select_subtitle_track(INFO, languages=["en"], allow_automatic=False)
+        assert track == {"url": "https://subs/fr.json3", "ext": "json3", "language": "fr-FR", "automatic": False}
+
+    def test_automatic_captions_only_when_allowed(self):
+        info = {"automatic_captions": INFO["automatic_captions"]}
+        assert select_subtitle_track(info, languages=["de"], allow_automatic=False) is None
+        track = select_subtitle_track(info, languages=["de"], allow_automatic=True)
+        assert track is not None and track["automatic"] is True
+
+    def test_vtt_cues_become_timed_words_without_rolling_repeats(self):
+        words = parse_subtitles(VTT, "vtt")
+        assert [word["word"] for word in words] == ["hello", "there", "general", "kenobi"]
+        assert words[0]["start"] == 1.0 and words[-1]["end"] == 4.0
+
+    def test_json3_uses_segment_offsets(self):
+        raw = json.dumps({"events": [
+            {"tStartMs": 1000, "dDurationMs": 2000, "segs": [{"utf8": "one"}, {"utf8": " two", "tOffsetMs": 1200}]},
+            {"tStartMs": 3000, "dDurationMs": 1, "aAppend": 1, "segs": [{"utf8": "\n"}]},
+        ]})
+        words = parse_subtitles(raw, "json3")
+        assert [(w["word"], w["start"], w["end"]) for w in words] == [("one", 1.0, 2.2), ("two", 2.2, 3.0)]
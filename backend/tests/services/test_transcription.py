@@ -0,0 +1,47 @@
+import numpy as np
+
+from app.services.transcription import (
+    FakeTranscriptionBackend,
+    Transcript,
+    plan_segments,
+    speech_activity,
+    stitch_segments,
+)
+
+
+class TestTranscriptionScheduling:
+    """Test cases for silence-aligned segmentation and transcript stitching."""
+
+    def test_segments_cut_in_nearby_silence(self):
+        rate = 10
+        envelope = np.full(1000 * rate, -20, dtype=np.float16)
+        envelope[310 * rate:312 * rate] = -90  # pause a little after the 300 s target
+        segments = plan_segments(1000, envelope, rate_hz=rate, target_seconds=300, search_seconds=30)
+        assert segments[0][0] == 0 and segments[-1][1] == 1000
+        assert 310 <= segments[0][1] <= 312
+        assert all(a[1] == b[0] for a, b in zip(segments, segments[1:]))
+
+    def test_segments_without_envelope_use_fixed_grid(self):
+        assert plan_segments(620, None, target_seconds=300, search_seconds=30) == [(0.0, 300.0), (300.0, 620.0)]
+
+    def test_stitch_orders_segments_and_drops_boundary_duplicates(self):
+        first = [{"word": "a", "start": 0.0, "end": 0.4}, {"word": "b", "start": 9.7, "end": 10.2}]
+        second = [{"word": "b", "start": 9.8, "end": 10.2}, {"word": "c", "start": 10.5, "end": 11.0}]
+        words = stitch_segments([(1, second), (0, first)])
+        assert [word["word"] for word in words] == ["a", "b", "c"]
+
+    def test_fake_backend_and_speech_activity(self):
+        words = FakeTranscriptionBackend(word_seconds=0.5).transcribe(b"", duration=3)
+        assert len(words) == 6
+        activity = speech_activity(Transcript.from_words(words).start_seconds(), duration=3, rate_hz=10)
+        assert len(activity) == 30 and activity.sum() == 6
+
+    def test_columnar_transcript_round_trip_and_range_slicing(self):
+        words = [{"word": w, "start": i * 0.5, "end": i * 0.5 + 0.4} for i, w in enumerate("the cat saw the dog".split())]
+        transcript = Transcript.from_arrays(Transcript.from_words(words).to_arrays())
+        assert transcript.vocab == ["the", "cat", "saw", "dog"]
+        assert transcript.words(0, len(transcript)) == words
+        first, last = transcript.range_for(0.5, 2.0)
+        assert (first, last) == (1, 4)
+        assert transcript.text(first, last) == "cat saw the"
+        assert transcript.range_for(10, 20) == (5, 5)
@@ -0,0 +1,65 @@
+import multiprocessing
+import signal
+import subprocess
+import sys
+import time
+
+import pytest
+from yt_dlp.version import __version__ as YTDLP_VERSION
+
+from app.services import ytdlp_executor
+from app.services.ytdlp_executor import WarmDownloadProcess
+
+
+class LoggingProxy:
+    """Stands in for Celery's stdout redirect: text only, no .buffer and no fileno."""
+
+    def __init__(self):
+        self.lines = []
+
+    def write(self, data):
+        self.lines.append(data)
+
+    def flush(self):
+        pass
+
+
+def run(argv):
+    process = WarmDownloadProcess(argv)
+    output = process.stdout.read()
+    errors = process.stderr.read()
+    return process.wait(timeout=60), output, errors
+
+
+class TestWarmDownloadProcess:
+    """Test cases for yt-dlp downloads run from the warm executor."""
+
+    def test_output_is_piped(self):
+        code, output, _ = run(["--version"])
+        assert code == 0
+        assert output.decode().strip() == YTDLP_VERSION
+
+    def test_child_with_replaced_stdout(self, monkeypatch):
+        # with a plain fork the child inherits the worker's redirected sys.stdout
+        monkeypatch.setattr(ytdlp_executor, "_context", multiprocessing.get_context("fork"))
+        proxy = LoggingProxy()
+        monkeypatch.setattr(sys, "stdout", proxy)
+        code, output, _ = run(["--version"])
+        assert code == 0
+        assert output.decode().strip() == YTDLP_VERSION
+        assert proxy.lines == []
+
+    def test_exit_code_and_stderr(self):
+        code, _, errors = run(["--no-such-option"])
+        assert code == 2
+        assert b"no such option" in errors
+
+    def test_wait_timeout(self, monkeypatch):
+        # a forked child picks up the patched download, which never finishes by itself
+        monkeypatch.setattr(ytdlp_executor, "_context", multiprocessing.get_context("fork"))
+        monkeypatch.setattr(ytdlp_executor, "_run_yt_dlp", lambda argv: time.sleep(30) or 0)
+        process = WarmDownloadProcess(["--version"])
+        with pytest.raises(subprocess.TimeoutExpired):
+            process.wait(timeout=0.1)
+        process.kill()
+        assert process.wait(timeout=10) == -signal.SIGKILL
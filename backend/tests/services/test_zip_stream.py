@@ -0,0 +1,44 @@
+import io
+import zipfile
+
+from app.services.zip_stream import ZipEntry, stream_zip
+
+
+def read_archive(entries):
+    return zipfile.ZipFile(io.BytesIO(b"".join(stream_zip(entries))))
+
+
+class TestZipStream:
+    """Test cases for the streaming store-mode ZIP writer."""
+
+    def test_archive_round_trips_with_stored_entries(self):
+        data = [b"a" * 100_000, b"", "héllo".encode("utf-8") * 3]
+        entries = [
+            ZipEntry(name="1-first.mp4", chunks=[data[0][:70_000], data[0][70_000:]], size=len(data[0])),
+            ZipEntry(name="2-empty.mp4", chunks=[], size=0),
+            ZipEntry(name="3-clip é.mp4", chunks=iter([data[2]]), size=len(data[2])),
+        ]
+        archive = read_archive(entries)
+        assert archive.testzip() is None
+        assert [info.filename for info in archive.infolist()] == ["1-first.mp4", "2-empty.mp4", "3-clip é.mp4"]
+        assert all(info.compress_type == zipfile.ZIP_STORED for info in archive.infolist())
+        assert [archive.read(name) for name in archive.namelist()] == data
+
+    def test_entries_without_size_use_zip64_fields(self):
+        archive = read_archive([ZipEntry(name="unknown.mp4", chunks=[b"x" * 10, b"y" * 5])])
+        assert archive.testzip() is None
+        assert archive.read("unknown.mp4") == b"x" * 10 + b"y" * 5
+        assert archive.infolist()[0].extract_version == 45
+
+    def test_first_bytes_arrive_before_entry_data_is_read(self):
+        def chunks():
+            raise AssertionError("data read before the header was sent")
+            yield b""
+
+        stream = stream_zip([ZipEntry(name="a.mp4", chunks=chunks(), size=1)])
+        assert next(stream).startswith(b"PK\x03\x04")
+
+    def test_more_entries_than_the_classic_end_record_holds(self):
+        archive = read_archive(ZipEntry(name=f"{i}.txt", chunks=[b"x"], size=1) for i in range(70_000))
+        assert len(archive.infolist()) == 70_000
+        assert archive.read("69999.txt") == b"x"
@@ -1,7 +1,10 @@
 "use client";
 import React, { useCallback, useRef, useState } from "react";
 import ProgressBar from "./ProgressBar";
-import { uploadFileComplete } from "../../lib/axios/upload_api_functions";
+import {
+  uploadFileComplete,
+  uploadFilesComplete,
+} from "../../lib/axios/upload_api_functions";
 import { useUploadStore } from "../../lib/store/uploadStore";
 import { toast } from "sonner";
 import { useVideoValidation } from "../../hooks/useVideoValidation";
@@ -20,7 +23,7 @@ import { videoValidationConfig } from "../../types/video_validation";
 export default function UploadArea() {
   const inputRef = useRef<HTMLInputElement | null>(null);
   const [isDragging, setIsDragging] = useState(false);
-  const [file, setFile] = useState<File | null>(null);
+  const [files, setFiles] = useState<File[]>([]);
   const [title, setTitle] = useState("");
   const [description, setDescription] = useState("");
   const [tagsRaw, setTagsRaw] = useState("");
@@ -43,8 +46,10 @@ export default function UploadArea() {
   const isUploading = useUploadStore((state) => state.isUploading);
   const setUploading = useUploadStore((state) => state.setUploading);
 
+  const file = files[0] ?? null;
+
   const resetForm = useCallback(() => {
-    setFile(null);
+    setFiles([]);
     setTitle("");
     setDescription("");
     setTagsRaw("");
@@ -52,25 +57,27 @@ export default function UploadArea() {
   }, [resetValidation]);
 
   const handleFiles = useCallback(
-    (files: FileList | null) => {
-      if (!files || files.length === 0) return;
-      const first = files[0];
+    async (selected: FileList | null) => {
+      if (!selected || selected.length === 0) return;
 
-      // Validate the video file using our validation hook
-      validateVideo(first)
-        .then((result) => {
+      // Validate each video file using our validation hook; keep the valid ones
+      const valid: File[] = [];
+      for (const candidate of Array.from(selected)) {
+        try {
+          const result = await validateVideo(candidate);
           if (result.isValid) {
-            setFile(first);
+            valid.push(candidate);
           } else {
             // Show validation errors to the user
             result.errors.forEach((error) => {
-              toast.error(error);
+              toast.error(`${candidate.name}: ${error}`);
             });
           }
-        })
-        .catch((error) => {
-          toast.error("Failed to validate video file");
-        });
+        } catch (error) {
+          toast.error(`Failed to validate ${candidate.name}`);
+        }
+      }
+      setFiles(valid);
     },
     [validateVideo],
   );
@@ -117,13 +124,13 @@ export default function UploadArea() {
   );
 
   const onStartUpload = useCallback(async () => {
-    if (!file) {
+    if (files.length === 0) {
       toast.error("Please select a file to upload.");
       return;
     }
 
-    // Check if we have a valid validation result
-    if (validationResult && !validationResult.isValid) {
+    // Check if we have a valid validation result (single-file uploads only; batches keep only valid files)
+    if (files.length === 1 && validationResult && !validationResult.isValid) {
       validationResult.errors.forEach((error) => {
         toast.error(error);
       });
@@ -136,13 +143,18 @@ export default function UploadArea() {
     setIsSubmitting(true);
 
     try {
-      // set uploading in store (uploadFileComplete will also set it, but ensure the store is in sync)
-      setUploading(true, file.name, fileId);
+      // set uploading in store (the upload helpers will also set it, but ensure the store is in sync)
+      setUploading(true, files[0].name, fileId);
 
-      // Note: uploadFileComplete signature expects (file, fileId, onProgress?)
-      await uploadFileComplete(file, fileId, (progress: number) => {
-        // progress updates are handled in the upload library/store; no local handling required here.
-      });
+      if (files.length === 1) {
+        // Note: uploadFileComplete signature expects (file, fileId, onProgress?)
+        await uploadFileComplete(files[0], fileId, (progress: number) => {
+          // progress updates are handled in the upload library/store; no local handling required here.
+        });
+      } else {
+        // one SAS request for the whole selection, then the files upload one after another
+        await uploadFilesComplete(files);
+      }
 
       toast.success("Upload complete.");
       resetForm();
@@ -157,7 +169,7 @@ export default function UploadArea() {
       // store will be reset by upload helpers, but ensure uploading is false
       setUploading(false);
     }
-  }, [file, resetForm, setUploading, validationResult]);
+  }, [files, resetForm, setUploading, validationResult]);
 
   const handleCancelClick = useCallback(() => {
     resetForm();
@@ -187,6 +199,7 @@ export default function UploadArea() {
           ref={inputRef}
           type="file"
           accept="video/*"
+          multiple
           className="hidden"
           onChange={onFileInputChange}
         />
@@ -220,9 +233,11 @@ export default function UploadArea() {
 
         <div className="flex items-center justify-between mb-4">
           <div className="text-sm text-gray-300">
-            {file
-              ? `${file.name} • ${(file.size / (1024 * 1024)).toFixed(1)} MB`
-              : "No file selected"}
+            {files.length > 1
+              ? `${files.length} files • ${(files.reduce((total, f) => total + f.size, 0) / (1024 * 1024)).toFixed(1)} MB`
+              : file
+                ? `${file.name} • ${(file.size / (1024 * 1024)).toFixed(1)} MB`
+                : "No file selected"}
           </div>
           {isValidating && (
             <div className="text-sm text-yellow-500">Validating...</div>
@@ -38,6 +38,7 @@ export const getAzureSasUrl = async (
     }>("/upload/generate-sas", {
       file_name: fileName,
       file_path: fileName, // Using fileName as file_path for now, as this is what the backend expects
+      file_size: fileSize || undefined, // the backend rejects a size of 0
     });
     return {
       sasUrl: response.data.sas_url,
@@ -50,6 +51,28 @@ export const getAzureSasUrl = async (
   }
 };
 
+/**
+ * Get Azure SAS URLs for several files in a single backend call
+ */
+export const getAzureSasUrls = async (
+  files: File[],
+): Promise<{ sasUrl: string; filePath: string; videoId: number }[]> => {
+  const response = await api.post<{
+    uploads: { sas_url: string; file_path: string; video_id: number }[];
+  }>("/upload/generate-sas/batch", {
+    files: files.map((file) => ({
+      file_name: file.name,
+      file_path: file.name,
+      file_size: file.size || undefined,
+    })),
+  });
+  return response.data.uploads.map((upload) => ({
+    sasUrl: upload.sas_url,
+    filePath: upload.file_path,
+    videoId: upload.video_id,
+  }));
+};
+
 /**
  * Upload file directly to Azure using SAS URL
  * Uses Azure Storage Blob SDK for robust, chunked uploads with parallelism
@@ -140,6 +163,52 @@ export const sendUploadInfoToBackend = async (
   }
 };
 
+type SasUpload = { sasUrl: string; filePath: string; videoId: number };
+
+/**
+ * Upload one file with an already issued SAS URL, then notify backend
+ */
+const uploadWithSas = async (
+  file: File,
+  fileId: string,
+  { sasUrl, filePath, videoId }: SasUpload,
+  onProgress?: (progress: number) => void,
+) => {
+  useUploadStore.getState().setUploading(true, file.name, fileId);
+
+  console.log("SAS URL and video ID retrieved:", {
+    sasUrl,
+    filePath,
+    videoId,
+  });
+
+  await uploadFileToAzure(sasUrl, file, fileId, onProgress);
+
+  const azureBlobUrl = sasUrl.split("?")[0];
+  const result = await sendUploadInfoToBackend(
+    file.name,
+    file.size,
+    azureBlobUrl,
+    videoId,
+  );
+
+  // Mark completed in store to keep progress at 100% and allow UI to reflect completion
+  try {
+    const store = useUploadStore.getState();
+    store.setProgress(100);
+    // If the store supports a completion flag, set it (optional, backward compatible)
+    if (typeof (store as any).setCompleted === "function") {
+      (store as any).setCompleted(file.name, fileId, videoId);
+    }
+    // Do NOT call setUploading(false) here, since some implementations reset progress on that call.
+    // Let the UI decide when to clear the completed state.
+  } catch {
+    // no-op if store is unavailable for any reason
+  }
+
+  return result;
+};
+
 /**
  * Complete upload workflow: get SAS URL, upload to Azure, notify backend
  */
@@ -151,42 +220,40 @@ export const uploadFileComplete = async (
   try {
     useUploadStore.getState().setUploading(true, file.name, fileId);
 
-    const { sasUrl, filePath, videoId } = await getAzureSasUrl(
-      file.name,
-      file.size,
-    );
+    const upload = await getAzureSasUrl(file.name, file.size);
 
-    console.log("SAS URL and video ID retrieved:", {
-      sasUrl,
-      filePath,
-      videoId,
-    });
+    return await uploadWithSas(file, fileId, upload, onProgress);
+  } catch (error) {
+    useUploadStore.getState().setUploading(false);
+    throw error;
+  }
+};
 
-    await uploadFileToAzure(sasUrl, file, fileId, onProgress);
-
-    const azureBlobUrl = sasUrl.split("?")[0];
-    const result = await sendUploadInfoToBackend(
-      file.name,
-      file.size,
-      azureBlobUrl,
-      videoId,
-    );
-
-    // Mark completed in store to keep progress at 100% and allow UI to reflect completion
-    try {
-      const store = useUploadStore.getState();
-      store.setProgress(100);
-      // If the store supports a completion flag, set it (optional, backward compatible)
-      if (typeof (store as any).setCompleted === "function") {
-        (store as any).setCompleted(file.name, fileId, videoId);
-      }
-      // Do NOT call setUploading(false) here, since some implementations reset progress on that call.
-      // Let the UI decide when to clear the completed state.
-    } catch {
-      // no-op if store is unavailable for any reason
-    }
+/**
+ * Complete upload workflow for several files: one backend call signs every
+ * file, then each one is uploaded to Azure and registered in turn
+ */
+export const uploadFilesComplete = async (
+  files: File[],
+  onProgress?: (file: File, progress: number) => void,
+) => {
+  if (files.length === 0) return [];
+  try {
+    useUploadStore.getState().setUploading(true, files[0].name);
 
-    return result;
+    const uploads = await getAzureSasUrls(files);
+
+    const results = [];
+    for (let i = 0; i < files.length; i++) {
+      const file = files[i];
+      const fileId = `${Date.now().toString(36)}-${Math.random().toString(36).slice(2, 9)}`;
+      results.push(
+        await uploadWithSas(file, fileId, uploads[i], (progress: number) =>
+          onProgress?.(file, progress),
+        ),
+      );
+    }
+    return results;
   } catch (error) {
     useUploadStore.getState().setUploading(false);
     throw error;